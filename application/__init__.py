@@ -1,46 +1,41 @@
 from application import settings
-from application.utilities.data_access_object import DataAccessObject
-from neo4j import CypherError
-
-dao = DataAccessObject(host=settings.NEO4J_HOST, port=settings.NEO4J_PORT,
-                       user=settings.NEO4J_USER, password=settings.NEO4J_PASSWORD, scheme=settings.NEO4J_SCHEME)
-
-
-def init_neo4j_database():
-    array_query_index = {}
-    array_query_index["news_index"] = """
-    CREATE INDEX index_news FOR (news:News) ON (news.entityID)
-    """
-    array_query_index["agr_full_text"] = """
-    CALL db.index.fulltext.createNodeIndex("agreementsFullTextSearch",["Agreement"],["name", "des"])
-    """
-    array_query_index["cty_full_text"] = """
-    CALL db.index.fulltext.createNodeIndex("countriesFullTextSearch",["Country"],["name", "des"])
-    """
-    array_query_index["event_full_text"] = """
-    CALL db.index.fulltext.createNodeIndex("eventsFullTextSearch",["Event"],["name", "des"])
-    """
-    array_query_index["loc_full_text"] = """
-    CALL db.index.fulltext.createNodeIndex("locationsFullTextSearch",["Location"],["name", "des"])
-    """
-    array_query_index["org_full_text"] = """
-    CALL db.index.fulltext.createNodeIndex("organizationsFullTextSearch",["Organization"],["name", "des"])
-    """
-    array_query_index["per_full_text"] = """
-    CALL db.index.fulltext.createNodeIndex("personsFullTextSearch",["Person"],["name", "des"])
-    """
-    # create indexes:
-    for key in array_query_index:
-        query = array_query_index[key]
-        try:
-            result = dao.run_write_query(query).data()
-        except CypherError:
-            continue
-    return 0
-
-init_neo4j_database()
-
-
-
-
-
+from application.utilities.data_access_object import DataAccessObject, Neo4jBackend, QueryTextCounter
+from application.utilities.metrics import QueryMetrics
+from application.utilities.slow_queries import SlowQueryLog
+from application.utilities.async_data_access_object import AsyncDataAccessObject, ThreadedBackend
+from application.utilities.schema_manager import SchemaManager
+
+
+def create_backend(backend_name):
+    if backend_name == "memory":
+        from application.utilities.memory_graph import MemoryBackend
+        return MemoryBackend()
+    elif backend_name == "neo4j":
+        return Neo4jBackend(host=settings.NEO4J_HOST, port=settings.NEO4J_PORT,
+                            user=settings.NEO4J_USER, password=settings.NEO4J_PASSWORD, scheme=settings.NEO4J_SCHEME,
+                            max_connection_pool_size=settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+                            connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                            max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME)
+    raise ValueError("Unknown storage backend: " + backend_name)
+
+
+storage_backend = create_backend(settings.STORAGE_BACKEND)
+slow_query_log = SlowQueryLog(storage_backend.profile_query, threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+                              size=settings.SLOW_QUERY_LOG_SIZE, profile=settings.SLOW_QUERY_PROFILE)
+dao = DataAccessObject(storage_backend, QueryTextCounter(max_texts=settings.QUERY_STATS_MAX_TEXTS), QueryMetrics(),
+                       slow_query_log)
+
+
+# the ASGI entry point runs the queries of the synchronous backend on a bounded pool of threads
+async_dao = AsyncDataAccessObject(ThreadedBackend(dao.backend, max_workers=settings.ASYNC_QUERY_THREADS),
+                                  dao.query_counter, dao.query_metrics, slow_query_log)
+
+
+schema_manager = SchemaManager(dao)
+if settings.SCHEMA_MIGRATE_ON_STARTUP:
+    schema_manager.migrate_in_background()
+
+# the databases whose appearance counters have never been completed are recounted once
+if settings.APPEARANCE_REPAIR_ON_STARTUP:
+    from application.utilities.appearance_counters import appearance_counter_repair
+    appearance_counter_repair.repair_in_background(incomplete_only=True)
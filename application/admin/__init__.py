@@ -0,0 +1,5 @@
+BASE_ROUTE = 'admin'
+
+def register_routes(api, app, root='api'):
+    from application.admin.controller import api as admin_api
+    api.add_namespace(admin_api, path=f"/{root}/{BASE_ROUTE}")
@@ -0,0 +1,133 @@
+from flask_restx import Namespace, Resource
+
+from .service import AdminService
+from application.utilities.wrap_functions import admin_token_required
+
+api = Namespace("Admin", description="administration and monitoring operations")
+
+
+@api.route("/pool")
+class ConnectionPoolResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the utilisation of the database connection pool"""
+        return AdminService.get_pool_status()
+
+
+@api.route("/queries")
+class QueryStatisticsResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the number of distinct query texts sent to the database and the most frequent ones"""
+        return AdminService.get_query_statistics()
+
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def delete(self):
+        """Reset the query text statistics"""
+        AdminService.reset_query_statistics()
+        return {"message": "Successful"}
+
+
+@api.route("/schema")
+class SchemaResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the schema version, the migration state and the population status of every index"""
+        return AdminService.get_schema_status()
+
+    @api.doc(responses={202: 'Accepted', 409: 'Conflict'})
+    @admin_token_required
+    def post(self):
+        """Apply the pending schema migrations
+        The migrations run in the background; new indexes are populated online.
+        """
+        if not AdminService.migrate_schema():
+            return {"message": "A schema migration is already running"}, 409
+        return {"message": "Schema migration started"}, 202
+
+
+@api.route("/compression")
+class CompressionStatisticsResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get, per algorithm, the responses compressed, their compression ratio and the CPU time spent"""
+        return AdminService.get_compression_statistics()
+
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def delete(self):
+        """Reset the compression statistics"""
+        AdminService.reset_compression_statistics()
+        return {"message": "Successful"}
+
+
+@api.route("/cache")
+class CacheResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the size, hits, misses, evictions and invalidations of the result caches"""
+        return AdminService.get_cache_statistics()
+
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def delete(self):
+        """Empty the result caches"""
+        AdminService.clear_caches()
+        return {"message": "Successful"}
+
+
+@api.route("/appearances")
+class AppearanceCountersResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the state of the repair of the appearance counters"""
+        return AdminService.get_appearance_repair_status()
+
+    @api.doc(responses={202: 'Accepted', 409: 'Conflict'})
+    @admin_token_required
+    def post(self):
+        """Recount the appearance counters of every news
+        The news are recounted in batches in the background.
+        """
+        if not AdminService.repair_appearance_counters():
+            return {"message": "A repair of the appearance counters is already running"}, 409
+        return {"message": "Appearance counter repair started"}, 202
+
+
+@api.route("/fan-out")
+class FanOutStatisticsResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the chunking of the set-news reads and the latency of their chunks"""
+        return AdminService.get_fan_out_statistics()
+
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def delete(self):
+        """Reset the fan-out statistics"""
+        AdminService.reset_fan_out_statistics()
+        return {"message": "Successful"}
+
+
+@api.route("/slow-queries")
+class SlowQueriesResource(Resource):
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def get(self):
+        """Get the last queries slower than the threshold, the slowest first, with their plans when profiled"""
+        return AdminService.get_slow_queries()
+
+    @api.doc(responses={200: 'OK'})
+    @admin_token_required
+    def delete(self):
+        """Empty the slow-query log"""
+        AdminService.clear_slow_queries()
+        return {"message": "Successful"}
@@ -0,0 +1,105 @@
+from application import dao, schema_manager, slow_query_log
+from application.utilities.appearance_counters import appearance_counter_repair
+from application.utilities.compression import response_compressor
+from application.utilities.fan_out import query_fan_out
+from application.utilities.metrics import PrometheusText, request_metrics
+from application.utilities.news_cache import news_result_cache
+from typing import Dict
+
+METRICS_PREFIX = "entity_relations_"
+
+
+class AdminService:
+    @staticmethod
+    def get_pool_status() -> Dict:
+        return dao.pool_status()
+
+    @staticmethod
+    def get_query_statistics() -> Dict:
+        return dao.query_statistics()
+
+    @staticmethod
+    def reset_query_statistics():
+        dao.reset_query_statistics()
+
+    @staticmethod
+    def get_schema_status() -> Dict:
+        return schema_manager.status()
+
+    @staticmethod
+    def migrate_schema() -> bool:
+        return schema_manager.migrate_in_background()
+
+    @staticmethod
+    def get_compression_statistics() -> Dict:
+        return response_compressor.statistics.snapshot()
+
+    @staticmethod
+    def reset_compression_statistics():
+        response_compressor.statistics.reset()
+
+    @staticmethod
+    def get_cache_statistics() -> Dict:
+        return {"newsResults": news_result_cache.statistics()}
+
+    @staticmethod
+    def clear_caches():
+        news_result_cache.clear()
+
+    @staticmethod
+    def get_appearance_repair_status() -> Dict:
+        return appearance_counter_repair.status()
+
+    @staticmethod
+    def repair_appearance_counters() -> bool:
+        return appearance_counter_repair.repair_in_background()
+
+    @staticmethod
+    def get_fan_out_statistics() -> Dict:
+        return dict(query_fan_out.statistics.snapshot(), threads=query_fan_out.max_workers,
+                    chunkSize=query_fan_out.chunk_size, chunkTimeout=query_fan_out.chunk_timeout)
+
+    @staticmethod
+    def reset_fan_out_statistics():
+        query_fan_out.statistics.reset()
+
+    @staticmethod
+    def get_slow_queries() -> Dict:
+        return slow_query_log.status()
+
+    @staticmethod
+    def clear_slow_queries():
+        slow_query_log.clear()
+
+    @staticmethod
+    def get_metrics() -> str:
+        text = PrometheusText(METRICS_PREFIX)
+        request_metrics.write(text)
+        dao.query_metrics.write(text)
+        queries = dao.query_statistics()
+        text.metric("db_query_texts", "gauge", "Distinct query texts sent to the database",
+                    [({}, queries["distinctQueryTexts"])])
+        text.metric("db_query_executions_total", "counter", "Queries sent to the database",
+                    [({}, queries["executions"])])
+        pool = dao.pool_status()
+        if "activeSessions" in pool:
+            text.metric("db_active_sessions", "gauge", "Database sessions in use", [({}, pool["activeSessions"])])
+        compression = response_compressor.statistics.snapshot()
+        for key, name, help_text in (("responses", "compressed_responses_total", "Responses compressed"),
+                                     ("bytesIn", "compression_input_bytes_total", "Bytes before compression"),
+                                     ("bytesOut", "compression_output_bytes_total", "Bytes after compression"),
+                                     ("cpuSeconds", "compression_cpu_seconds_total", "CPU time spent compressing")):
+            text.metric(name, "counter", help_text,
+                        [({"algorithm": algorithm}, counts[key])
+                         for algorithm, counts in sorted(compression["algorithms"].items())])
+        text.metric("uncompressed_responses_total", "counter", "Responses too small to compress",
+                    [({}, compression["uncompressedResponses"])])
+        cache = news_result_cache.statistics()
+        text.metric("news_cache_entries", "gauge", "Entries of the news result cache", [({}, cache["size"])])
+        for key in ("hits", "misses", "evictions", "invalidations"):
+            text.metric("news_cache_%s_total" % key, "counter", "News result cache " + key, [({}, cache[key])])
+        fan_out = query_fan_out.statistics.snapshot()
+        for key, name in (("fanOuts", "fan_outs_total"), ("chunks", "fan_out_chunks_total"),
+                          ("timeouts", "fan_out_timeouts_total"), ("failures", "fan_out_failures_total")):
+            text.metric(name, "counter", "Set-news reads split into chunks: " + key, [({}, fan_out[key])])
+        return text.text()
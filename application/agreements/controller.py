@@ -14,6 +14,7 @@ entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 agrs_pagin_parser = reqparse.RequestParser()
 agrs_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 agrs_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+agrs_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
 @api.route("/")
 class AgreementsCollection(Resource):
     @api.doc(responses={200: 'OK'}, parser= agrs_pagin_parser)
@@ -107,7 +108,8 @@ class SearchAgreementResource(Resource):
             text_search = request.json["text"]
         else:
             text_search = ' '
-        return paginate_results(agrs_pagin_parser, request.base_url, AgreementService.search, text_search)
+        return paginate_results(agrs_pagin_parser, request.base_url, AgreementService.search, text_search,
+                                count=AgreementService.count_search)
 
 @api.route("/merge_nodes")
 class MergeNodesResource(Resource):
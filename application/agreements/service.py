@@ -1,11 +1,24 @@
 from application import dao
 from typing import List, Dict
 from application.utilities.graph import serialize_node_to_dict
+from application.utilities.fulltext import search_fulltext, count_fulltext
+from application.utilities.entity_labels import entity_label_registry
+from application.utilities.news_cache import news_result_cache
+from application.utilities.appearance_counters import appearance_counter_repair
 
 
 class AgreementService:
     @staticmethod
-    def get_all(start=0, limit=100) -> List:
+    def get_all(start=0, limit=100, cursor=None) -> List:
+        if cursor is not None:
+            query = """
+            MATCH (agr:Agreement)
+            WHERE agr.entityID > $after
+            RETURN agr.entityID as entityID, agr.name as name, agr.des as description
+            ORDER BY agr.entityID
+            LIMIT $limit
+            """
+            return dao.run_read_query(query, after=cursor.get("entityID", ""), limit=limit).data()
         query = """
         MATCH (agr:Agreement)
         RETURN agr.entityID as entityID, agr.name as name, agr.des as description
@@ -29,7 +42,9 @@ class AgreementService:
         CREATE (agr:Agreement $props)
         RETURN agr.entityID as entityID, agr.name as name, agr.des as description
         """
-        return dao.run_write_query(query, props= agreement_properties).data()
+        result = dao.run_write_query(query, props= agreement_properties).data()
+        entity_label_registry.forget([agreement_properties["entityID"]])
+        return result
 
     @staticmethod
     def update(agreement_properties: Dict, agr_id: str):
@@ -38,19 +53,13 @@ class AgreementService:
             SET agr = $props
             RETURN agr.entityID as entityID, agr.name as name, agr.des as description
             """
-        return dao.run_write_query(query, {"props":agreement_properties, "id_agr": agr_id}).data()
+        result = dao.run_write_query(query, {"props":agreement_properties, "id_agr": agr_id}).data()
+        news_result_cache.invalidate_entities([agr_id])
+        return result
 
     @staticmethod
     def is_in_news(agr_id) -> bool:
-        query = """
-        MATCH (fact:Fact)-[]->(:Agreement{entityID: $id_entity})
-        RETURN count(fact) as numAppearance
-        """
-        result = dao.run_read_query(query, id_entity=agr_id).data()
-        if result[0]["numAppearance"] == 0:
-            return False
-        else:
-            return True
+        return appearance_counter_repair.is_in_news(agr_id, "Agreement")
 
     @staticmethod
     def delete(agr_id):
@@ -58,15 +67,18 @@ class AgreementService:
         MATCH (agr: Agreement{entityID: $id_entity})
         DELETE agr
         """
-        return dao.run_write_query(query, id_entity=agr_id).data()
+        result = dao.run_write_query(query, id_entity=agr_id).data()
+        entity_label_registry.forget([agr_id])
+        news_result_cache.invalidate_entities([agr_id])
+        return result
 
     @staticmethod
     def search(start=0, limit=100, *args, **kwargs):
-        text_search = args[0]
-        query = "CALL db.index.fulltext.queryNodes(" + "'agreementsFullTextSearch', '" + text_search + \
-                "') YIELD node, score  RETURN node.entityID as entityID, node.name as name," \
-                "node.des as description, score ORDER BY score DESC"
-        return dao.run_read_query(query).data()[start:start+limit]
+        return search_fulltext('agreementsFullTextSearch', args[0], start, limit, kwargs.get("cursor"))
+
+    @staticmethod
+    def count_search(*args) -> Dict:
+        return count_fulltext('agreementsFullTextSearch', args[0])
 
 
     @staticmethod
@@ -82,6 +94,10 @@ class AgreementService:
             RETURN node.entityID as entityID, node.name as name, node.des as description
             """
         result = dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        entity_label_registry.forget(set_entity_id)
+        news_result_cache.invalidate_entities(set_entity_id)
+        for merged in result:
+            appearance_counter_repair.repair_entity(merged["entityID"], "Agreement")
         return result
 
 
@@ -0,0 +1,308 @@
+"""
+ASGI entry point, serving the same namespaces, models and documentation as application.main:
+
+    uvicorn application.asgi:app --host 0.0.0.0 --port 8888
+
+The graph and appearance reads of the news namespace, which can wait seconds on the database, are
+answered by coroutines on the asynchronous DAO. The neo4j 1.7 driver has no asyncio API, so their
+queries still run on a pool of ASYNC_QUERY_THREADS threads: a worker waits on at most that many
+queries at once, as many as the Flask application would with the same number of threads. What the
+coroutines save is the thread of the request while its query waits for a pool thread and while its
+result is merged. Every other request, and the variants of these reads that stream or answer
+MessagePack, is handed to the Flask application, run on a bounded pool of threads.
+"""
+import asyncio
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers, MIMEAccept
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header
+
+from application import async_dao
+from application.main import app as flask_app
+from application.auth.service import AuthService
+from application.news.async_service import AsyncNewsService
+from application.news.model import ENTITY_TYPES
+from application.settings import ASGI_WSGI_THREADS
+from application.utilities.compression import response_compressor
+from application.utilities.json_converter import converter
+from application.utilities.metrics import request_metrics
+from application.utilities.jw_token import decode_auth_token
+from application.utilities.representations import MSGPACK_MIMETYPE, msgpack
+from application.utilities.streaming import NDJSON_MIMETYPE, GRAPH_FORMATS, too_many_news
+
+
+class AsgiRequest:
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = {key: values[-1] for key, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+        self.headers = Headers([(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]])
+        self.body = body
+
+    @property
+    def json(self) -> Optional[Dict]:
+        try:
+            document = json.loads(self.body or b"null")
+        except ValueError:
+            return None
+        return document if isinstance(document, dict) else None
+
+    def accept(self, header: str, cls=None):
+        return parse_accept_header(self.headers.get(header), cls)
+
+
+class AsyncRoute:
+    """A route answered by a coroutine, with <name> placeholders for the path parameters"""
+    def __init__(self, method: str, rule: str, handler: Callable):
+        self.method = method
+        # the rule of the Flask route, for the metrics of both to add up
+        self.rule = re.sub(r"<(\w+)>", r"<string:\1>", rule)
+        self.pattern = re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", rule) + "$")
+        self.handler = handler
+
+    def match(self, request: AsgiRequest) -> Optional[Dict]:
+        if request.method != self.method:
+            return None
+        match = self.pattern.match(request.path)
+        return match.groupdict() if match else None
+
+
+def _string_list(value, choices=None) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) and (choices is None or item in choices)
+                                           for item in value)
+
+
+def _graph_format(request: AsgiRequest) -> Optional[str]:
+    """
+    The format of a graph read the coroutines can answer, None for the requests left to Flask:
+    streamed, in MessagePack or with arguments Flask rejects
+    """
+    graph_format = request.args.get("format", "graph")
+    if "stream" in request.args or graph_format not in GRAPH_FORMATS:
+        return None
+    offered = ["application/json", NDJSON_MIMETYPE] + ([MSGPACK_MIMETYPE] if msgpack is not None else [])
+    if request.headers.get("Accept") and \
+            request.accept("Accept", MIMEAccept).best_match(offered, default="application/json") != "application/json":
+        return None
+    return graph_format
+
+
+def _set_news_id(body) -> bool:
+    """Whether a body holds a set of news the coroutines can read, Flask refusing the sets too large"""
+    return body is not None and _string_list(body.get("set_news_id")) and not too_many_news(body["set_news_id"])
+
+
+def _entity_type(request: AsgiRequest) -> Tuple[bool, Optional[str]]:
+    entity_type = request.args.get("type")
+    return entity_type is None or entity_type in ENTITY_TYPES, entity_type
+
+
+async def news_relations(request: AsgiRequest, news_id: str):
+    graph_format = _graph_format(request)
+    if graph_format is None:
+        return None
+    return await AsyncNewsService.get_all_relations_in_news(news_id, graph_format == "compact")
+
+
+async def set_news_relations(request: AsgiRequest):
+    graph_format = _graph_format(request)
+    body = request.json
+    if graph_format is None or not _set_news_id(body):
+        return None
+    return await AsyncNewsService.get_all_relations_in_set_news(body["set_news_id"], graph_format == "compact")
+
+
+async def news_type_relations(request: AsgiRequest, news_id: str):
+    graph_format = _graph_format(request)
+    body = request.json
+    if graph_format is None or body is None or not _string_list(body.get("set_entity_types"), ENTITY_TYPES):
+        return None
+    return await AsyncNewsService.get_entity_type_relations_in_news(news_id, body["set_entity_types"],
+                                                                    graph_format == "compact")
+
+
+async def set_news_type_relations(request: AsgiRequest):
+    graph_format = _graph_format(request)
+    body = request.json
+    if graph_format is None or not _set_news_id(body) or not _string_list(body.get("set_entity_types"), ENTITY_TYPES):
+        return None
+    return await AsyncNewsService.get_entity_type_relations_in_set_news(body["set_news_id"], body["set_entity_types"],
+                                                                        graph_format == "compact")
+
+
+async def news_entity_relations(request: AsgiRequest, news_id: str, entity_id: str):
+    graph_format = _graph_format(request)
+    valid, entity_type = _entity_type(request)
+    if graph_format is None or not valid:
+        return None
+    return await AsyncNewsService.get_entity_individual_relations_in_news(news_id, entity_id, entity_type,
+                                                                          graph_format == "compact")
+
+
+async def set_news_entity_relations(request: AsgiRequest, entity_id: str):
+    graph_format = _graph_format(request)
+    valid, entity_type = _entity_type(request)
+    body = request.json
+    if graph_format is None or not valid or not _set_news_id(body):
+        return None
+    return await AsyncNewsService.get_entity_individual_relations_in_set_news(body["set_news_id"], entity_id,
+                                                                              entity_type, graph_format == "compact")
+
+
+async def news_appearance(request: AsgiRequest, news_id: str, entity_id: str):
+    valid, entity_type = _entity_type(request)
+    if not valid:
+        return None
+    return await AsyncNewsService.get_number_appearance_in_news(news_id, entity_id, entity_type)
+
+
+async def set_news_appearance(request: AsgiRequest, entity_id: str):
+    valid, entity_type = _entity_type(request)
+    body = request.json
+    if not valid or body is None or not _string_list(body.get("set_news_id")):
+        return None
+    return await AsyncNewsService.get_number_appearance_in_set_news(body["set_news_id"], entity_id, entity_type)
+
+
+ASYNC_ROUTES = [
+    AsyncRoute("GET", "/api/news/<news_id>/relations", news_relations),
+    AsyncRoute("POST", "/api/news/relations", set_news_relations),
+    AsyncRoute("POST", "/api/news/<news_id>/type/relations", news_type_relations),
+    AsyncRoute("POST", "/api/news/type/relations", set_news_type_relations),
+    AsyncRoute("GET", "/api/news/<news_id>/entity/<entity_id>/relations", news_entity_relations),
+    AsyncRoute("POST", "/api/news/entity/<entity_id>/relations", set_news_entity_relations),
+    AsyncRoute("GET", "/api/news/<news_id>/appearance/<entity_id>", news_appearance),
+    AsyncRoute("POST", "/api/news/appearance/<entity_id>", set_news_appearance),
+]
+
+
+class AsgiApplication:
+    """
+    Answer the requests matching an async route with its coroutine, and the others, or those the
+    coroutine returns None for, with the WSGI application
+    """
+    def __init__(self, wsgi_app, routes: List[AsyncRoute], wsgi_threads: int = 32):
+        self.wsgi_app = wsgi_app
+        self.routes = routes
+        self._wsgi = WsgiToAsgi(wsgi_app)
+        self._wsgi_slots = asyncio.Semaphore(wsgi_threads)
+        self._executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError("Unsupported ASGI scope: " + scope["type"])
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        request = AsgiRequest(scope, b"".join(chunks))
+        for route in self.routes:
+            params = route.match(request)
+            if params is not None and await self._authorized(request):
+                if await self._call_route(route, request, params, send):
+                    return
+                break
+        await self._call_wsgi(scope, request.body, send)
+
+    async def _call_route(self, route: AsyncRoute, request: AsgiRequest, params: Dict, send) -> bool:
+        """
+        Answer a request with the coroutine of its route
+        :return: whether it answered, False for the requests to hand to the WSGI application
+        """
+        started = time.perf_counter()
+        request_metrics.started()
+        status, size = 500, None
+        try:
+            result = await route.handler(request, **params)
+            if result is None:
+                status = None
+                return False
+            status, size = await self._send_json(request, result, send)
+        except HTTPException as error:
+            status, size = await self._send_json(request, {"message": error.description}, send, error.code)
+        finally:
+            # handed over requests are observed by the WSGI application
+            request_metrics.finished(route.rule, request.method, status, time.perf_counter() - started,
+                                     len(request.body), size, observe=status is not None)
+        return True
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_dao.close()
+                self._executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _authorized(self, request: AsgiRequest) -> bool:
+        # the requests failing user_token_required are left to Flask, which explains why
+        token = request.headers.get("Authorization")
+        if not token:
+            return False
+        principal = decode_auth_token(token)
+        if isinstance(principal, str):
+            return False
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, AuthService.principal_exists, principal["username"],
+                                          principal["isAdmin"], principal["issuedAt"])
+
+    async def _send_json(self, request: AsgiRequest, document, send, status: int = 200) -> Tuple[int, int]:
+        # encoding and compressing large documents would stall the event loop
+        loop = asyncio.get_running_loop()
+        algorithm = response_compressor.negotiate(request.accept("Accept-Encoding")) \
+            if response_compressor.enabled and "application/json" in response_compressor.mimetypes else None
+        body, algorithm = await loop.run_in_executor(self._executor, self._encode, document, algorithm)
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1")),
+                   (b"access-control-allow-origin", b"*")]
+        if algorithm is not None:
+            headers.append((b"content-encoding", algorithm.encode("latin-1")))
+        if response_compressor.enabled:
+            headers.append((b"vary", b"Accept-Encoding"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        return status, len(body)
+
+    def _encode(self, document, algorithm: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        # the JSON flask_restx writes
+        settings = dict(self.wsgi_app.config.get("RESTX_JSON", {}))
+        if self.wsgi_app.debug:
+            settings.setdefault("indent", 4)
+        settings.setdefault("default", converter)
+        body = (json.dumps(document, **settings) + "\n").encode("utf8")
+        if algorithm is None:
+            return body, None
+        if len(body) < response_compressor.min_size:
+            response_compressor.statistics.skip()
+            return body, None
+        return response_compressor.compress(algorithm, body), algorithm
+
+    async def _call_wsgi(self, scope, body: bytes, send):
+        async def receive():
+            # the body has already been read to match the async routes
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        # a chunked body has no Content-Length, without which WSGI applications read no body at all
+        headers = [(name, value) for name, value in scope["headers"]
+                   if name not in (b"content-length", b"transfer-encoding")]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        # each request gets its own thread, at most wsgi_threads at once
+        async with self._wsgi_slots, ThreadSensitiveContext():
+            await self._wsgi(dict(scope, headers=headers), receive, send)
+
+
+app = AsgiApplication(flask_app, ASYNC_ROUTES, wsgi_threads=ASGI_WSGI_THREADS)
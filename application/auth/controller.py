@@ -37,6 +37,20 @@ class RegisterAdmin(Resource):
             return {"message": "Unable to create because the account with this username already exists"}, 405
 
 
+@api.route("/admin/<string:username>")
+class AdminAccount(Resource):
+    @api.doc(responses={200: 'OK', 404: 'Not Found'})
+    @admin_token_required
+    def delete(self, username):
+        """Remove an admin account
+        The tokens already issued for this account are rejected from now on.
+        """
+        if not AuthService.getAdmin(username):
+            return {"message": "The account does not exist"}, 404
+        AuthService.deleteAdmin(username)
+        return {"message": "Successful"}, 200
+
+
 @api.route("/admin/login")
 class LoginAdmin(Resource):
     @api.doc(responses={200: 'OK', 404: 'Not Found'})
@@ -87,6 +101,20 @@ class RegisterUser(Resource):
         else:
             return {"message": "Unable to create because the account with this username already exists"}, 405
 
+@api.route("/user/<string:username>")
+class UserAccount(Resource):
+    @api.doc(responses={200: 'OK', 404: 'Not Found'})
+    @admin_token_required
+    def delete(self, username):
+        """Remove an user account
+        The tokens already issued for this account are rejected from now on.
+        """
+        if not AuthService.getUser(username):
+            return {"message": "The account does not exist"}, 404
+        AuthService.deleteUser(username)
+        return {"message": "Successful"}, 200
+
+
 @api.route("/user/login")
 class LoginUser(Resource):
     @api.doc(responses={200: 'OK', 404: 'Not Found'})
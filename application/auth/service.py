@@ -1,22 +1,55 @@
+import time
+
 from application import dao
 from typing import List, Dict
+from application.settings import PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_SIZE
+from application.utilities.principal_cache import PrincipalCache, RevocationList, issued_before
+from application.utilities.jw_token import TOKEN_LIFETIME
+
+principal_cache = PrincipalCache(ttl=PRINCIPAL_CACHE_TTL, max_size=PRINCIPAL_CACHE_SIZE)
+revocation_list = RevocationList(lifetime=TOKEN_LIFETIME.total_seconds())
 
 class AuthService:
     @staticmethod
     def createUser(username, password):
         query = """
-        CREATE (usr:User { username: $usr, password: $paswd, isAdmin: $isAd })
+        CREATE (usr:User { username: $usr, password: $paswd, isAdmin: $isAd, createdAt: $created })
         RETURN usr.username as username, usr.password as password, usr.isAdmin as isAdmin
         """
-        return dao.run_write_query(query, usr= username, paswd=password, isAd=False).data()
+        principal_cache.invalidate(username, False)
+        return dao.run_write_query(query, usr= username, paswd=password, isAd=False,
+                                   created=int(time.time())).data()
 
     @staticmethod
     def createAdmin(username, password):
         query = """
-        CREATE (usr:Admin { username: $usr, password: $paswd, isAdmin: $isAd })
+        CREATE (usr:Admin { username: $usr, password: $paswd, isAdmin: $isAd, createdAt: $created })
         RETURN usr.username as username, usr.password as password, usr.isAdmin as isAdmin
         """
-        return dao.run_write_query(query, usr=username, paswd=password, isAd=True).data()
+        principal_cache.invalidate(username, True)
+        return dao.run_write_query(query, usr=username, paswd=password, isAd=True, created=int(time.time())).data()
+
+    @staticmethod
+    def deleteUser(username):
+        query = """
+        MATCH (usr:User { username: $usr})
+        DELETE usr
+        """
+        result = dao.run_write_query(query, usr=username).data()
+        principal_cache.invalidate(username, False)
+        revocation_list.revoke(username, False)
+        return result
+
+    @staticmethod
+    def deleteAdmin(username):
+        query = """
+        MATCH (usr:Admin { username: $usr})
+        DELETE usr
+        """
+        result = dao.run_write_query(query, usr=username).data()
+        principal_cache.invalidate(username, True)
+        revocation_list.revoke(username, True)
+        return result
 
 
 
@@ -45,7 +78,8 @@ class AuthService:
     def getUser(username):
         query = """
         MATCH (usr:User { username: $usr})
-        RETURN usr.username as username, usr.password as password, usr.isAdmin as isAdmin
+        RETURN usr.username as username, usr.password as password, usr.isAdmin as isAdmin,
+        usr.createdAt as createdAt
         """
         return dao.run_read_query(query, usr=username).data()
 
@@ -53,7 +87,28 @@ class AuthService:
     def getAdmin(username):
         query = """
         MATCH (usr:Admin { username: $usr})
-        RETURN usr.username as username, usr.password as password, usr.isAdmin as isAdmin
+        RETURN usr.username as username, usr.password as password, usr.isAdmin as isAdmin,
+        usr.createdAt as createdAt
         """
         return dao.run_read_query(query, usr=username).data()
 
+    @staticmethod
+    def principal_exists(username, is_admin, issued_at=None) -> bool:
+        """
+        Check that the account a token was issued for still exists and that the token is not revoked.
+        Known accounts are answered from the principal cache without querying the database.
+        A token issued before the account was created belongs to a deleted account with the same username.
+        """
+        if revocation_list.is_revoked(username, is_admin, issued_at):
+            return False
+        if principal_cache.contains(username, is_admin, issued_at):
+            return True
+        if is_admin:
+            account = AuthService.getAdmin(username)
+        else:
+            account = AuthService.getUser(username)
+        if not account:
+            return False
+        created_at = account[0].get("createdAt")
+        principal_cache.add(username, is_admin, created_at)
+        return not issued_before(issued_at, created_at)
@@ -14,6 +14,7 @@ entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 events_pagin_parser = reqparse.RequestParser()
 events_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 events_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+events_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
 @api.route("/")
 class EventsCollection(Resource):
     @api.doc(responses={200: 'OK'}, parser=events_pagin_parser)
@@ -106,7 +107,8 @@ class SearchEventResource(Resource):
             text_search = request.json["text"]
         else:
             text_search = ' '
-        return paginate_results(events_pagin_parser, request.base_url, EventService.search, text_search)
+        return paginate_results(events_pagin_parser, request.base_url, EventService.search, text_search,
+                                count=EventService.count_search)
 
 @api.route("/merge_nodes")
 class MergeNodesResource(Resource):
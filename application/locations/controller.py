@@ -14,6 +14,7 @@ entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 locations_pagin_parser = reqparse.RequestParser()
 locations_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 locations_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+locations_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
 @api.route("/")
 class LocationsCollection(Resource):
     @api.doc(responses={200: 'OK'}, parser=locations_pagin_parser)
@@ -106,7 +107,8 @@ class SearchLocationResource(Resource):
             text_search = request.json["text"]
         else:
             text_search = ' '
-        return paginate_results(locations_pagin_parser, request.base_url, LocationService.search, text_search)
+        return paginate_results(locations_pagin_parser, request.base_url, LocationService.search, text_search,
+                                count=LocationService.count_search)
 
 @api.route("/merge_nodes")
 class MergeNodesResource(Resource):
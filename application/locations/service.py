@@ -1,10 +1,23 @@
 from application import dao
 from typing import List, Dict
 from application.utilities.graph import serialize_node_to_dict
+from application.utilities.fulltext import search_fulltext, count_fulltext
+from application.utilities.entity_labels import entity_label_registry
+from application.utilities.news_cache import news_result_cache
+from application.utilities.appearance_counters import appearance_counter_repair
 
 class LocationService:
     @staticmethod
-    def get_all(start=0, limit=100) -> List:
+    def get_all(start=0, limit=100, cursor=None) -> List:
+        if cursor is not None:
+            query = """
+            MATCH (loc:Location)
+            WHERE loc.entityID > $after
+            RETURN loc.entityID as entityID, loc.name as name, loc.des as description
+            ORDER BY loc.entityID
+            LIMIT $limit
+            """
+            return dao.run_read_query(query, after=cursor.get("entityID", ""), limit=limit).data()
         query = """
         MATCH (loc:Location)
         RETURN loc.entityID as entityID, loc.name as name, loc.des as description
@@ -28,7 +41,9 @@ class LocationService:
         CREATE (loc:Location $props)
         RETURN loc.entityID as entityID, loc.name as name, loc.des as description
         """
-        return dao.run_write_query(query, props= location_properties).data()
+        result = dao.run_write_query(query, props= location_properties).data()
+        entity_label_registry.forget([location_properties["entityID"]])
+        return result
 
     @staticmethod
     def update(location_properties: Dict, loc_id: str):
@@ -37,19 +52,13 @@ class LocationService:
             SET loc = $props
             RETURN loc.entityID as entityID, loc.name as name, loc.des as description
             """
-        return dao.run_write_query(query, {"props":location_properties, "id_loc": loc_id}).data()
+        result = dao.run_write_query(query, {"props":location_properties, "id_loc": loc_id}).data()
+        news_result_cache.invalidate_entities([loc_id])
+        return result
 
     @staticmethod
     def is_in_news(loc_id) -> bool:
-        query = """
-        MATCH (fact:Fact)-[]->(:Location{entityID: $id_entity})
-        RETURN count(fact) as numAppearance
-        """
-        result = dao.run_read_query(query, id_entity=loc_id).data()
-        if result[0]["numAppearance"] == 0:
-            return False
-        else:
-            return True
+        return appearance_counter_repair.is_in_news(loc_id, "Location")
 
     @staticmethod
     def delete(loc_id):
@@ -57,15 +66,18 @@ class LocationService:
         MATCH (loc: Location{entityID: $id_entity})
         DELETE loc
         """
-        return dao.run_write_query(query, id_entity=loc_id).data()
+        result = dao.run_write_query(query, id_entity=loc_id).data()
+        entity_label_registry.forget([loc_id])
+        news_result_cache.invalidate_entities([loc_id])
+        return result
 
     @staticmethod
     def search(start=0, limit=100, *args, **kwargs):
-        text_search = args[0]
-        query = "CALL db.index.fulltext.queryNodes(" + "'locationsFullTextSearch', '" + text_search + \
-                "') YIELD node, score  RETURN node.entityID as entityID, node.name as name," \
-                "node.des as description, score ORDER BY score DESC"
-        return dao.run_read_query(query).data()[start:start+limit]
+        return search_fulltext('locationsFullTextSearch', args[0], start, limit, kwargs.get("cursor"))
+
+    @staticmethod
+    def count_search(*args) -> Dict:
+        return count_fulltext('locationsFullTextSearch', args[0])
 
     @staticmethod
     def merge_nodes(set_entity_id: List[str]) -> Dict:
@@ -80,6 +92,10 @@ class LocationService:
                 RETURN node.entityID as entityID, node.name as name, node.des as description
                 """
         result = dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        entity_label_registry.forget(set_entity_id)
+        news_result_cache.invalidate_entities(set_entity_id)
+        for merged in result:
+            appearance_counter_repair.repair_entity(merged["entityID"], "Location")
         return result
 
 
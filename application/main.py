@@ -1,6 +1,10 @@
 from application.config import config_by_name
-from application.settings import BIND_HOST, BIND_PORT
+from application.settings import BIND_HOST, BIND_PORT, METRICS_ENABLED
 from application.routes import register_routes
+from application.utilities.representations import register_representations
+from application.utilities.compression import response_compressor
+from application.utilities.metrics import request_metrics
+from application.admin.service import AdminService
 
 from flask import Flask
 from flask_restx import Api
@@ -22,7 +26,12 @@ def create_app(config_name):
     app.config["JSON_AS_ASCII"] = False
     app.config['CORS_HEADERS'] = 'Content-Type'
     api = Api(app, authorizations=authorizations, security='apikey')
+    register_representations(api)
     register_routes(api, app)
+    # before the compressor, whose after_request runs first: the sizes observed are the ones sent
+    if METRICS_ENABLED:
+        request_metrics.init_app(app, AdminService.get_metrics)
+    response_compressor.init_app(app)
     CORS(app, resources={r'/api/*': {'origins': '*'}})
     return app
 
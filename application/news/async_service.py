@@ -0,0 +1,110 @@
+import asyncio
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+from application import async_dao
+from application.news.service import NewsService, RELATIONS_BY_NEWS, TYPE_RELATIONS_BY_NEWS, \
+    INDIVIDUAL_RELATIONS_BY_NEWS, APPEARANCE_IN_NEWS, APPEARANCE_IN_SET_NEWS
+from application.utilities.entity_labels import async_entity_labels
+from application.utilities.fan_out import query_fan_out
+from application.utilities.graph import graph_entity_ids, merge_subgraph_documents
+from application.utilities.news_cache import news_result_cache, entity_relation_ids
+
+
+async def _off_loop(function, *args):
+    """
+    Run function on the default executor of the loop: serializing and merging thousands of nodes would
+    stall every other coroutine
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, partial(function, *args))
+
+
+class AsyncNewsService:
+    """
+    The graph and appearance reads of NewsService for the ASGI entry point. They answer the same
+    documents from the same queries and share the news result cache; the reads of one call run
+    concurrently.
+    """
+    @staticmethod
+    async def get_all_relations_in_news(news_id: str, compact: bool = False) -> Dict:
+        documents = await AsyncNewsService._news_documents([news_id], ("relations", False), [RELATIONS_BY_NEWS], {})
+        return await _off_loop(merge_subgraph_documents, documents, compact)
+
+    @staticmethod
+    async def get_all_relations_in_set_news(set_news_id: List[str], compact: bool = False) -> Dict:
+        id_set_news = sorted(set(set_news_id))
+        documents = await AsyncNewsService._news_documents(id_set_news, ("relations", False), [RELATIONS_BY_NEWS], {})
+        return await _off_loop(merge_subgraph_documents, documents, compact)
+
+    @staticmethod
+    async def get_entity_type_relations_in_news(news_id: str, entity_type: List[str], compact: bool = False) -> Dict:
+        return await AsyncNewsService.get_entity_type_relations_in_set_news([news_id], entity_type, compact)
+
+    @staticmethod
+    async def get_entity_type_relations_in_set_news(set_news_id: List[str], entity_type: List[str],
+                                                    compact: bool = False) -> Dict:
+        id_set_news = sorted(set(set_news_id))
+        types = sorted(set(entity_type))
+        documents = await AsyncNewsService._news_documents(id_set_news, ("type_relations", tuple(types), False),
+                                                           [TYPE_RELATIONS_BY_NEWS], {"type_entity": types})
+        return await _off_loop(merge_subgraph_documents, documents, compact)
+
+    @staticmethod
+    async def get_entity_individual_relations_in_news(news_id: str, entity_id: str, entity_type: str = None,
+                                                      compact: bool = False) -> Dict:
+        return await AsyncNewsService.get_entity_individual_relations_in_set_news([news_id], entity_id, entity_type,
+                                                                                  compact)
+
+    @staticmethod
+    async def get_entity_individual_relations_in_set_news(set_news_id: List[str], entity_id: str,
+                                                          entity_type: str = None, compact: bool = False) -> Dict:
+        id_set_news = sorted(set(set_news_id))
+        labels = await async_entity_labels(entity_id, entity_type)
+        documents = await AsyncNewsService._news_documents(id_set_news, ("entity_relations", entity_id, tuple(labels)),
+                                                           [INDIVIDUAL_RELATIONS_BY_NEWS[label] for label in labels],
+                                                           {"id_entity": entity_id}, entity_relation_ids(entity_id))
+        return await _off_loop(merge_subgraph_documents, documents, compact)
+
+    @staticmethod
+    async def get_number_appearance_in_news(news_id: str, entity_id: str, entity_type: str = None) -> Dict:
+        labels = await async_entity_labels(entity_id, entity_type)
+        results = await asyncio.gather(*(async_dao.run_read_query(APPEARANCE_IN_NEWS[label],
+                                                                  {"id_news": news_id, "id_entity": entity_id})
+                                         for label in labels))
+        return {"numberAppearance": sum(result.data()[0]["numberAppearance"] for result in results)}
+
+    @staticmethod
+    async def get_number_appearance_in_set_news(set_news_id: List[str], entity_id: str,
+                                                entity_type: str = None) -> Dict:
+        id_set_news = sorted(set(set_news_id))
+        labels = await async_entity_labels(entity_id, entity_type)
+
+        async def count(news_ids: List[str]) -> int:
+            results = await asyncio.gather(*(async_dao.run_read_query(APPEARANCE_IN_SET_NEWS[label],
+                                                                      {"set_id_news": news_ids, "id_entity": entity_id})
+                                             for label in labels))
+            return sum(result.data()[0]["numberAppearance"] for result in results)
+
+        return {"numberAppearance": sum(await query_fan_out.map_async(count, id_set_news))}
+
+    @staticmethod
+    async def _news_documents(id_set_news: List[str], kind: Tuple, queries: List[str], params: Dict,
+                              entity_ids: Callable[[Dict], List[str]] = graph_entity_ids) -> List[Dict]:
+        """
+        NewsService._news_documents on the asynchronous DAO: the chunks of the missing news, and the
+        queries of each chunk, run concurrently, and their records are split into documents off the loop
+        """
+        async def read(keys: List[Tuple]) -> Dict:
+            news_ids = [key[0] for key in keys]
+            results = await asyncio.gather(*(async_dao.run_read_query(query, dict(params, set_news_id=news_ids))
+                                             for query in queries))
+            return await _off_loop(NewsService._documents_by_news, keys, results)
+
+        found, missing, generation = news_result_cache.lookup([(news_id,) + kind for news_id in id_set_news])
+        if missing:
+            loaded = {}
+            for chunk_documents in await query_fan_out.map_async(read, missing):
+                loaded.update(chunk_documents)
+            news_result_cache.store(loaded, entity_ids, generation)
+            found.update(loaded)
+        return list(found.values())
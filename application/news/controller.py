@@ -1,4 +1,5 @@
-from flask_restx import Namespace, Resource, reqparse
+from flask_restx import Namespace, Resource, reqparse, fields
+from werkzeug.exceptions import HTTPException
 from flask import Response, request, jsonify, json
 
 
@@ -8,6 +9,8 @@ from .model import news_model, set_news_model, types_entity_model, \
     input_key_model,ENTITY_TYPES
 from application.utilities.wrap_functions import user_token_required, admin_token_required
 from application.utilities.paginating import paginate_results
+from application.utilities.streaming import graph_stream_parser, graph_response, set_news_graph_response
+from application.settings import INGEST_BATCH_MAX_ITEMS
 
 from typing import List
 
@@ -19,10 +22,21 @@ types_entity_set_news = api.model("Types_Entity_Set_News", types_entity_set_news
 entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 keyword_search = api.model("Keyword_Search", input_key_model)
 fact = api.model("Fact", fact_model)
+news_with_facts = api.model("News_With_Facts", dict(news_model, facts=fields.List(fields.Nested(fact))))
+news_batch = api.model("News_Batch", {"news": fields.List(fields.Nested(news_with_facts), required=True,
+                                                          description="The news to create with their facts")})
 
 news_pagin_parser = reqparse.RequestParser()
 news_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 news_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+news_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
+
+entity_type_parser = reqparse.RequestParser()
+entity_type_parser.add_argument('type', location='args', type=str, choices=ENTITY_TYPES,
+                                help='The type of the entity, resolved from its id if missing')
+entity_relations_parser = entity_type_parser.copy()
+for argument in graph_stream_parser.args:
+    entity_relations_parser.add_argument(argument)
 @api.route("/")
 class NewsResourceList(Resource):
     @api.doc(responses={200: 'OK'}, parser=news_pagin_parser)
@@ -59,6 +73,70 @@ class NewsResourceList(Resource):
 
 
 
+def validation_errors(model, data):
+    try:
+        model.validate(data)
+    except HTTPException as error:
+        return getattr(error, "data", {}).get("errors") or error.description
+    return None
+
+
+@api.route("/batch")
+class NewsBatchResource(Resource):
+    @api.doc(responses={201: 'Created', 207: 'Multi-Status', 400: 'Bad Request', 413: 'Payload Too Large'})
+    @api.expect(news_batch)
+    @admin_token_required
+    def post(self):
+        """Create news together with their facts
+        Use this method to create many news and their facts in a few transactions.
+        * Send a JSON object with the news in the request body; each news carries its facts.
+        ```
+        {
+          "news": [
+            {
+              "entityID": "News ID",
+              "link": "News URL",
+              "topics": ["the subjects of news"],
+              "facts": [{"entityID": "Id of the fact", "relation": "...", "subject_id": "...", ...}]
+            }
+          ]
+        }
+        ```
+        Items failing validation or conflicting with existing data are skipped and listed in errors.
+        """
+        news_items = request.json.get("news") if isinstance(request.json, dict) else None
+        if not isinstance(news_items, list):
+            return {"message": "The news property must be a list"}, 400
+        number_items = sum(1 + len(item["facts"]) if isinstance(item, dict) and isinstance(item.get("facts"), list)
+                           else 1 for item in news_items)
+        if number_items > INGEST_BATCH_MAX_ITEMS:
+            return {"message": "A batch holds at most %d news and facts" % INGEST_BATCH_MAX_ITEMS}, 413
+        errors = []
+        valid_items = []
+        for item in news_items:
+            item_errors = validation_errors(news, item)
+            if not item_errors and not isinstance(item.get("facts", []), list):
+                item_errors = {"facts": "The facts of a news must be a list"}
+            if item_errors:
+                errors.append({"newsID": item.get("entityID") if isinstance(item, dict) else None, "factID": None,
+                               "message": item_errors})
+                continue
+            facts = []
+            for fact_data in item.get("facts", []):
+                fact_errors = validation_errors(fact, fact_data) if isinstance(fact_data, dict) \
+                    else "A fact must be an object"
+                if fact_errors:
+                    errors.append({"newsID": item["entityID"],
+                                   "factID": fact_data.get("entityID") if isinstance(fact_data, dict) else None,
+                                   "message": fact_errors})
+                else:
+                    facts.append(fact_data)
+            valid_items.append(dict(item, facts=facts))
+        result = NewsService.create_batch(valid_items)
+        result["errors"] = errors + result["errors"]
+        return result, 207 if result["errors"] else 201
+
+
 @api.route("/<string:id>")
 class NewsResource(Resource):
 
@@ -178,12 +256,11 @@ class FactNews(Resource):
 
 @api.route("/<string:news_id>/relations")
 class NewsRelations(Resource):
-    @api.doc(responses={200: 'OK'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request'}, parser=graph_stream_parser)
     @user_token_required
     def get(self, news_id):
         """Get all entities and relations in a news"""
-
-        return NewsService.get_all_relations_in_news(news_id)
+        return graph_response(NewsService.get_all_relations_in_news, news_id)
 
 
 # @api.route("/<string:news_id>/relations/<string:entity_id>")
@@ -196,7 +273,7 @@ class NewsRelations(Resource):
 @api.route("/relations")
 
 class SetNewsRelations(Resource):
-    @api.doc(responses={200: 'OK'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 413: 'Payload Too Large'}, parser=graph_stream_parser)
     @api.expect(news_set, validate=True)
     @user_token_required
     def post(self):
@@ -210,7 +287,7 @@ class SetNewsRelations(Resource):
         ```
         """
         set_news_id = request.json["set_news_id"]
-        return NewsService.get_all_relations_in_set_news(set_news_id)
+        return set_news_graph_response(NewsService.get_all_relations_in_set_news, set_news_id)
 
 
 # @api.route("/relations/<string:entity_id>")
@@ -224,16 +301,17 @@ class SetNewsRelations(Resource):
 
 @api.route("/<string:news_id>/appearance/<string:entity_id>")
 class EntityAppearanceNews(Resource):
-    @api.doc(responses={200: 'OK'})
+    @api.doc(responses={200: 'OK'}, parser=entity_type_parser)
     @user_token_required
     def get(self, news_id, entity_id):
         """Get the number of times an entity occurs in a news"""
-        return NewsService.get_number_appearance_in_news(news_id, entity_id)
+        entity_type = entity_type_parser.parse_args()['type']
+        return NewsService.get_number_appearance_in_news(news_id, entity_id, entity_type)
 
 
 @api.route("/appearance/<string:entity_id>")
 class EntityAppearanceNewsSet(Resource):
-    @api.doc(responses={200: 'OK', 400: 'Bad Request'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request'}, parser=entity_type_parser)
     @api.expect(news_set, validate=True)
     @user_token_required
     def post(self, entity_id):
@@ -247,11 +325,12 @@ class EntityAppearanceNewsSet(Resource):
        ```
        """
         set_news_id = request.json["set_news_id"]
-        return NewsService.get_number_appearance_in_set_news(set_news_id, entity_id)
+        entity_type = entity_type_parser.parse_args()['type']
+        return NewsService.get_number_appearance_in_set_news(set_news_id, entity_id, entity_type)
 
 @api.route("/<string:news_id>/type/relations")
 class EntityRelationTypeNews(Resource):
-    @api.doc(responses={200: 'OK', 400: 'Bad Request'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request'}, parser=graph_stream_parser)
     @api.expect(types_entity, validate=True)
     @user_token_required
     def post(self, news_id):
@@ -266,19 +345,20 @@ class EntityRelationTypeNews(Resource):
        ```
        """
         set_entity_types = request.json["set_entity_types"]
-        return NewsService.get_entity_type_relations_in_news(news_id, set_entity_types)
+        return graph_response(NewsService.get_entity_type_relations_in_news, news_id, set_entity_types)
 
 @api.route("/<string:news_id>/entity/<string:entity_id>/relations")
 class EntityIndividualRelationNews(Resource):
-    @api.doc(responses={200: 'OK', 400: 'Bad Request'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request'}, parser=entity_relations_parser)
     @user_token_required
     def get(self, news_id, entity_id):
         """Get a specified entity and its relations in a news"""
-        return NewsService.get_entity_individual_relations_in_news(news_id, entity_id)
+        entity_type = entity_type_parser.parse_args()['type']
+        return graph_response(NewsService.get_entity_individual_relations_in_news, news_id, entity_id, entity_type)
 
 @api.route("/type/relations")
 class EntityRelationTypeSetNews(Resource):
-    @api.doc(responses={200: 'OK', 400: 'Bad Request'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 413: 'Payload Too Large'}, parser=graph_stream_parser)
     @api.expect(types_entity_set_news, validate=True)
     @user_token_required
     def post(self):
@@ -294,11 +374,12 @@ class EntityRelationTypeSetNews(Resource):
        """
         set_news_id = request.json["set_news_id"]
         set_entity_types = request.json["set_entity_types"]
-        return NewsService.get_entity_type_relations_in_set_news(set_news_id, set_entity_types)
+        return set_news_graph_response(NewsService.get_entity_type_relations_in_set_news, set_news_id,
+                                       set_entity_types)
 
 @api.route("/entity/<string:entity_id>/relations")
 class EntityIndividualSetNews(Resource):
-    @api.doc(responses={200: 'OK', 400: 'Bad Request'})
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 413: 'Payload Too Large'}, parser=entity_relations_parser)
     @api.expect(news_set, validate=True)
     @user_token_required
     def post(self, entity_id):
@@ -313,7 +394,9 @@ class EntityIndividualSetNews(Resource):
        """
 
         set_news_id = request.json["set_news_id"]
-        return NewsService.get_entity_individual_relations_in_set_news(set_news_id, entity_id)
+        entity_type = entity_type_parser.parse_args()['type']
+        return set_news_graph_response(NewsService.get_entity_individual_relations_in_set_news, set_news_id, entity_id,
+                                       entity_type)
 
 
 @api.route("/merge_nodes")
@@ -1,11 +1,91 @@
-from typing import List, Dict
+from itertools import chain
+from typing import Callable, List, Dict, Tuple
+from neo4j import CypherError
 from application import dao
-from application.utilities.graph import serialize_subgraph_to_dict, serialize_node_to_dict
+from application.utilities.graph import serialize_subgraph_to_dict, serialize_subgraphs_to_dict, serialize_node_to_dict, \
+    graph_entity_ids, merge_subgraph_documents, SubgraphSerializer
+from application.utilities.news_cache import news_result_cache, fact_entity_ids, entity_relation_ids
+from application.utilities.appearance_counters import appearance_counter_repair
+from application.utilities.fan_out import query_fan_out, batches
+from application.utilities.query_templates import create_fact_query
+from application.utilities.entity_labels import entity_labels, entity_label_queries, entity_label_registry
 from application.settings import LIMIT_NEWS
 
+# read from the appearance counters of the news (see appearance_counters)
+APPEARANCE_IN_NEWS = entity_label_queries("""
+        MATCH (news:News{entityID: $id_news})-[mention:MENTIONS]->(:%(label)s{entityID:$id_entity})
+        USING INDEX news:News(entityID)
+        RETURN sum(mention.facts) as numberAppearance
+        """)
+
+APPEARANCE_IN_SET_NEWS = entity_label_queries("""
+        UNWIND $set_id_news as news_id
+        MATCH (news:News{entityID: news_id})-[mention:MENTIONS]->(:%(label)s{entityID:$id_entity})
+        USING INDEX news:News(entityID)
+        RETURN sum(mention.facts) as numberAppearance
+        """)
+
+INDIVIDUAL_RELATIONS_IN_NEWS = entity_label_queries("""
+        MATCH (news:News{entityID: $id_news})-[:HAS_FACT]->(fact:Fact)-[]->(:%(label)s{entityID:$id_entity})
+        USING INDEX news:News(entityID)
+        WITH fact
+        MATCH (fact)-[rel]->(entity)
+        RETURN fact, rel, entity
+        """)
+
+INDIVIDUAL_RELATIONS_IN_SET_NEWS = entity_label_queries("""
+        UNWIND $set_id_news as news_id
+        MATCH (news:News{entityID: news_id})-[:HAS_FACT]->(facts:Fact)-[]->(:%(label)s{entityID:$id_entity})
+        USING INDEX news:News(entityID)
+        WITH facts
+        MATCH (facts)-[rel]->(entity)
+        RETURN facts, rel, entity
+        """)
+
+# the same reads returning the news of each record, to split the result of a set into per-news documents
+RELATIONS_BY_NEWS = """
+        UNWIND $set_news_id as news_id
+        MATCH (news:News{entityID:news_id})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
+        USING INDEX news:News(entityID)
+        RETURN news.entityID as newsID, facts, rel, entity
+        """
+
+TYPE_RELATIONS_BY_NEWS = """
+        UNWIND $set_news_id as news_id
+        MATCH (news:News{entityID:news_id})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
+        USING INDEX news:News(entityID)
+        WHERE any( label IN labels(entity) WHERE label IN $type_entity)
+        RETURN news.entityID as newsID, facts, rel, entity
+        """
+
+INDIVIDUAL_RELATIONS_BY_NEWS = entity_label_queries("""
+        UNWIND $set_news_id as news_id
+        MATCH (news:News{entityID: news_id})-[:HAS_FACT]->(facts:Fact)-[]->(:%(label)s{entityID:$id_entity})
+        USING INDEX news:News(entityID)
+        WITH news, facts
+        MATCH (facts)-[rel]->(entity)
+        RETURN news.entityID as newsID, facts, rel, entity
+        """)
+
+EXISTING_IDS = {label: """
+        UNWIND $ids as id
+        MATCH (node:%s{entityID: id})
+        RETURN node.entityID as entityID
+        """ % label for label in ["News", "Fact"]}
+
+
 class NewsService:
     @staticmethod
-    def get_all(start=0, limit=100) -> List:
+    def get_all(start=0, limit=100, cursor=None) -> List:
+        if cursor is not None:
+            query = """
+            MATCH (news:News)
+            WHERE news.entityID > $after
+            RETURN news.entityID as entityID, news.link as link, news.topics as topics
+            ORDER BY news.entityID
+            LIMIT $limit
+            """
+            return dao.run_read_query(query, {"after": cursor.get("entityID", ""), "limit": limit}).data()
         query = """
         MATCH (news:News)
         RETURN news.entityID as entityID, news.link as link, news.topics as topics
@@ -30,7 +110,10 @@ class NewsService:
         CREATE (news:News $props)
         RETURN news.entityID as entityID, news.link as link, news.topics as topics
         """
-        return dao.run_write_query(query, props=news_properties).data()
+        result = dao.run_write_query(query, props=news_properties).data()
+        # the results read before the news existed are empty
+        news_result_cache.invalidate_news([news_properties["entityID"]])
+        return result
 
     @staticmethod
     def update(news_properties: dict,news_id: str):
@@ -40,7 +123,9 @@ class NewsService:
         SET news = $props
         RETURN news.entityID as entityID, news.link as link, news.topics as topics
         """
-        return dao.run_write_query(query, {"props": news_properties, "id_news": news_id}).data()
+        result = dao.run_write_query(query, {"props": news_properties, "id_news": news_id}).data()
+        news_result_cache.invalidate_news([news_id])
+        return result
 
     @staticmethod
     def delete_by_id(news_id: str):
@@ -50,7 +135,9 @@ class NewsService:
         OPTIONAL MATCH (news)-[:HAS_FACT]->(fact:Fact)
         DETACH DELETE news, fact
         """
-        return dao.run_write_query(query, id_news= news_id).data()
+        result = dao.run_write_query(query, id_news= news_id).data()
+        news_result_cache.invalidate_news([news_id])
+        return result
 
     @staticmethod
     def get_fact_by_id(fact_id: str):
@@ -62,60 +149,133 @@ class NewsService:
 
     @staticmethod
     def create_fact(news_id: str, fact_data: Dict):
-        query = "MATCH (news:News{entityID: $id_news}), " + \
-                    "(sub:" + fact_data['subject_type']+ "{entityID: $id_subject}), " \
-                    "(obj:" + fact_data['object_type'] + "{entityID: $id_object}) " \
-                "OPTIONAL MATCH (loc:" + fact_data['location_type'] + "{entityID: $id_location})" \
-                "OPTIONAL MATCH (time:" + fact_data['time_type'] + "{entityID: $id_time})" \
-                "CREATE (fact:Fact{entityID: $id_fact}), " \
-                    "(news)-[:HAS_FACT]->(fact), " \
-                    "(fact)-[:HAS_SUBJECT_" + fact_data['relation'].replace(" ", "_").upper()+ "]->(sub)," \
-                    "(fact)-[:HAS_OBJECT_" + fact_data["relation"].replace(" ", "_").upper()+ "]->(obj) " \
-                "FOREACH (_ IN CASE WHEN loc IS NOT NULL THEN [1] ELSE [] END |" \
-                    "CREATE (fact)-[:OCCURRED_IN]->(loc) )" \
-                "FOREACH (_ IN CASE WHEN time IS NOT NULL THEN [1] ELSE [] END |" \
-                    "CREATE (fact)-[:OCCURRED_ON]->(time) )" \
-                "RETURN fact.entityID as factID"
-
+        query = create_fact_query(fact_data['subject_type'], fact_data['object_type'],
+                                  fact_data['location_type'], fact_data['relation'])
         result = dao.run_write_query(query, {"id_news": news_id, "id_location":fact_data['location_id'],
                                    "id_time": fact_data["time_id"], "id_subject": fact_data["subject_id"],
                                    "id_object": fact_data["object_id"], "id_fact": fact_data["entityID"]}).data()
+        news_result_cache.invalidate_news([news_id])
         return result
 
+    @staticmethod
+    def create_batch(news_items: List[Dict]) -> Dict:
+        """
+        Create news together with their facts: one UNWIND transaction for the news, then one per fact
+        signature. Items that cannot be created are reported in errors instead of failing the batch.
+        """
+        errors = []
+        fact_items = [(item["entityID"], fact) for item in news_items for fact in item.get("facts", [])]
+        existing_news = set(dao.run_read_query(EXISTING_IDS["News"],
+                                               ids=[item["entityID"] for item in news_items]).value("entityID"))
+        existing_facts = set(dao.run_read_query(EXISTING_IDS["Fact"],
+                                                ids=[fact["entityID"] for _, fact in fact_items]).value("entityID"))
+        news_rows = []
+        seen_news = set()
+        for item in news_items:
+            if item["entityID"] in existing_news or item["entityID"] in seen_news:
+                errors.append({"newsID": item["entityID"], "factID": None,
+                               "message": "The news identified by this entityID already exists"})
+                continue
+            seen_news.add(item["entityID"])
+            news_rows.append({"entityID": item["entityID"], "link": item["link"], "topics": item["topics"]})
+
+        fact_rows = {}
+        seen_facts = set()
+        for news_id, fact_data in fact_items:
+            error = None
+            if news_id not in seen_news:
+                error = "The news of this fact is not created"
+            elif fact_data["entityID"] in existing_facts or fact_data["entityID"] in seen_facts:
+                error = "The fact identified by this entityID already exists"
+            elif fact_data["subject_id"] == fact_data["object_id"] and \
+                    fact_data["subject_type"] == fact_data["object_type"]:
+                error = "Subject and Object cannot be the same entity!"
+            if error:
+                errors.append({"newsID": news_id, "factID": fact_data["entityID"], "message": error})
+                continue
+            seen_facts.add(fact_data["entityID"])
+            signature = (fact_data["subject_type"], fact_data["object_type"], fact_data["location_type"],
+                         fact_data["relation"])
+            fact_rows.setdefault(signature, []).append({
+                "id_news": news_id, "id_fact": fact_data["entityID"], "id_subject": fact_data["subject_id"],
+                "id_object": fact_data["object_id"], "id_location": fact_data.get("location_id"),
+                "id_time": fact_data.get("time_id")})
+
+        created_news = 0
+        if news_rows:
+            query = """
+            UNWIND $rows as row
+            CREATE (news:News)
+            SET news = row
+            """
+            try:
+                dao.run_write_query(query, rows=news_rows)
+                created_news = len(news_rows)
+            except CypherError as error:
+                errors += [{"newsID": row["entityID"], "factID": None, "message": error.message} for row in news_rows]
+                fact_rows = {}
+
+        created_facts = 0
+        for signature, rows in fact_rows.items():
+            try:
+                created = set(dao.run_write_query(create_fact_query(*signature, batched=True),
+                                                  rows=rows).value("factID"))
+            except CypherError as error:
+                errors += [{"newsID": row["id_news"], "factID": row["id_fact"], "message": error.message}
+                           for row in rows]
+                continue
+            created_facts += len(created)
+            errors += [{"newsID": row["id_news"], "factID": row["id_fact"],
+                        "message": "The subject or the object of this fact does not exist"}
+                       for row in rows if row["id_fact"] not in created]
+        news_result_cache.invalidate_news(seen_news)
+        return {"news": created_news, "facts": created_facts, "errors": errors}
+
     @staticmethod
     def delete_fact(news_id: str, fact_id: str):
         query = """
         MATCH (news:News{entityID: $id_news})-[:HAS_FACT]-(fact:Fact{entityID: $id_fact})
         USING INDEX news:News(entityID)
+        OPTIONAL MATCH (fact)-[reference]->(entity)<-[mention:MENTIONS]-(news)
+        WITH fact, mention, count(reference) as references
+        SET mention.facts = mention.facts - references
+        WITH fact, collect(mention) as mentions
+        FOREACH (mention IN [mention IN mentions WHERE mention.facts <= 0] | DELETE mention)
         DETACH DELETE fact
         """
-        return dao.run_write_query(query, {"id_news": news_id, "id_fact": fact_id}).data()
+        result = dao.run_write_query(query, {"id_news": news_id, "id_fact": fact_id}).data()
+        news_result_cache.invalidate_news([news_id])
+        return result
 
 
 
     @staticmethod
-    def get_all_relations_in_news(news_id: str) -> Dict:
+    def get_all_relations_in_news(news_id: str, stream: bool = False, compact: bool = False):
         query = """
         MATCH (news:News{entityID: $id})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
         USING INDEX news:News(entityID)
         RETURN facts, rel, entity
         """
-        result = dao.run_read_query(query, id=news_id).graph()
-        return serialize_subgraph_to_dict(result)
+        if stream:
+            return dao.stream_read_query(query, id=news_id)
+        return news_result_cache.load(
+            (news_id, "relations", compact),
+            lambda: serialize_subgraph_to_dict(dao.run_read_query(query, id=news_id).graph(), compact),
+            graph_entity_ids)
 
     @staticmethod
-    def get_all_relations_in_set_news(set_news_id: List[str]) -> Dict:
-        id_set_news = list(set(set_news_id))
-        if len(id_set_news) > LIMIT_NEWS:
-            id_set_news = id_set_news[:LIMIT_NEWS]
+    def get_all_relations_in_set_news(set_news_id: List[str], stream: bool = False, compact: bool = False):
+        id_set_news = sorted(set(set_news_id))
         query = """
         UNWIND $set_news_id as news_id
         MATCH (news:News{entityID:news_id})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
         USING INDEX news:News(entityID)
         RETURN facts, rel, entity
         """
-        result = dao.run_read_query(query, set_news_id=id_set_news).graph()
-        return serialize_subgraph_to_dict(result)
+        if stream:
+            return NewsService._stream_batches(query, id_set_news, "set_news_id", {})
+        documents = NewsService._news_documents(id_set_news, ("relations", False), [RELATIONS_BY_NEWS], {})
+        return merge_subgraph_documents(documents, compact)
 
     # @staticmethod
     # def get_entity_relations_in_news(news_id: str, entity_id: str) -> Dict:
@@ -143,45 +303,46 @@ class NewsService:
     #     return serialize_subgraph_to_dict(result)
 
     @staticmethod
-    def get_number_appearance_in_news(news_id: str, entity_id: str) -> Dict:
-        query = """
-        MATCH (news:News{entityID: $id_news})-[:HAS_FACT]->(facts:Fact)-[]->({entityID:$id_entity})
-        USING INDEX news:News(entityID)
-        RETURN count(facts) as numberAppearance
-        """
-        result = dao.run_read_query(query, {"id_news": news_id, "id_entity": entity_id}).data()
-        return {"numberAppearance" : result[0]["numberAppearance"]}
+    def get_number_appearance_in_news(news_id: str, entity_id: str, entity_type: str = None) -> Dict:
+        number_appearance = 0
+        for label in entity_labels(entity_id, entity_type):
+            result = dao.run_read_query(APPEARANCE_IN_NEWS[label], {"id_news": news_id, "id_entity": entity_id}).data()
+            number_appearance += result[0]["numberAppearance"]
+        return {"numberAppearance" : number_appearance}
 
     @staticmethod
-    def get_number_appearance_in_set_news(set_news_id: List[str], entity_id: str) -> Dict:
-        id_set_news = list(set(set_news_id))
-        if len(id_set_news) > LIMIT_NEWS:
-            id_set_news = id_set_news[:LIMIT_NEWS]
-        query = """
-        UNWIND $set_id_news as news_id
-        MATCH (news:News{entityID: news_id})-[:HAS_FACT]->(facts:Fact)-[]->({entityID:$id_entity})
-        USING INDEX news:News(entityID)
-        RETURN count(facts) as numberAppearance
-        """
-        result = dao.run_read_query(query, {"set_id_news": id_set_news, "id_entity": entity_id}).data()
-        return {"numberAppearance": result[0]["numberAppearance"]}
+    def get_number_appearance_in_set_news(set_news_id: List[str], entity_id: str, entity_type: str = None) -> Dict:
+        id_set_news = sorted(set(set_news_id))
+        labels = entity_labels(entity_id, entity_type)
+
+        def count(news_ids: List[str]) -> int:
+            return sum(dao.run_read_query(APPEARANCE_IN_SET_NEWS[label], {"set_id_news": news_ids,
+                                                                         "id_entity": entity_id}
+                                          ).data()[0]["numberAppearance"] for label in labels)
+
+        return {"numberAppearance": sum(query_fan_out.map(count, id_set_news))}
 
     @staticmethod
-    def get_entity_type_relations_in_news(news_id: str, entity_type: List[str]) -> Dict:
+    def get_entity_type_relations_in_news(news_id: str, entity_type: List[str], stream: bool = False,
+                                          compact: bool = False):
         query = """
         MATCH (news:News{entityID: $id_news})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
         USING INDEX news:News(entityID)
         WHERE any( label IN labels(entity) WHERE label IN $type_entity)
         RETURN facts, rel, entity
         """
-        result= dao.run_read_query(query, {"id_news": news_id, "type_entity": list(set(entity_type))}).graph()
-        return serialize_subgraph_to_dict(result)
+        params = {"id_news": news_id, "type_entity": sorted(set(entity_type))}
+        if stream:
+            return dao.stream_read_query(query, params)
+        return news_result_cache.load(
+            (news_id, "type_relations", tuple(params["type_entity"]), compact),
+            lambda: serialize_subgraph_to_dict(dao.run_read_query(query, params).graph(), compact),
+            graph_entity_ids)
 
     @staticmethod
-    def get_entity_type_relations_in_set_news(set_news_id: List[str], entity_type: List[str]) -> Dict:
-        id_set_news = list(set(set_news_id))
-        if len(id_set_news) > LIMIT_NEWS:
-            id_set_news = id_set_news[:LIMIT_NEWS]
+    def get_entity_type_relations_in_set_news(set_news_id: List[str], entity_type: List[str], stream: bool = False,
+                                              compact: bool = False):
+        id_set_news = sorted(set(set_news_id))
         query = """
         UNWIND $set_id_news as news_id
         MATCH (news:News{entityID: news_id})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
@@ -189,38 +350,90 @@ class NewsService:
         WHERE any( label IN labels(entity) WHERE label IN $type_entity)
         RETURN facts, rel, entity
         """
-        result= dao.run_read_query(query, {"set_id_news": id_set_news,
-                                        "type_entity": list(set(entity_type))}).graph()
-        return serialize_subgraph_to_dict(result)
+        params = {"type_entity": sorted(set(entity_type))}
+        if stream:
+            return NewsService._stream_batches(query, id_set_news, "set_id_news", params)
+        documents = NewsService._news_documents(id_set_news, ("type_relations", tuple(params["type_entity"]), False),
+                                                [TYPE_RELATIONS_BY_NEWS], {"type_entity": params["type_entity"]})
+        return merge_subgraph_documents(documents, compact)
 
     @staticmethod
-    def get_entity_individual_relations_in_news(news_id: str, entity_id: str)->Dict:
-        query = """
-        MATCH (news:News{entityID: $id_news})-[:HAS_FACT]->(fact:Fact)-[]->({entityID:$id_entity})
-        USING INDEX news:News(entityID)
-        WITH fact
-        MATCH (fact)-[rel]->(entity)
-        RETURN fact, rel, entity
+    def get_entity_individual_relations_in_news(news_id: str, entity_id: str, entity_type: str = None,
+                                                stream: bool = False, compact: bool = False):
+        params = {"id_news": news_id, "id_entity": entity_id}
+        labels = entity_labels(entity_id, entity_type)
+        if stream:
+            return chain.from_iterable(dao.stream_read_query(INDIVIDUAL_RELATIONS_IN_NEWS[label], params)
+                                       for label in labels)
+        graphs = [dao.run_read_query(INDIVIDUAL_RELATIONS_IN_NEWS[label], params).graph() for label in labels]
+        return serialize_subgraphs_to_dict(graphs, compact)
+
+    @staticmethod
+    def get_entity_individual_relations_in_set_news(set_news_id: List[str], entity_id:str,
+                                                    entity_type: str = None, stream: bool = False,
+                                                    compact: bool = False):
+        id_set_news = sorted(set(set_news_id))
+        labels = entity_labels(entity_id, entity_type)
+        if stream:
+            return chain.from_iterable(NewsService._stream_batches(INDIVIDUAL_RELATIONS_IN_SET_NEWS[label], id_set_news,
+                                                                   "set_id_news", {"id_entity": entity_id})
+                                       for label in labels)
+        documents = NewsService._news_documents(id_set_news, ("entity_relations", entity_id, tuple(labels)),
+                                                [INDIVIDUAL_RELATIONS_BY_NEWS[label] for label in labels],
+                                                {"id_entity": entity_id}, entity_relation_ids(entity_id))
+        return merge_subgraph_documents(documents, compact)
+
+    @staticmethod
+    def _news_documents(id_set_news: List[str], kind: Tuple, queries: List[str], params: Dict,
+                        entity_ids: Callable[[Dict], List[str]] = graph_entity_ids) -> List[Dict]:
         """
-        result = dao.run_read_query(query, {"id_news": news_id, "id_entity": entity_id}).graph()
-        return serialize_subgraph_to_dict(result)
+        Per-news documents of a read over a set of news, in the Neo4j browser format, taken from the
+        news result cache. The news missing from it are read in concurrent chunks, with one run of each
+        query per chunk, and their documents cached, empty ones included.
+        :param kind: rest of the cache keys, after the id of the news
+        :param queries: reads of the news of $set_news_id returning newsID, facts, rel and entity
+        :param entity_ids: function listing the entityIDs a document is invalidated by
+        :return: list of dict
+        """
+        def read(keys: List[Tuple]) -> Dict:
+            news_ids = [key[0] for key in keys]
+            return NewsService._documents_by_news(keys, [dao.run_read_query(query, dict(params, set_news_id=news_ids))
+                                                         for query in queries])
+
+        def load(keys: List[Tuple]) -> Dict:
+            documents = {}
+            for chunk_documents in query_fan_out.map(read, keys):
+                documents.update(chunk_documents)
+            return documents
+
+        documents = news_result_cache.load_many([(news_id,) + kind for news_id in id_set_news], load, entity_ids)
+        return list(documents.values())
 
     @staticmethod
-    def get_entity_individual_relations_in_set_news(set_news_id: List[str], entity_id:str)->Dict:
-        id_set_news = list(set(set_news_id))
-        if len(id_set_news) > LIMIT_NEWS:
-            id_set_news = id_set_news[:LIMIT_NEWS]
-        query = """
-        UNWIND $set_id_news as news_id
-        MATCH (news:News{entityID: news_id})-[:HAS_FACT]->(facts:Fact)-[]->({entityID:$id_entity})
-        USING INDEX news:News(entityID)
-        WITH facts
-        MATCH (facts)-[rel]->(entity)
-        RETURN facts, rel, entity
+    def _stream_batches(query: str, id_set_news: List[str], parameter: str, params: Dict):
+        """
+        Stream the records of a read over a set of news, one transaction per batch of LIMIT_NEWS news
+        :param parameter: name of the parameter holding the ids of the news in the query
+        :return: iterator of records
         """
-        result = dao.run_read_query(query, {"set_id_news": id_set_news,
-                                            "id_entity": entity_id}).graph()
-        return serialize_subgraph_to_dict(result)
+        return chain.from_iterable(dao.stream_read_query(query, dict(params, **{parameter: batch}))
+                                   for batch in batches(id_set_news, LIMIT_NEWS))
+
+    @staticmethod
+    def _documents_by_news(keys: List[Tuple], results) -> Dict:
+        """
+        Split the records of reads returning newsID, facts, rel and entity into one document per news
+        :param keys: cache keys of the news read, the id of the news first
+        :return: dict of the documents by key, empty for the news without records
+        """
+        serializers = {key[0]: SubgraphSerializer() for key in keys}
+        for result in results:
+            for record in result:
+                serializer = serializers[record["newsID"]]
+                serializer.add_node(record["facts"])
+                serializer.add_node(record["entity"])
+                serializer.add_relationship(record["rel"])
+        return {key: serializers[key[0]].result() for key in keys}
 
 
 
@@ -239,14 +452,28 @@ class NewsService:
         RETURN node
         """
         result = dao.run_write_query(query, {"entity_id_set" :list(set(set_entity_id)), "label": entity_type}).single()
+        entity_label_registry.forget(set_entity_id)
+        news_result_cache.invalidate_entities(set_entity_id)
         if (result):
             merged_node = result["node"]
+            appearance_counter_repair.repair_entity(merged_node["entityID"], entity_type)
             return serialize_node_to_dict(merged_node)
         else:
             return {}
 
     @staticmethod
     def search_news(start=0, limit=100, *args, **kwargs)-> List:
+        cursor = kwargs.get("cursor")
+        if cursor is not None:
+            query = """
+            MATCH(news:News)
+            WHERE news.link CONTAINS $property AND news.entityID > $after
+            RETURN news.entityID as entityID, news.link as link, news.topics as topics
+            ORDER BY news.entityID
+            LIMIT $limit
+            """
+            return dao.run_read_query(query, {"property": args[0], "after": cursor.get("entityID", ""),
+                                              "limit": limit}).data()
         query = """
         MATCH(news:News)
         WHERE news.link CONTAINS $property
@@ -275,7 +502,13 @@ class NewsService:
         MATCH (facts)-[r]->(entity)
         RETURN facts.entityID as factID, collect(type(r)) as predicate, collect(entity.entityID) as entityID
         """
-        result = dao.run_read_query(query, {"id_news": news_id}).data()
+        return news_result_cache.load(
+            (news_id, "facts"),
+            lambda: NewsService._detailed_facts(dao.run_read_query(query, {"id_news": news_id}).data()),
+            fact_entity_ids)
+
+    @staticmethod
+    def _detailed_facts(result) -> List[Dict]:
         facts = []
         for res in result:
             detailed_fact = {"timeID": None, "locationID": None }
@@ -0,0 +1,5 @@
+BASE_ROUTE = 'news-sets'
+
+def register_routes(api, app, root='api'):
+    from application.news_sets.controller import api as news_sets_api
+    api.add_namespace(news_sets_api, path=f"/{root}/{BASE_ROUTE}")
@@ -0,0 +1,146 @@
+from urllib.parse import urlencode
+
+from flask import request
+from flask_restx import Namespace, Resource, reqparse
+
+from .service import NewsSetService
+from .model import news_set_members_model
+from application.news.service import NewsService
+from application.news.model import types_entity_model, ENTITY_TYPES
+from application.utilities.wrap_functions import user_token_required, admin_token_required
+from application.utilities.paginating import encode_cursor, decode_cursor
+from application.utilities.streaming import graph_stream_parser, graph_stream_mode, stream_graph
+from application.settings import LIMIT_NEWS
+
+api = Namespace("News sets", description="named sets of news analysed page by page")
+news_set_members = api.model("News_Set_Members", news_set_members_model)
+types_entity = api.model("Types_News_Set", types_entity_model)
+
+set_graph_parser = graph_stream_parser.copy()
+set_graph_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
+set_graph_parser.add_argument('limit', location='args', type=int,
+                              help='Number of news per page, at most %d' % LIMIT_NEWS)
+
+entity_type_parser = reqparse.RequestParser()
+entity_type_parser.add_argument('type', location='args', type=str, choices=ENTITY_TYPES,
+                                help='The type of the entity, resolved from its id if missing')
+entity_relations_parser = set_graph_parser.copy()
+for argument in entity_type_parser.args:
+    entity_relations_parser.add_argument(argument)
+
+
+def set_graph_response(name: str, read):
+    """
+    Answer a graph request over a news set: a stream over every news of the set, or the document of
+    the page of news the cursor and limit arguments describe, with the link to the next page
+    :param read: function reading a list of news ids, called with stream or compact
+    :return: flask Response, or the document and its status
+    """
+    if NewsSetService.get(name) is None:
+        return {"message": "This news set does not exist"}, 404
+    args = set_graph_parser.parse_args()
+    compact = args['format'] == "compact"
+    mode = graph_stream_mode()
+    if mode and compact:
+        return {"message": "The compact format cannot be streamed"}, 400
+    if mode:
+        return stream_graph(NewsSetService.stream(read, name), mode)
+    position = {}
+    if args['cursor'] is not None:
+        position = decode_cursor(args['cursor'])
+        if position is None or "entityID" not in position:
+            return {"message": "The cursor is not valid"}, 400
+    limit = min(args['limit'], LIMIT_NEWS) if args['limit'] and args['limit'] > 0 else LIMIT_NEWS
+    page = NewsSetService.page(read, name, position.get("entityID", ""), limit, compact)
+    result = {"previous": None, "next": None, "data": page["data"]}
+    if page["last"] is not None:
+        # the other arguments, such as the format or the type of the entity, carry over to the next page
+        query = dict(request.args.items(), cursor=encode_cursor({"entityID": page["last"]}), limit=str(limit))
+        result["next"] = request.base_url + "?" + urlencode(query)
+    return result, 200
+
+
+@api.route("/<string:name>")
+class NewsSetResource(Resource):
+    @api.doc(responses={200: 'OK', 404: 'Not Found'})
+    @user_token_required
+    def get(self, name):
+        """Get the number of news in a news set"""
+        result = NewsSetService.get(name)
+        if result is None:
+            return {"message": "This news set does not exist"}, 404
+        return result
+
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 405: 'Require admin privilege'})
+    @api.expect(news_set_members, validate=True)
+    @admin_token_required
+    def post(self, name):
+        """ Add news to a news set
+        Use this method to create a news set or to add news to it. A large set can be sent in several requests.
+        * Send a JSON object with the following properties in the request body.
+        ```
+        {
+          "set_news_id": "set ids of news"
+        }
+        ```
+        """
+        return NewsSetService.add_news(name, request.json["set_news_id"])
+
+    @api.doc(responses={200: 'OK', 405: 'Require admin privilege'})
+    @admin_token_required
+    def delete(self, name):
+        """Delete a news set, leaving its news unchanged"""
+        NewsSetService.delete(name)
+        return {"message": "Successful"}
+
+
+@api.route("/<string:name>/relations")
+class NewsSetRelations(Resource):
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 404: 'Not Found'}, parser=set_graph_parser)
+    @user_token_required
+    def get(self, name):
+        """Get all entities and relations in a news set, page by page"""
+        return set_graph_response(name, NewsService.get_all_relations_in_set_news)
+
+
+@api.route("/<string:name>/type/relations")
+class NewsSetTypeRelations(Resource):
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 404: 'Not Found'}, parser=set_graph_parser)
+    @api.expect(types_entity, validate=True)
+    @user_token_required
+    def post(self, name):
+        """ Get all entities belongs to some specific types and their relations in a news set, page by page
+        * Send a JSON object with the following properties in the request body.
+        ```
+        {
+          "set_entity_types": "set of entity types"
+        }
+        ```
+        """
+        set_entity_types = request.json["set_entity_types"]
+        return set_graph_response(name, lambda news_ids, **kwargs: NewsService.get_entity_type_relations_in_set_news(
+            news_ids, set_entity_types, **kwargs))
+
+
+@api.route("/<string:name>/entity/<string:entity_id>/relations")
+class NewsSetEntityRelations(Resource):
+    @api.doc(responses={200: 'OK', 400: 'Bad Request', 404: 'Not Found'}, parser=entity_relations_parser)
+    @user_token_required
+    def get(self, name, entity_id):
+        """Get a specified entity and its relations in a news set, page by page"""
+        entity_type = entity_type_parser.parse_args()['type']
+        return set_graph_response(name, lambda news_ids, **kwargs:
+                                  NewsService.get_entity_individual_relations_in_set_news(news_ids, entity_id,
+                                                                                          entity_type, **kwargs))
+
+
+@api.route("/<string:name>/appearance/<string:entity_id>")
+class NewsSetAppearance(Resource):
+    @api.doc(responses={200: 'OK', 404: 'Not Found'}, parser=entity_type_parser)
+    @user_token_required
+    def get(self, name, entity_id):
+        """Get the number of times an entity occurs in every news of a news set"""
+        entity_type = entity_type_parser.parse_args()['type']
+        if NewsSetService.get(name) is None:
+            return {"message": "This news set does not exist"}, 404
+        return NewsSetService.get_number_appearance(name, entity_id, entity_type)
@@ -0,0 +1,6 @@
+from flask_restx import fields
+
+news_set_members_model = {
+    "set_news_id": fields.List(fields.String, required=True, description="The ids of the news to add to the set; "
+                                                                         "the ids of missing news are ignored")
+}
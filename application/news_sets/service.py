@@ -0,0 +1,103 @@
+from itertools import chain
+from typing import Dict, Iterator, List, Optional
+
+from application import dao
+from application.news.service import NewsService
+from application.utilities.fan_out import batches
+from application.utilities.graph import merge_subgraph_documents
+from application.settings import LIMIT_NEWS
+
+ADD_MEMBERS_QUERY = """
+        MERGE (set:NewsSet{entityID: $name})
+        WITH set
+        UNWIND $ids as id
+        MATCH (news:News{entityID: id})
+        MERGE (set)-[:CONTAINS]->(news)
+        """
+
+SIZE_QUERY = """
+        MATCH (set:NewsSet{entityID: $name})
+        RETURN size((set)-[:CONTAINS]->()) as size
+        """
+
+MEMBERS_PAGE_QUERY = """
+        MATCH (set:NewsSet{entityID: $name})-[:CONTAINS]->(news:News)
+        WHERE news.entityID > $after
+        RETURN news.entityID as entityID
+        ORDER BY news.entityID
+        LIMIT $limit
+        """
+
+DELETE_QUERY = """
+        MATCH (set:NewsSet{entityID: $name})
+        DETACH DELETE set
+        """
+
+
+class NewsSetService:
+    """
+    Named sets of news, kept in the database as (:NewsSet)-[:CONTAINS]->(:News), so that a set too large
+    for one request can be uploaded in several and analysed page by page. The reads over a set process
+    its news LIMIT_NEWS at a time, in the order of their ids.
+    """
+    @staticmethod
+    def add_news(name: str, set_news_id: List[str]) -> Dict:
+        for batch in batches(sorted(set(set_news_id)), LIMIT_NEWS):
+            dao.run_write_query(ADD_MEMBERS_QUERY, name=name, ids=batch)
+        return NewsSetService.get(name)
+
+    @staticmethod
+    def get(name: str) -> Optional[Dict]:
+        result = dao.run_read_query(SIZE_QUERY, name=name).single()
+        if result is None:
+            return None
+        return {"name": name, "size": result["size"]}
+
+    @staticmethod
+    def delete(name: str):
+        dao.run_write_query(DELETE_QUERY, name=name)
+
+    @staticmethod
+    def news_ids(name: str, after: str = "", limit: int = LIMIT_NEWS) -> List[str]:
+        return dao.run_read_query(MEMBERS_PAGE_QUERY, name=name, after=after, limit=limit).value("entityID")
+
+    @staticmethod
+    def pages(name: str, after: str = "") -> Iterator[List[str]]:
+        """
+        Iterate over the ids of the news of a set, LIMIT_NEWS at a time, read as the iteration goes
+        """
+        while True:
+            news_ids = NewsSetService.news_ids(name, after)
+            if not news_ids:
+                return
+            yield news_ids
+            if len(news_ids) < LIMIT_NEWS:
+                return
+            after = news_ids[-1]
+
+    @staticmethod
+    def page(read, name: str, after: str, limit: int, compact: bool = False) -> Dict:
+        """
+        The document read over one page of the news of a set
+        :param read: function reading a list of news ids, called with compact
+        :return: dict with the document and the id of the last news of the page, None on the last page
+        """
+        news_ids = NewsSetService.news_ids(name, after, limit)
+        return {"data": read(news_ids, compact=compact) if news_ids else merge_subgraph_documents([], compact),
+                "last": news_ids[-1] if len(news_ids) == limit else None}
+
+    @staticmethod
+    def stream(read, name: str) -> Iterator:
+        """
+        The records of a read over every news of a set, one transaction per page
+        :param read: function reading a list of news ids, called with stream=True
+        """
+        return chain.from_iterable(read(news_ids, stream=True) for news_ids in NewsSetService.pages(name))
+
+    @staticmethod
+    def get_number_appearance(name: str, entity_id: str, entity_type: str = None) -> Dict:
+        number_appearance = 0
+        for news_ids in NewsSetService.pages(name):
+            number_appearance += NewsService.get_number_appearance_in_set_news(news_ids, entity_id,
+                                                                              entity_type)["numberAppearance"]
+        return {"numberAppearance": number_appearance}
@@ -15,6 +15,7 @@ entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 orgs_pagin_parser = reqparse.RequestParser()
 orgs_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 orgs_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+orgs_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
 @api.route("/")
 class OrganizationsCollection(Resource):
     @api.doc(responses={200: 'OK'}, parser=orgs_pagin_parser)
@@ -108,7 +109,8 @@ class SearchOrganizationResource(Resource):
             text_search = request.json["text"]
         else:
             text_search = ' '
-        return paginate_results(orgs_pagin_parser, request.base_url, OrganizationService.search, text_search)
+        return paginate_results(orgs_pagin_parser, request.base_url, OrganizationService.search, text_search,
+                                count=OrganizationService.count_search)
 
 @api.route("/merge_nodes")
 class MergeNodesResource(Resource):
@@ -1,10 +1,23 @@
 from application import dao
 from typing import List, Dict
 from application.utilities.graph import serialize_node_to_dict
+from application.utilities.fulltext import search_fulltext, count_fulltext
+from application.utilities.entity_labels import entity_label_registry
+from application.utilities.news_cache import news_result_cache
+from application.utilities.appearance_counters import appearance_counter_repair
 
 class OrganizationService:
     @staticmethod
-    def get_all(start=0, limit=100) -> List:
+    def get_all(start=0, limit=100, cursor=None) -> List:
+        if cursor is not None:
+            query = """
+            MATCH (org:Organization)
+            WHERE org.entityID > $after
+            RETURN org.entityID as entityID, org.name as name, org.des as description
+            ORDER BY org.entityID
+            LIMIT $limit
+            """
+            return dao.run_read_query(query, after=cursor.get("entityID", ""), limit=limit).data()
         query = """
         MATCH (org:Organization)
         RETURN org.entityID as entityID, org.name as name, org.des as description
@@ -12,7 +25,7 @@ class OrganizationService:
         SKIP $start
         LIMIT $limit
         """
-        return dao.run_read_query(query, start=start, limit = limit).data()
+        return dao.run_read_query(query, start=start, limit=limit).data()
 
     @staticmethod
     def get_by_id(org_id):
@@ -28,7 +41,9 @@ class OrganizationService:
         CREATE (org:Organization $props)
         RETURN org.entityID as entityID, org.name as name, org.des as description
         """
-        return dao.run_write_query(query, props= organization_properties).data()
+        result = dao.run_write_query(query, props= organization_properties).data()
+        entity_label_registry.forget([organization_properties["entityID"]])
+        return result
 
     @staticmethod
     def update(organization_properties: Dict, org_id: str):
@@ -37,19 +52,13 @@ class OrganizationService:
             SET org = $props
             RETURN org.entityID as entityID, org.name as name, org.des as description
             """
-        return dao.run_write_query(query, {"props":organization_properties, "id_org": org_id}).data()
+        result = dao.run_write_query(query, {"props":organization_properties, "id_org": org_id}).data()
+        news_result_cache.invalidate_entities([org_id])
+        return result
 
     @staticmethod
     def is_in_news(org_id) -> bool:
-        query = """
-        MATCH (fact:Fact)-[]->(:Organization{entityID: $id_entity})
-        RETURN count(fact) as numAppearance
-        """
-        result = dao.run_read_query(query, id_entity=org_id).data()
-        if result[0]["numAppearance"] == 0:
-            return False
-        else:
-            return True
+        return appearance_counter_repair.is_in_news(org_id, "Organization")
 
     @staticmethod
     def delete(org_id):
@@ -57,15 +66,18 @@ class OrganizationService:
         MATCH (org: Organization{entityID: $id_entity})
         DELETE org
         """
-        return dao.run_write_query(query, id_entity=org_id).data()
+        result = dao.run_write_query(query, id_entity=org_id).data()
+        entity_label_registry.forget([org_id])
+        news_result_cache.invalidate_entities([org_id])
+        return result
 
     @staticmethod
     def search(start=0, limit=100, *args, **kwargs):
-        text_search = args[0]
-        query = "CALL db.index.fulltext.queryNodes(" + "'organizationsFullTextSearch', '" + text_search + \
-                "') YIELD node, score  RETURN node.entityID as entityID, node.name as name," \
-                "node.des as description, score ORDER BY score DESC"
-        return dao.run_read_query(query).data()[start:start+limit]
+        return search_fulltext('organizationsFullTextSearch', args[0], start, limit, kwargs.get("cursor"))
+
+    @staticmethod
+    def count_search(*args) -> Dict:
+        return count_fulltext('organizationsFullTextSearch', args[0])
 
     @staticmethod
     def merge_nodes(set_entity_id: List[str]) -> Dict:
@@ -79,7 +91,12 @@ class OrganizationService:
                 YIELD node 
                 RETURN node.entityID as entityID, node.name as name, node.des as description
                 """
-        return dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        result = dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        entity_label_registry.forget(set_entity_id)
+        news_result_cache.invalidate_entities(set_entity_id)
+        for merged in result:
+            appearance_counter_repair.repair_entity(merged["entityID"], "Organization")
+        return result
 
 
 
@@ -14,6 +14,7 @@ entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 persons_pagin_parser = reqparse.RequestParser()
 persons_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 persons_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+persons_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
 @api.route("/")
 class PersonsCollection(Resource):
     @api.doc(responses={200: 'OK'}, parser= persons_pagin_parser)
@@ -107,7 +108,8 @@ class SearchPersonResource(Resource):
             text_search = request.json["text"]
         else:
             text_search = ' '
-        return paginate_results(persons_pagin_parser, request.base_url, PersonService.search, text_search)
+        return paginate_results(persons_pagin_parser, request.base_url, PersonService.search, text_search,
+                                count=PersonService.count_search)
 
 @api.route("/merge_nodes")
 class MergeNodesResource(Resource):
@@ -1,10 +1,23 @@
 from application import dao
 from typing import List, Dict
 from application.utilities.graph import serialize_node_to_dict
+from application.utilities.fulltext import search_fulltext, count_fulltext
+from application.utilities.entity_labels import entity_label_registry
+from application.utilities.news_cache import news_result_cache
+from application.utilities.appearance_counters import appearance_counter_repair
 
 class PersonService:
     @staticmethod
-    def get_all(start=0, limit=100) -> List:
+    def get_all(start=0, limit=100, cursor=None) -> List:
+        if cursor is not None:
+            query = """
+            MATCH (per:Person)
+            WHERE per.entityID > $after
+            RETURN per.entityID as entityID, per.name as name, per.des as description
+            ORDER BY per.entityID
+            LIMIT $limit
+            """
+            return dao.run_read_query(query, after=cursor.get("entityID", ""), limit=limit).data()
         query = """
         MATCH (per:Person)
         RETURN per.entityID as entityID, per.name as name, per.des as description
@@ -28,7 +41,9 @@ class PersonService:
         CREATE (per:Person $props)
         RETURN per.entityID as entityID, per.name as name, per.des as description
         """
-        return dao.run_write_query(query, props= person_properties).data()
+        result = dao.run_write_query(query, props= person_properties).data()
+        entity_label_registry.forget([person_properties["entityID"]])
+        return result
 
     @staticmethod
     def update(person_properties: Dict, per_id: str):
@@ -37,19 +52,13 @@ class PersonService:
             SET per = $props
             RETURN per.entityID as entityID, per.name as name, per.des as description
             """
-        return dao.run_write_query(query, {"props":person_properties, "id_per": per_id}).data()
+        result = dao.run_write_query(query, {"props":person_properties, "id_per": per_id}).data()
+        news_result_cache.invalidate_entities([per_id])
+        return result
 
     @staticmethod
     def is_in_news(per_id) -> bool:
-        query = """
-        MATCH (fact:Fact)-[]->(:Person{entityID: $id_entity})
-        RETURN count(fact) as numAppearance
-        """
-        result = dao.run_read_query(query, id_entity=per_id).data()
-        if result[0]["numAppearance"] == 0:
-            return False
-        else:
-            return True
+        return appearance_counter_repair.is_in_news(per_id, "Person")
 
     @staticmethod
     def delete(per_id):
@@ -57,15 +66,18 @@ class PersonService:
         MATCH (per: Person{entityID: $id_entity})
         DELETE per
         """
-        return dao.run_write_query(query, id_entity=per_id).data()
+        result = dao.run_write_query(query, id_entity=per_id).data()
+        entity_label_registry.forget([per_id])
+        news_result_cache.invalidate_entities([per_id])
+        return result
 
     @staticmethod
     def search(start=0, limit=100, *args, **kwargs):
-        text_search = args[0]
-        query = "CALL db.index.fulltext.queryNodes(" + "'personsFullTextSearch', '" + text_search + \
-                "') YIELD node, score  RETURN node.entityID as entityID, node.name as name," \
-                "node.des as description, score ORDER BY score DESC"
-        return dao.run_read_query(query).data()[start:start+limit]
+        return search_fulltext('personsFullTextSearch', args[0], start, limit, kwargs.get("cursor"))
+
+    @staticmethod
+    def count_search(*args) -> Dict:
+        return count_fulltext('personsFullTextSearch', args[0])
 
     @staticmethod
     def merge_nodes(set_entity_id: List[str]) -> Dict:
@@ -79,7 +91,12 @@ class PersonService:
                 YIELD node 
                 RETURN node.entityID as entityID, node.name as name, node.des as description
                 """
-        return dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        result = dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        entity_label_registry.forget(set_entity_id)
+        news_result_cache.invalidate_entities(set_entity_id)
+        for merged in result:
+            appearance_counter_repair.repair_entity(merged["entityID"], "Person")
+        return result
 
 
 
@@ -1,5 +1,6 @@
 def register_routes(api, app, root="api"):
     from application.news import register_routes as attach_news
+    from application.news_sets import register_routes as attach_news_sets
     from application.agreements import register_routes as attach_agreements
     from application.countries import register_routes as attach_countries
     from application.events import register_routes as attach_events
@@ -9,12 +10,14 @@ def register_routes(api, app, root="api"):
     from application.times import register_routes as attach_times
 
     from application.auth import register_routes as attach_auth
+    from application.admin import register_routes as attach_admin
 
 
 
 
     # Add routes
     attach_news(api, app)
+    attach_news_sets(api, app)
     attach_agreements(api, app)
     attach_countries(api, app)
     attach_events(api, app)
@@ -23,4 +26,5 @@ def register_routes(api, app, root="api"):
     attach_persons(api, app)
     attach_times(api, app)
     attach_auth(api, app)
+    attach_admin(api, app)
 
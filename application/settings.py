@@ -6,6 +6,8 @@ DEBUG = env.bool('DEBUG', default=False)
 BIND_HOST = env('BIND_HOST', default='0.0.0.0')
 BIND_PORT = env.int('BIND_PORT', default=8888)
 
+STORAGE_BACKEND = env('STORAGE_BACKEND', default='neo4j')
+
 NEO4J_HOST = env('NEO4J_HOST', default='127.0.0.1')
 NEO4J_PORT = env.int('NEO4J_PORT', default=7687)
 
@@ -16,4 +18,38 @@ NEO4J_SCHEME = env('NEO4J_SCHEME', default='bolt+routing')
 SECRET_KEY = env("SECRET_KEY", "I'm Ron Burgundy?")
 START_PAGIN = env.int('START_PAGIN', default=0)
 LIMIT_PAGIN = env.int('LIMIT_PAGIN', default=1000)
-LIMIT_NEWS =  env.int('LIMIT_NEWS', default=1000)
\ No newline at end of file
+LIMIT_NEWS =  env.int('LIMIT_NEWS', default=1000)
+SET_NEWS_MAX_IDS = env.int('SET_NEWS_MAX_IDS', default=10 * LIMIT_NEWS)
+SEARCH_MAX_HITS = env.int('SEARCH_MAX_HITS', default=10000)
+NEO4J_MAX_CONNECTION_POOL_SIZE = env.int('NEO4J_MAX_CONNECTION_POOL_SIZE', default=100)
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = env.float('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', default=60)
+NEO4J_MAX_CONNECTION_LIFETIME = env.int('NEO4J_MAX_CONNECTION_LIFETIME', default=3600)
+QUERY_STATS_MAX_TEXTS = env.int('QUERY_STATS_MAX_TEXTS', default=10000)
+# per process: an account deleted through another worker is accepted here until its entry expires
+PRINCIPAL_CACHE_TTL = env.float('PRINCIPAL_CACHE_TTL', default=60)
+PRINCIPAL_CACHE_SIZE = env.int('PRINCIPAL_CACHE_SIZE', default=10000)
+SCHEMA_MIGRATE_ON_STARTUP = env.bool('SCHEMA_MIGRATE_ON_STARTUP', default=True)
+ENTITY_LABEL_CACHE_SIZE = env.int('ENTITY_LABEL_CACHE_SIZE', default=100000)
+INGEST_BATCH_MAX_ITEMS = env.int('INGEST_BATCH_MAX_ITEMS', default=10000)
+COMPRESSION_ENABLED = env.bool('COMPRESSION_ENABLED', default=True)
+COMPRESSION_ALGORITHMS = env.list('COMPRESSION_ALGORITHMS', default=['zstd', 'br', 'gzip'])
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+COMPRESSION_MIMETYPES = env.list('COMPRESSION_MIMETYPES', default=['application/json', 'application/x-ndjson',
+                                                                     'application/msgpack', 'text/html'])
+COMPRESSION_GZIP_LEVEL = env.int('COMPRESSION_GZIP_LEVEL', default=6)
+COMPRESSION_BROTLI_LEVEL = env.int('COMPRESSION_BROTLI_LEVEL', default=4)
+COMPRESSION_ZSTD_LEVEL = env.int('COMPRESSION_ZSTD_LEVEL', default=3)
+NEWS_CACHE_SIZE = env.int('NEWS_CACHE_SIZE', default=10000)
+NEWS_CACHE_TTL = env.float('NEWS_CACHE_TTL', default=300)
+APPEARANCE_REPAIR_BATCH_SIZE = env.int('APPEARANCE_REPAIR_BATCH_SIZE', default=500)
+APPEARANCE_REPAIR_ON_STARTUP = env.bool('APPEARANCE_REPAIR_ON_STARTUP', default=True)
+# the number of queries the coroutines of an ASGI worker run at once
+ASYNC_QUERY_THREADS = env.int('ASYNC_QUERY_THREADS', default=NEO4J_MAX_CONNECTION_POOL_SIZE)
+ASGI_WSGI_THREADS = env.int('ASGI_WSGI_THREADS', default=32)
+FAN_OUT_THREADS = env.int('FAN_OUT_THREADS', default=8)
+FAN_OUT_CHUNK_SIZE = env.int('FAN_OUT_CHUNK_SIZE', default=100)
+FAN_OUT_CHUNK_TIMEOUT = env.float('FAN_OUT_CHUNK_TIMEOUT', default=30)
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+SLOW_QUERY_THRESHOLD_MS = env.float('SLOW_QUERY_THRESHOLD_MS', default=500)
+SLOW_QUERY_LOG_SIZE = env.int('SLOW_QUERY_LOG_SIZE', default=100)
+SLOW_QUERY_PROFILE = env.bool('SLOW_QUERY_PROFILE', default=False)
@@ -16,6 +16,7 @@ entity_type_news = api.model("Entity_Type_News", entity_with_type_model)
 times_pagin_parser = reqparse.RequestParser()
 times_pagin_parser.add_argument('start', location='args', type=int, help='The position to start getting results')
 times_pagin_parser.add_argument('limit', location='args', type=int, help='Limit the number of news returned')
+times_pagin_parser.add_argument('cursor', location='args', type=str, help='Opaque position returned in the next link')
 @api.route("/")
 class TimesCollection(Resource):
     @api.doc(response={200: 'OK'}, parser=times_pagin_parser)
@@ -1,5 +1,8 @@
 from application import dao
 from typing import List, Dict
+from application.utilities.entity_labels import entity_label_registry
+from application.utilities.news_cache import news_result_cache
+from application.utilities.appearance_counters import appearance_counter_repair
 
 def convert_date_results_to_string(result: List)->List:
     converted_result = []
@@ -17,7 +20,17 @@ def convert_date_results_to_string(result: List)->List:
 
 class TimeService:
     @staticmethod
-    def get_all(start=0, limit=100) -> List:
+    def get_all(start=0, limit=100, cursor=None) -> List:
+        if cursor is not None:
+            query = """
+            MATCH (tim:Time)
+            WHERE tim.entityID > $after
+            RETURN tim.entityID as entityID, tim.name as name, tim.des as description
+            ORDER BY tim.entityID
+            LIMIT $limit
+            """
+            result = dao.run_read_query(query, after=cursor.get("entityID", ""), limit=limit).data()
+            return convert_date_results_to_string(result)
         query = """
         MATCH (tim:Time)
         RETURN tim.entityID as entityID, tim.name as name, tim.des as description
@@ -44,6 +57,7 @@ class TimeService:
         RETURN tim.entityID as entityID, tim.name as name, tim.des as description
         """
         result = dao.run_write_query(query, props= time_properties).data()
+        entity_label_registry.forget([time_properties["entityID"]])
         return convert_date_results_to_string(result)
 
     @staticmethod
@@ -54,19 +68,12 @@ class TimeService:
             RETURN tim.entityID as entityID, tim.name as name, tim.des as description
             """
         result =  dao.run_write_query(query, {"props":time_properties, "id_tim": tim_id}).data()
+        news_result_cache.invalidate_entities([tim_id])
         return convert_date_results_to_string(result)
 
     @staticmethod
     def is_in_news(tim_id) -> bool:
-        query = """
-        MATCH (fact:Fact)-[]->(:Time{entityID: $id_entity})
-        RETURN count(fact) as numAppearance
-        """
-        result = dao.run_read_query(query, id_entity=tim_id).data()
-        if result[0]["numAppearance"] == 0:
-            return False
-        else:
-            return True
+        return appearance_counter_repair.is_in_news(tim_id, "Time")
 
     @staticmethod
     def delete(tim_id):
@@ -74,11 +81,25 @@ class TimeService:
         MATCH (tim: Time{entityID: $id_entity})
         DELETE tim
         """
-        return dao.run_write_query(query, id_entity=tim_id).data()
+        result = dao.run_write_query(query, id_entity=tim_id).data()
+        entity_label_registry.forget([tim_id])
+        news_result_cache.invalidate_entities([tim_id])
+        return result
 
     @staticmethod
     def search(start=0, limit=100, *args, **kwargs):
-
+        cursor = kwargs.get("cursor")
+        if cursor is not None:
+            query = """
+                MATCH(entity:Time)
+                WHERE (entity.des CONTAINS $property OR entity.name CONTAINS $property) AND entity.entityID > $after
+                RETURN entity.entityID as entityID, entity.name as name, entity.des as description
+                ORDER BY entity.entityID
+                LIMIT $limit
+                """
+            result = dao.run_read_query(query, {"property": args[0], "after": cursor.get("entityID", ""),
+                                                "limit": limit}).data()
+            return convert_date_results_to_string(result)
         query = """
             MATCH(entity:Time)
             WHERE entity.des CONTAINS $property OR entity.name CONTAINS $property
@@ -103,6 +124,10 @@ class TimeService:
                 RETURN node.entityID as entityID, node.name as name, node.des as description
                 """
         result = dao.run_write_query(query, {"entity_id_set": list(set(set_entity_id))}).data()
+        entity_label_registry.forget(set_entity_id)
+        news_result_cache.invalidate_entities(set_entity_id)
+        for merged in result:
+            appearance_counter_repair.repair_entity(merged["entityID"], "Time")
         return convert_date_results_to_string(result)
 
 
@@ -0,0 +1,199 @@
+"""
+Appearance counters. Every news holds one MENTIONS relationship to each entity its facts refer to,
+whose facts property counts the references of these facts to the entity: the number of appearances
+of the entity in the news. The MENTIONS degree of an entity, which the database keeps in the node
+itself, is the number of news it appears in.
+
+Creating and deleting a fact update the counters of its news in the same transaction; merging entities
+recounts the merged one. The repair job recounts every news, batch by batch, for the databases written
+by other means (older versions of the application, bulk loads, manual edits). The first repair to
+complete marks the counters complete in the AppearanceCounters node; until then, whether an entity is
+in a news is answered from the facts referring to it.
+"""
+import time
+from threading import Lock, Thread
+from typing import Dict, List
+
+from application import dao
+from application.settings import APPEARANCE_REPAIR_BATCH_SIZE
+from application.utilities.entity_labels import entity_label_queries
+
+# the counters of the news of $ids, recounted from their facts
+REPAIR_NEWS_QUERY = """
+        UNWIND $ids as id
+        MATCH (news:News{entityID: id})
+        USING INDEX news:News(entityID)
+        OPTIONAL MATCH (news)-[stale:MENTIONS]->()
+        DELETE stale
+        WITH DISTINCT news
+        MATCH (news)-[:HAS_FACT]->(:Fact)-[]->(entity)
+        WITH news, entity, count(*) as references
+        MERGE (news)-[mention:MENTIONS]->(entity)
+        SET mention.facts = references
+        """
+
+# the counters of an entity in every news, recounted from the facts referring to it
+REPAIR_ENTITY_QUERIES = entity_label_queries("""
+        MATCH (entity:%(label)s{entityID: $id_entity})
+        OPTIONAL MATCH (entity)<-[stale:MENTIONS]-()
+        DELETE stale
+        WITH DISTINCT entity
+        MATCH (entity)<-[]-(:Fact)<-[:HAS_FACT]-(news:News)
+        WITH news, entity, count(*) as references
+        MERGE (news)-[mention:MENTIONS]->(entity)
+        SET mention.facts = references
+        """)
+
+# whether a news mentions the entity, from its MENTIONS degree once the counters are complete
+MENTIONED_QUERIES = entity_label_queries("""
+        MATCH (entity:%(label)s{entityID: $id_entity})
+        RETURN size((entity)<-[:MENTIONS]-()) as numAppearance
+        """)
+
+# whether a fact refers to the entity, for the databases whose counters have not been repaired yet
+REFERENCED_QUERIES = entity_label_queries("""
+        MATCH (fact:Fact)-[]->(:%(label)s{entityID: $id_entity})
+        RETURN count(fact) as numAppearance
+        """)
+
+COMPLETE_QUERY = """
+        MATCH (counters:AppearanceCounters)
+        RETURN counters.complete as complete
+        """
+
+MARK_COMPLETE_QUERY = """
+        MERGE (counters:AppearanceCounters)
+        SET counters.complete = $complete
+        RETURN counters.complete as complete
+        """
+
+NEWS_PAGE_QUERY = """
+        MATCH (news:News)
+        WHERE news.entityID > $after
+        RETURN news.entityID as entityID
+        ORDER BY news.entityID
+        LIMIT $limit
+        """
+
+
+class AppearanceCounterRepair:
+    """
+    Recount the appearance counters of every news, batch_size news per transaction, in the order of
+    their entityIDs. A repair runs in a background thread; the writes made meanwhile keep the counters
+    of the news they touch up to date, so the application can serve requests as usual. Once a repair
+    has completed, the writes keep every counter up to date and the counters are marked complete for
+    good.
+    """
+    def __init__(self, dao, batch_size: int = 500):
+        self._dao = dao
+        self._batch_size = batch_size
+        self._lock = Lock()
+        self._thread = None
+        self._state = "idle"
+        self._repaired_news = 0
+        self._seconds = None
+        self._error = None
+        self._complete = False
+
+    def counters_complete(self) -> bool:
+        """Whether a repair has completed on the database, remembered once it has"""
+        if not self._complete:
+            result = self._dao.run_read_query(COMPLETE_QUERY).data()
+            self._complete = bool(result and result[0]["complete"])
+        return self._complete
+
+    def is_in_news(self, entity_id: str, label: str) -> bool:
+        """
+        Whether any news refers to the entity, read from the counters once they are complete and from
+        the facts before
+        """
+        queries = MENTIONED_QUERIES if self.counters_complete() else REFERENCED_QUERIES
+        result = self._dao.run_read_query(queries[label], id_entity=entity_id).data()
+        return bool(result and result[0]["numAppearance"])
+
+    def repair_news(self, news_ids: List[str]):
+        self._dao.run_write_query(REPAIR_NEWS_QUERY, ids=list(news_ids))
+
+    def repair_entity(self, entity_id: str, label: str):
+        self._dao.run_write_query(REPAIR_ENTITY_QUERIES[label], id_entity=entity_id)
+
+    def repair(self) -> Dict:
+        """
+        Recount the counters of every news
+        :return: dict with the status of the repair
+        """
+        with self._lock:
+            self._state = "running"
+            self._repaired_news = 0
+            self._seconds = None
+            self._error = None
+        started = time.perf_counter()
+        after = ""
+        error = None
+        try:
+            while True:
+                news_ids = self._dao.run_read_query(NEWS_PAGE_QUERY, after=after,
+                                                    limit=self._batch_size).value("entityID")
+                if not news_ids:
+                    break
+                self.repair_news(news_ids)
+                after = news_ids[-1]
+                with self._lock:
+                    self._repaired_news += len(news_ids)
+            self._dao.run_write_query(MARK_COMPLETE_QUERY, complete=True)
+            self._complete = True
+        except Exception as exception:
+            error = str(exception)
+        with self._lock:
+            self._error = error
+            self._state = "failed" if error else "done"
+            self._seconds = round(time.perf_counter() - started, 3)
+        return self.status()
+
+    def repair_in_background(self, incomplete_only: bool = False) -> bool:
+        """
+        Start repairing in a daemon thread unless a repair is already running
+        :param incomplete_only: repair only if no repair has completed on the database yet
+        :return: whether a repair was started
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._state = "running"
+            self._thread = Thread(target=self._repair_incomplete if incomplete_only else self.repair,
+                                  name="appearance-repair", daemon=True)
+            self._thread.start()
+        return True
+
+    def _repair_incomplete(self):
+        try:
+            complete = self.counters_complete()
+        except Exception:
+            # the repair reports the error if the database cannot be reached
+            complete = False
+        if not complete:
+            self.repair()
+            return
+        with self._lock:
+            self._state = "idle"
+
+    def wait(self, timeout: float = None):
+        """Wait for the repair running in the background, if any, to end"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "repairedNews": self._repaired_news,
+                "batchSize": self._batch_size,
+                "seconds": self._seconds,
+                "error": self._error,
+                "countersComplete": self._complete,
+            }
+
+
+appearance_counter_repair = AppearanceCounterRepair(dao, batch_size=APPEARANCE_REPAIR_BATCH_SIZE)
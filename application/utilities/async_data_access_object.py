@@ -0,0 +1,113 @@
+"""
+Asynchronous counterpart of data_access_object, used by the ASGI entry point (application/asgi.py).
+Queries keep the semantics of DataAccessObject: each runs in its own read or write transaction,
+retried by the driver on transient errors, and its result is buffered before the session is released.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Dict
+
+from .data_access_object import QueryResult, QueryTextCounter, StorageBackend
+from .metrics import QueryMetrics, calling_method
+from .slow_queries import SlowQueryLog
+
+
+class AsyncStorageBackend:
+    name = "abstract"
+
+    async def run_read_query(self, query, params=None, **kwparams) -> QueryResult:
+        raise NotImplementedError
+
+    async def run_write_query(self, query, params=None, **kwparams) -> QueryResult:
+        raise NotImplementedError
+
+    def pool_status(self) -> Dict:
+        return {"backend": self.name}
+
+    async def close(self):
+        pass
+
+
+class ThreadedBackend(AsyncStorageBackend):
+    """
+    Run the queries of a synchronous backend on a bounded pool of threads. A request awaiting a query
+    holds a thread only while the database works on it, and at most max_workers queries run at once,
+    the others waiting in the event loop without holding anything. max_workers is therefore the number
+    of queries a worker runs concurrently, whatever the number of coroutines awaiting them; more needs
+    a driver with an asyncio API (neo4j 5 and later).
+    """
+    def __init__(self, backend: StorageBackend, max_workers: int = 100):
+        self._backend = backend
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-query")
+
+    @property
+    def name(self) -> str:
+        return self._backend.name
+
+    async def run_read_query(self, query, params=None, **kwparams):
+        return await self._run(self._backend.run_read_query, query, params, **kwparams)
+
+    async def run_write_query(self, query, params=None, **kwparams):
+        return await self._run(self._backend.run_write_query, query, params, **kwparams)
+
+    def pool_status(self):
+        return dict(self._backend.pool_status(), queryThreads=self._max_workers)
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, function, query, params, **kwparams):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, query, params, **kwparams))
+
+
+class AsyncDataAccessObject:
+    """
+    DataAccessObject for coroutines. It shares the query text statistics and the query metrics of the
+    synchronous one, so that /admin/queries and /metrics cover both entry points.
+    """
+    def __init__(self, backend: AsyncStorageBackend, query_counter: QueryTextCounter = None,
+                 query_metrics: QueryMetrics = None, slow_query_log: SlowQueryLog = None):
+        self._backend = backend
+        self._query_counter = query_counter if query_counter is not None else QueryTextCounter()
+        self._query_metrics = query_metrics if query_metrics is not None else QueryMetrics()
+        self._slow_query_log = slow_query_log
+
+    @property
+    def backend(self) -> AsyncStorageBackend:
+        return self._backend
+
+    async def close(self):
+        await self._backend.close()
+
+    # the calling method is named when the coroutine is created: once scheduled by asyncio.gather, it
+    # runs from the event loop, off the stack of its caller
+    def run_read_query(self, query, params=None, **kwparams) -> Awaitable[QueryResult]:
+        self._query_counter.record(query)
+        return self._run(self._backend.run_read_query, "read", calling_method(), query, params, **kwparams)
+
+    def run_write_query(self, query, params=None, **kwparams) -> Awaitable[QueryResult]:
+        self._query_counter.record(query)
+        return self._run(self._backend.run_write_query, "write", calling_method(), query, params, **kwparams)
+
+    async def _run(self, function, kind, method, query, params, **kwparams) -> QueryResult:
+        started = time.perf_counter()
+        try:
+            result = await function(query, params, **kwparams)
+        except Exception as error:
+            self._observe(method, kind, query, params, kwparams, time.perf_counter() - started, 0, error)
+            raise
+        self._observe(method, kind, query, params, kwparams, time.perf_counter() - started, len(result))
+        return result
+
+    def _observe(self, method, kind, query, params, kwparams, seconds, rows, error=None):
+        self._query_metrics.observe(method, kind, seconds, rows, error is not None)
+        if self._slow_query_log is not None:
+            self._slow_query_log.observe(method, kind, query, dict(params or {}, **kwparams), seconds, rows,
+                                         str(error) if error is not None else None)
+
+    def pool_status(self) -> Dict:
+        return self._backend.pool_status()
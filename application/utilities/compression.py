@@ -0,0 +1,215 @@
+"""
+Compression of the responses negotiated with Accept-Encoding: gzip always, br and zstd when the
+brotli and zstandard packages are installed.
+"""
+import gzip
+import time
+import zlib
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, request
+from werkzeug.datastructures import Accept
+
+from application.settings import COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSION_ALGORITHMS, \
+    COMPRESSION_MIMETYPES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_LEVEL, COMPRESSION_ZSTD_LEVEL
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+class _Codec:
+    """Compress a whole body, or a stream chunk by chunk, with one algorithm at one level"""
+    def __init__(self, level: int):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def stream(self) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """
+        Start compressing a stream
+        :return: the function compressing a chunk, flushed so that the client can decode it at once,
+            and the function ending the stream
+        """
+        raise NotImplementedError
+
+
+class _Gzip(_Codec):
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level)
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class _Brotli(_Codec):
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=self.level)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+
+
+class _Zstd(_Codec):
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+                compressor.flush)
+
+
+class CompressionStatistics:
+    """
+    Per algorithm: the responses compressed, the bytes before and after compression and the CPU
+    seconds spent compressing, measured on the thread doing it
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._algorithms = {}
+        self._skipped = 0
+
+    def record(self, algorithm: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            counts = self._algorithms.setdefault(algorithm, {"responses": 0, "bytesIn": 0, "bytesOut": 0,
+                                                             "cpuSeconds": 0.0})
+            counts["responses"] += 1
+            counts["bytesIn"] += bytes_in
+            counts["bytesOut"] += bytes_out
+            counts["cpuSeconds"] += cpu_seconds
+
+    def skip(self):
+        with self._lock:
+            self._skipped += 1
+
+    def reset(self):
+        with self._lock:
+            self._algorithms = {}
+            self._skipped = 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            algorithms = {name: dict(counts) for name, counts in self._algorithms.items()}
+            skipped = self._skipped
+        for counts in algorithms.values():
+            counts["ratio"] = round(counts["bytesIn"] / counts["bytesOut"], 3) if counts["bytesOut"] else None
+            counts["cpuSeconds"] = round(counts["cpuSeconds"], 6)
+        return {"algorithms": algorithms, "uncompressedResponses": skipped}
+
+
+class ResponseCompressor:
+    """
+    Compress the responses of an application in the encoding the client prefers among the available
+    ones, ties going to the order of algorithms. Buffered bodies smaller than min_size are sent as is;
+    streamed bodies, whose size is unknown, are always compressed, min_size bytes at a time.
+    """
+    def __init__(self, algorithms: List[str], levels: Dict[str, int], min_size: int = 1024,
+                 mimetypes: List[str] = None, enabled: bool = True):
+        codecs = {"gzip": _Gzip}
+        if brotli is not None:
+            codecs["br"] = _Brotli
+        if zstandard is not None:
+            codecs["zstd"] = _Zstd
+        self.codecs = {name: codecs[name](levels[name]) for name in algorithms if name in codecs}
+        self.min_size = min_size
+        self.mimetypes = set(mimetypes or [])
+        self.enabled = enabled
+        self.statistics = CompressionStatistics()
+
+    def init_app(self, app: Flask):
+        if self.enabled and self.codecs:
+            app.after_request(self.compress_response)
+
+    def negotiate(self, accepted: Accept = None) -> Optional[str]:
+        """
+        The encoding to use for the current request, or for the Accept-Encoding values given, None for identity
+        :return: string or None
+        """
+        if accepted is None:
+            accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for name in self.codecs:
+            quality = accepted[name]
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def compress_response(self, response: Response) -> Response:
+        if response.status_code < 200 or response.status_code in (204, 304) or \
+                "Content-Encoding" in response.headers or response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add("Accept-Encoding")
+        algorithm = self.negotiate()
+        if algorithm is None:
+            self.statistics.skip()
+            return response
+        codec = self.codecs[algorithm]
+        if response.is_streamed:
+            response.response = self._stream(algorithm, codec, response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                self.statistics.skip()
+                return response
+            response.set_data(self.compress(algorithm, data))
+        response.headers["Content-Encoding"] = algorithm
+        return response
+
+    def compress(self, algorithm: str, data: bytes) -> bytes:
+        """Compress a buffered body with a negotiated algorithm, recording the statistics"""
+        started = time.thread_time()
+        compressed = self.codecs[algorithm].compress(data)
+        self.statistics.record(algorithm, len(data), len(compressed), time.thread_time() - started)
+        return compressed
+
+    def _stream(self, algorithm: str, codec: _Codec, chunks: Iterable) -> Iterator[bytes]:
+        # Chunks are gathered up to min_size before being compressed and flushed: flushing every
+        # line of an NDJSON stream would cost most of the ratio. Only the compression is timed, not
+        # the production of the chunks, and the statistics are recorded however the stream ends.
+        compress, finish = codec.stream()
+        pending = []
+        pending_size = bytes_in = bytes_out = 0
+        cpu_seconds = 0.0
+        try:
+            for chunk in chunks:
+                chunk = chunk.encode("utf8") if isinstance(chunk, str) else chunk
+                pending.append(chunk)
+                pending_size += len(chunk)
+                if pending_size < self.min_size:
+                    continue
+                started = time.thread_time()
+                compressed = compress(b"".join(pending))
+                cpu_seconds += time.thread_time() - started
+                bytes_in += pending_size
+                bytes_out += len(compressed)
+                pending, pending_size = [], 0
+                yield compressed
+            started = time.thread_time()
+            compressed = compress(b"".join(pending)) + finish()
+            cpu_seconds += time.thread_time() - started
+            bytes_in += pending_size
+            bytes_out += len(compressed)
+            yield compressed
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            self.statistics.record(algorithm, bytes_in, bytes_out, cpu_seconds)
+
+
+response_compressor = ResponseCompressor(
+    COMPRESSION_ALGORITHMS,
+    {"gzip": COMPRESSION_GZIP_LEVEL, "br": COMPRESSION_BROTLI_LEVEL, "zstd": COMPRESSION_ZSTD_LEVEL},
+    min_size=COMPRESSION_MIN_SIZE, mimetypes=COMPRESSION_MIMETYPES, enabled=COMPRESSION_ENABLED)
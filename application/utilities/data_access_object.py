@@ -1,22 +1,317 @@
-from neo4j import GraphDatabase
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, Optional
+from neo4j import GraphDatabase, READ_ACCESS, Record
 
+from .metrics import QueryMetrics, calling_method
+from .slow_queries import SlowQueryLog
 
-class DataAccessObject:
-    def __init__(self, host, port, user, password, scheme):
+
+class QueryResult:
+    """
+    Fully buffered result of a query. The records (and the graph hydrated from them)
+    are fetched inside the transaction, so the session can go back to the pool
+    before the caller starts reading.
+    """
+    def __init__(self, keys, records, graph):
+        self._keys = keys
+        self._records = records
+        self._graph = graph
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def keys(self):
+        return self._keys
+
+    def records(self):
+        return list(self._records)
+
+    def data(self, *items):
+        return [record.data(*items) for record in self._records]
+
+    def value(self, item=0, default=None):
+        return [record.value(item, default) for record in self._records]
+
+    def single(self):
+        if not self._records:
+            return None
+        return self._records[0]
+
+    def graph(self):
+        return self._graph
+
+
+class StorageBackend:
+    """
+    Interface of the engines able to execute the queries issued by the services
+    """
+    name = None
+
+    def run_read_query(self, query, params=None, **kwparams) -> QueryResult:
+        raise NotImplementedError
+
+    def run_write_query(self, query, params=None, **kwparams) -> QueryResult:
+        raise NotImplementedError
+
+    def stream_read_query(self, query, params=None, **kwparams) -> Iterator[Record]:
+        """
+        Iterate over the records of a read query as they arrive. Backends unable to stream
+        buffer the result first.
+        """
+        return iter(self.run_read_query(query, params, **kwparams))
+
+    def profile_query(self, query, params=None, execute=True) -> Optional[Dict]:
+        """
+        Run a query under PROFILE, or plan it under EXPLAIN without running it
+        :return: the plan as a dict, with the total of its database hits, None if the backend cannot profile
+        """
+        return None
+
+    def pool_status(self) -> Dict:
+        return {"backend": self.name}
+
+    def close(self):
+        pass
+
+
+def _plan_to_dict(plan) -> Dict:
+    document = {"operator": plan.operator_type, "identifiers": list(plan.identifiers),
+                "arguments": {key: value for key, value in dict(plan.arguments).items()
+                              if key != "string-representation"},
+                "children": [_plan_to_dict(child) for child in plan.children]}
+    if hasattr(plan, "db_hits"):
+        document["dbHits"] = plan.db_hits
+        document["rows"] = plan.rows
+    return document
+
+
+def _total_db_hits(plan: Dict) -> int:
+    return plan.get("dbHits", 0) + sum(_total_db_hits(child) for child in plan["children"])
+
+
+class Neo4jBackend(StorageBackend):
+    name = "neo4j"
+
+    def __init__(self, host, port, user, password, scheme, max_connection_pool_size=100,
+                 connection_acquisition_timeout=60, max_connection_lifetime=3600):
         uri = scheme + "://" + host + ":" + str(port)
-        self._driver = GraphDatabase.driver(uri, auth=(user, password), encrypted=False)
+        self._max_connection_pool_size = max_connection_pool_size
+        self._driver = GraphDatabase.driver(uri, auth=(user, password), encrypted=False,
+                                            max_connection_pool_size=max_connection_pool_size,
+                                            connection_acquisition_timeout=connection_acquisition_timeout,
+                                            max_connection_lifetime=max_connection_lifetime)
+        self._lock = Lock()
+        self._active_sessions = 0
+        self._peak_active_sessions = 0
 
     def close(self):
         self._driver.close()
 
     def run_read_query(self, query, params=None, **kwparams):
-        result = self._driver.session().read_transaction(self.run_unit_of_work, query, params, **kwparams)
-        return result
+        with self._session() as session:
+            return session.read_transaction(self.run_unit_of_work, query, params, **kwparams)
 
     def run_write_query(self, query, params=None, **kwparams):
-        result = self._driver.session().write_transaction(self.run_unit_of_work, query, params, **kwparams)
-        return result
+        with self._session() as session:
+            return session.write_transaction(self.run_unit_of_work, query, params, **kwparams)
+
+    def stream_read_query(self, query, params=None, **kwparams):
+        # The records are read while the caller iterates, so the session stays out of the pool
+        # until the generator is exhausted or closed. Nothing is retried: the caller may already
+        # have sent the records received before a failure. The callers build the nodes and
+        # relationships from the values of each record; the driver still keeps those it hydrated in
+        # the graph of the result until the transaction ends, which is why the reads over a set of
+        # news are streamed one transaction per batch of news.
+        with self._session(access_mode=READ_ACCESS) as session:
+            with session.begin_transaction() as tx:
+                for record in tx.run(query, params, **kwparams):
+                    yield record
 
     @staticmethod
     def run_unit_of_work(tx, query, params, **kwparams):
-        return tx.run(query, params, **kwparams)
\ No newline at end of file
+        result = tx.run(query, params, **kwparams)
+        records = list(result)
+        return QueryResult(result.keys(), records, result.graph())
+
+    def profile_query(self, query, params=None, execute=True):
+        # EXPLAIN does not run the query, but a write is planned in a write transaction all the same
+        with self._session() as session:
+            if execute:
+                return session.read_transaction(self.profile_unit_of_work, "PROFILE " + query, params)
+            return session.write_transaction(self.profile_unit_of_work, "EXPLAIN " + query, params)
+
+    @staticmethod
+    def profile_unit_of_work(tx, query, params):
+        result = tx.run(query, params)
+        summary = result.consume()
+        plan = _plan_to_dict(summary.profile or summary.plan)
+        if summary.profile:
+            plan["totalDbHits"] = _total_db_hits(plan)
+        return plan
+
+    def pool_status(self):
+        pool = self._driver._pool
+        addresses = {}
+        if pool is not None:
+            with pool.lock:
+                for address, connections in pool.connections.items():
+                    in_use = sum(1 for connection in connections if connection.in_use)
+                    addresses[str(address)] = {"inUse": in_use, "idle": len(connections) - in_use}
+        with self._lock:
+            active_sessions = self._active_sessions
+            peak_active_sessions = self._peak_active_sessions
+        return {
+            "backend": self.name,
+            "maxConnectionPoolSize": self._max_connection_pool_size,
+            "activeSessions": active_sessions,
+            "peakActiveSessions": peak_active_sessions,
+            "connections": addresses,
+        }
+
+    @contextmanager
+    def _session(self, **config):
+        session = self._driver.session(**config)
+        with self._lock:
+            self._active_sessions += 1
+            self._peak_active_sessions = max(self._peak_active_sessions, self._active_sessions)
+        try:
+            yield session
+        finally:
+            session.close()
+            with self._lock:
+                self._active_sessions -= 1
+
+
+class QueryTextCounter:
+    """
+    Count the executions of every distinct query text sent to the backend. The database caches
+    plans by query text, so the number of distinct texts tells whether that cache can be hit.
+    Only the first max_texts distinct texts are kept; the executions of any other text are
+    counted as untracked, so queries built from user input cannot grow the counter without bound.
+    """
+    def __init__(self, max_texts=10000):
+        self._max_texts = max_texts
+        self._lock = Lock()
+        self._counts = {}
+        self._untracked = 0
+
+    def record(self, query: str):
+        with self._lock:
+            if query in self._counts:
+                self._counts[query] += 1
+            elif len(self._counts) < self._max_texts:
+                self._counts[query] = 1
+            else:
+                self._untracked += 1
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+            self._untracked = 0
+
+    def snapshot(self, top=20) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+            untracked = self._untracked
+        most_frequent = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:top]
+        return {
+            "distinctQueryTexts": len(counts),
+            "executions": sum(counts.values()) + untracked,
+            "untrackedExecutions": untracked,
+            "mostFrequent": [{"query": " ".join(query.split()), "executions": executions}
+                             for query, executions in most_frequent],
+        }
+
+
+class DataAccessObject:
+    def __init__(self, backend: StorageBackend, query_counter: QueryTextCounter = None,
+                 query_metrics: QueryMetrics = None, slow_query_log: SlowQueryLog = None):
+        self._backend = backend
+        self._query_counter = query_counter if query_counter is not None else QueryTextCounter()
+        self._query_metrics = query_metrics if query_metrics is not None else QueryMetrics()
+        self._slow_query_log = slow_query_log
+
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend
+
+    @property
+    def query_counter(self) -> QueryTextCounter:
+        return self._query_counter
+
+    @property
+    def query_metrics(self) -> QueryMetrics:
+        return self._query_metrics
+
+    @property
+    def slow_query_log(self) -> Optional[SlowQueryLog]:
+        return self._slow_query_log
+
+    def close(self):
+        self._backend.close()
+
+    def run_read_query(self, query, params=None, **kwparams) -> QueryResult:
+        self._query_counter.record(query)
+        return self._run(self._backend.run_read_query, "read", query, params, **kwparams)
+
+    def run_write_query(self, query, params=None, **kwparams) -> QueryResult:
+        self._query_counter.record(query)
+        return self._run(self._backend.run_write_query, "write", query, params, **kwparams)
+
+    def stream_read_query(self, query, params=None, **kwparams) -> Iterator[Record]:
+        self._query_counter.record(query)
+        return self._stream(calling_method(), query, params, **kwparams)
+
+    def _run(self, function, kind, query, params, **kwparams) -> QueryResult:
+        method = calling_method(3)
+        started = time.perf_counter()
+        try:
+            result = function(query, params, **kwparams)
+        except Exception as error:
+            self._observe(method, kind, query, params, kwparams, time.perf_counter() - started, 0, error)
+            raise
+        self._observe(method, kind, query, params, kwparams, time.perf_counter() - started, len(result))
+        return result
+
+    def _stream(self, method, query, params, **kwparams) -> Iterator[Record]:
+        # observed once the records are consumed, or the consumer stops
+        started = time.perf_counter()
+        rows = 0
+        failure = None
+        try:
+            for record in self._backend.stream_read_query(query, params, **kwparams):
+                rows += 1
+                yield record
+        except Exception as error:
+            failure = error
+            raise
+        finally:
+            self._observe(method, "stream", query, params, kwparams, time.perf_counter() - started, rows, failure)
+
+    def _observe(self, method, kind, query, params, kwparams, seconds, rows, error=None):
+        self._query_metrics.observe(method, kind, seconds, rows, error is not None)
+        if self._slow_query_log is not None:
+            self._slow_query_log.observe(method, kind, query, dict(params or {}, **kwparams), seconds, rows,
+                                         str(error) if error is not None else None)
+
+    def pool_status(self) -> Dict:
+        """
+        Report the utilisation of the backend connection pool
+        :return: dict
+        """
+        return self._backend.pool_status()
+
+    def query_statistics(self) -> Dict:
+        """
+        Report how many distinct query texts have been sent and the most frequent ones
+        :return: dict
+        """
+        return self._query_counter.snapshot()
+
+    def reset_query_statistics(self):
+        self._query_counter.reset()
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from application import dao, async_dao
+from application.news.model import ENTITY_TYPES
+from application.settings import ENTITY_LABEL_CACHE_SIZE
+
+
+def entity_label_queries(template: str) -> Dict[str, str]:
+    """
+    Build one query per entity label from a template whose %(label)s placeholder labels the entity,
+    so that the entity is matched through the entityID constraint of its label
+    :return: dict label -> query
+    """
+    return {label: template % {"label": label} for label in ENTITY_TYPES}
+
+
+RESOLVE_LABELS_QUERY = " UNION ".join(
+    "MATCH (entity:%s{entityID: $id_entity}) RETURN '%s' as label" % (label, label) for label in ENTITY_TYPES)
+
+
+class EntityLabelRegistry:
+    """
+    Map entityIDs to the labels of the entities carrying them. Unknown ids are resolved with one
+    index lookup per label and the answer is kept, least recently used first out beyond max_size.
+    Ids matching no entity are not remembered. The ids of entities created, deleted or merged
+    must be forgotten, since each of these changes the labels carrying an id.
+    """
+    def __init__(self, max_size=100000):
+        self._max_size = max_size
+        self._lock = Lock()
+        self._labels = OrderedDict()
+
+    def resolve(self, entity_id: str) -> Tuple[str, ...]:
+        labels = self.cached(entity_id)
+        if labels is not None:
+            return labels
+        labels = tuple(sorted(dao.run_read_query(RESOLVE_LABELS_QUERY, id_entity=entity_id).value("label")))
+        self.remember(entity_id, labels)
+        return labels
+
+    def cached(self, entity_id: str) -> Optional[Tuple[str, ...]]:
+        """
+        The labels known for an id, None if they must be resolved
+        """
+        with self._lock:
+            labels = self._labels.get(entity_id)
+            if labels is not None:
+                self._labels.move_to_end(entity_id)
+            return labels
+
+    def remember(self, entity_id: str, labels: Tuple[str, ...]):
+        if labels:
+            with self._lock:
+                self._labels[entity_id] = labels
+                while len(self._labels) > self._max_size:
+                    self._labels.popitem(last=False)
+
+    def forget(self, entity_ids: List[str]):
+        with self._lock:
+            for entity_id in entity_ids:
+                self._labels.pop(entity_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._labels.clear()
+
+
+entity_label_registry = EntityLabelRegistry(max_size=ENTITY_LABEL_CACHE_SIZE)
+
+
+def entity_labels(entity_id: str, entity_type: str = None) -> Tuple[str, ...]:
+    """
+    Labels to match the entity with: the type given by the client if any, else the registered ones
+    :return: tuple of labels
+    """
+    if entity_type:
+        return (entity_type,)
+    return entity_label_registry.resolve(entity_id)
+
+
+async def async_entity_labels(entity_id: str, entity_type: str = None) -> Tuple[str, ...]:
+    """
+    entity_labels for coroutines, resolving the unknown ids through the asynchronous DAO
+    :return: tuple of labels
+    """
+    if entity_type:
+        return (entity_type,)
+    labels = entity_label_registry.cached(entity_id)
+    if labels is None:
+        result = await async_dao.run_read_query(RESOLVE_LABELS_QUERY, id_entity=entity_id)
+        labels = tuple(sorted(result.value("label")))
+        entity_label_registry.remember(entity_id, labels)
+    return labels
@@ -0,0 +1,169 @@
+"""
+Reads over a set of news split into chunks run concurrently, each in its own read session, so that
+the database spreads a large set over several threads instead of one UNWIND transaction.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from threading import Lock
+from typing import Awaitable, Callable, Dict, List, Sequence
+
+from werkzeug.exceptions import GatewayTimeout
+
+from application.settings import FAN_OUT_THREADS, FAN_OUT_CHUNK_SIZE, FAN_OUT_CHUNK_TIMEOUT
+
+
+def batches(items: Sequence, size: int) -> List[List]:
+    """Split items into lists of at most size items, in order"""
+    return [list(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+class FanOutStatistics:
+    """
+    The fan-outs run and, per chunk, the latency from the start of its query to its result, with the
+    percentiles of the last window chunks
+    """
+    def __init__(self, window: int = 1000):
+        self._lock = Lock()
+        self._window = window
+        self.reset()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._chunks += 1
+            self._seconds += seconds
+            self._max_seconds = max(self._max_seconds, seconds)
+            self._latencies.append(seconds)
+
+    def fan_out(self, chunks: int):
+        with self._lock:
+            self._fan_outs += 1
+            self._max_chunks = max(self._max_chunks, chunks)
+
+    def timeout(self):
+        with self._lock:
+            self._timeouts += 1
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+
+    def reset(self):
+        with self._lock:
+            self._fan_outs = 0
+            self._max_chunks = 0
+            self._chunks = 0
+            self._timeouts = 0
+            self._failures = 0
+            self._seconds = 0.0
+            self._max_seconds = 0.0
+            self._latencies = deque(maxlen=self._window)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot = {
+                "fanOuts": self._fan_outs,
+                "maxChunks": self._max_chunks,
+                "chunks": self._chunks,
+                "timeouts": self._timeouts,
+                "failures": self._failures,
+                "meanMs": round(1000 * self._seconds / self._chunks, 3) if self._chunks else None,
+                "maxMs": round(1000 * self._max_seconds, 3),
+            }
+        for name, quantile in (("p50Ms", 0.5), ("p95Ms", 0.95), ("p99Ms", 0.99)):
+            snapshot[name] = round(1000 * latencies[min(len(latencies) - 1, int(quantile * len(latencies)))], 3) \
+                if latencies else None
+        return snapshot
+
+
+class QueryFanOut:
+    """
+    Run a read over the chunks of chunk_size items of a set, at most max_workers chunks at once.
+    A chunk whose read lasts more than chunk_timeout seconds fails the whole call with 504 Gateway
+    Timeout; the chunks not started yet are cancelled. A set of a single chunk is read on the calling
+    thread.
+    """
+    def __init__(self, max_workers: int = 8, chunk_size: int = 100, chunk_timeout: float = 30):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.chunk_timeout = chunk_timeout
+        self.statistics = FanOutStatistics()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fan-out")
+
+    def chunks(self, items: Sequence) -> List[List]:
+        return batches(items, self.chunk_size)
+
+    def map(self, read: Callable[[List], object], items: Sequence) -> List:
+        """
+        Read every chunk of items
+        :param read: function reading the items of a chunk
+        :return: list of the results of the chunks, in the order of the items
+        """
+        chunks = self.chunks(items)
+        self.statistics.fan_out(len(chunks))
+        if len(chunks) == 1:
+            return [self._read(read, chunks[0], 0, {})]
+        # the start of the read of each chunk, once a thread picked it
+        started = {}
+        futures = [self._executor.submit(self._read, read, chunk, index, started)
+                   for index, chunk in enumerate(chunks)]
+        indexes = {future: index for index, future in enumerate(futures)}
+        pending = set(futures)
+        try:
+            while pending:
+                running = [started[indexes[future]] for future in pending if indexes[future] in started]
+                timeout = max(0.0, min(running) + self.chunk_timeout - time.perf_counter()) if running else 0.05
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                if any(time.perf_counter() - started[indexes[future]] > self.chunk_timeout
+                       for future in pending if indexes[future] in started):
+                    self.statistics.timeout()
+                    raise GatewayTimeout("A chunk of %d news took more than %g seconds to read"
+                                         % (self.chunk_size, self.chunk_timeout))
+        finally:
+            for future in pending:
+                future.cancel()
+        return [future.result() for future in futures]
+
+    async def map_async(self, read: Callable[[List], Awaitable], items: Sequence) -> List:
+        """
+        map for reads returning awaitables, run in the event loop, at most max_workers chunks at once.
+        As in map, the timeout of a chunk starts with its read, not while it waits for its turn.
+        """
+        chunks = self.chunks(items)
+        self.statistics.fan_out(len(chunks))
+        slots = asyncio.Semaphore(self.max_workers)
+
+        async def read_chunk(chunk):
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(read(chunk), self.chunk_timeout)
+                except asyncio.TimeoutError:
+                    self.statistics.timeout()
+                    raise GatewayTimeout("A chunk of %d news took more than %g seconds to read"
+                                         % (self.chunk_size, self.chunk_timeout))
+                except Exception:
+                    self.statistics.failure()
+                    raise
+            self.statistics.record(time.perf_counter() - started)
+            return result
+
+        return list(await asyncio.gather(*(read_chunk(chunk) for chunk in chunks)))
+
+    def _read(self, read, chunk, index, started):
+        started[index] = start = time.perf_counter()
+        try:
+            result = read(chunk)
+        except Exception:
+            self.statistics.failure()
+            raise
+        self.statistics.record(time.perf_counter() - start)
+        return result
+
+
+query_fan_out = QueryFanOut(max_workers=FAN_OUT_THREADS, chunk_size=FAN_OUT_CHUNK_SIZE,
+                            chunk_timeout=FAN_OUT_CHUNK_TIMEOUT)
@@ -0,0 +1,36 @@
+from typing import Dict, List
+from application import dao
+from application.settings import SEARCH_MAX_HITS
+
+
+def search_fulltext(index_name: str, text_search: str, start: int, limit: int, cursor: Dict = None) -> List:
+    """
+    Page through the hits of a fulltext index inside the database. At most SEARCH_MAX_HITS hits
+    (in the score order of the index) are considered, so a single request never sorts more than that.
+    :return: list
+    """
+    if cursor and "score" in cursor:
+        query = "CALL db.index.fulltext.queryNodes('" + index_name + "', $text) YIELD node, score " \
+                "WITH node, score LIMIT $max_hits " \
+                "WHERE score < $score OR (score = $score AND node.entityID > $after) " \
+                "RETURN node.entityID as entityID, node.name as name, node.des as description, score " \
+                "ORDER BY score DESC, node.entityID LIMIT $limit"
+        return dao.run_read_query(query, text=text_search, max_hits=SEARCH_MAX_HITS, score=cursor["score"],
+                                  after=cursor["entityID"], limit=limit).data()
+    query = "CALL db.index.fulltext.queryNodes('" + index_name + "', $text) YIELD node, score " \
+            "WITH node, score LIMIT $max_hits " \
+            "RETURN node.entityID as entityID, node.name as name, node.des as description, score " \
+            "ORDER BY score DESC, node.entityID SKIP $start LIMIT $limit"
+    return dao.run_read_query(query, text=text_search, max_hits=SEARCH_MAX_HITS, start=start, limit=limit).data()
+
+
+def count_fulltext(index_name: str, text_search: str) -> Dict:
+    """
+    Count the hits of a fulltext index, stopping at SEARCH_MAX_HITS
+    :return: dict with the count and whether it is exact
+    """
+    query = "CALL db.index.fulltext.queryNodes('" + index_name + "', $text) YIELD node " \
+            "WITH node LIMIT $max_hits " \
+            "RETURN count(node) as total"
+    total = dao.run_read_query(query, text=text_search, max_hits=SEARCH_MAX_HITS).single()["total"]
+    return {"total": total, "totalExact": total < SEARCH_MAX_HITS}
@@ -1,59 +1,349 @@
+import datetime
+import json
+from tempfile import SpooledTemporaryFile
 from neo4j import Relationship, Node
-from typing import Dict
-from itertools import chain
+from neo4j.types.graph import Graph
+from neo4j.types.temporal import Date, DateTime, Duration, Time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from application.utilities.json_converter import converter
 
-def serialize_node_to_dict(node: Node) -> Dict:
 
-    result_node = {}
+# exact types: a type lookup per property value is cheaper than isinstance against each of them
+TEMPORAL_TYPES = frozenset([Date, DateTime, Duration, Time, datetime.date, datetime.datetime, datetime.time,
+                            datetime.timedelta])
+
+# encoded nodes of a JSON stream kept in memory up to this size, spooled to a temporary file beyond it
+NODE_SPOOL_SIZE = 1 << 20
+NODE_CHUNK_SIZE = 1 << 16
+
 
-    if isinstance(node, Node):
-        result_node["id"] = str(node["entityID"])
-        result_node["labels"] = list(chain(node.labels))
-        result_node["properties"] = dict(node)
-        result_node["properties"].pop("entityID", None)
+def _serialize_properties(node: Node) -> Dict:
+    """
+    Copy the properties of an entity but its entityID, temporal values (alone or in lists) as strings.
+    The description of a Time is written as a string, or a list of strings, whatever its type
+    """
+    result = {}
+    for key, value in node.items():
+        value_type = value.__class__
+        if value_type in TEMPORAL_TYPES:
+            value = str(value)
+        elif value_type is list:
+            value = [str(item) if item.__class__ in TEMPORAL_TYPES else item for item in value]
+        result[key] = value
+    result.pop("entityID", None)
+    if "des" in result and "Time" in node.labels:
+        description = result["des"]
+        result["des"] = list(map(str, description)) if description.__class__ is list else str(description)
+    return result
 
-        if "Time" in result_node["labels"]:
-            if not isinstance(result_node["properties"]["des"], list):
-                result_node["properties"]["des"] = result_node["properties"]["des"].__str__()
-            else:
-                for index in range(0, len(result_node["properties"]["des"])):
-                    result_node["properties"]["des"][index] = result_node["properties"]["des"][index].__str__()
-    return result_node
+
+def serialize_node_to_dict(node: Node) -> Dict:
+    if not isinstance(node, Node):
+        return {}
+    return {
+        "id": str(node["entityID"]),
+        "labels": list(node.labels),
+        "properties": _serialize_properties(node),
+    }
 
 
 def serialize_relation_to_dict(relation: Relationship) -> Dict:
-    result_relation = {}
-    if isinstance(relation, Relationship):
-        result_relation["id"] = str(relation.id)
-        result_relation["type"] = relation.type
-        result_relation["startNode"] = str(relation.start_node["entityID"])
-        result_relation["endNode"] = str(relation.end_node["entityID"])
-        result_relation["properties"] = dict(relation)
-    return result_relation
-
-
-def serialize_subgraph_to_dict(graph) -> Dict :
-    graph_format_result = {
+    if not isinstance(relation, Relationship):
+        return {}
+    return {
+        "id": str(relation.id),
+        "type": relation.type,
+        "startNode": str(relation.start_node["entityID"]),
+        "endNode": str(relation.end_node["entityID"]),
+        "properties": dict(relation.items()),
+    }
+
+
+def _browser_document(nodes: List[Dict], relationships: List[Dict]) -> Dict:
+    return {
         "results": [{
             "columns": [],
             "data": [{
                 "graph": {
-                    "nodes": [],
-                    "relationships": [],
+                    "nodes": nodes,
+                    "relationships": relationships,
                 },
             }],
         }],
         "errors": []
     }
 
-    for node in graph.nodes:
-        dict_node = serialize_node_to_dict(node)
-        graph_format_result["results"][0]["data"][0]["graph"]["nodes"].append(dict_node)
-    for relation in graph.relationships:
-        dict_relation = serialize_relation_to_dict(relation)
-        graph_format_result["results"][0]["data"][0]["graph"]["relationships"].append(dict_relation)
 
-    return graph_format_result
+class SubgraphSerializer:
+    """
+    Serialize the nodes and relationships of one response, each once however many records or graphs
+    hold it. Nodes are known by their internal id, so the entityID of the ends of a relationship is
+    read from the nodes already serialized.
+    """
+    def __init__(self):
+        self.nodes = []
+        self.relationships = []
+        self._entity_ids = {}
+        self._relation_ids = set()
+
+    def add_node(self, node: Node) -> Optional[Dict]:
+        """
+        Serialize a node not seen yet
+        :return: the serialized node, or None if already serialized
+        """
+        if node.id in self._entity_ids:
+            return None
+        serialized = serialize_node_to_dict(node)
+        self._entity_ids[node.id] = serialized["id"]
+        self.nodes.append(serialized)
+        return serialized
+
+    def add_relationship(self, relation: Relationship) -> Optional[Dict]:
+        """
+        Serialize a relationship not seen yet
+        :return: the serialized relationship, or None if already serialized
+        """
+        if relation.id in self._relation_ids:
+            return None
+        self._relation_ids.add(relation.id)
+        serialized = self._serialize_relationship(relation)
+        self.relationships.append(serialized)
+        return serialized
+
+    def add_graph(self, graph: Graph) -> "SubgraphSerializer":
+        # the hot loop of the relation endpoints: bound methods and dicts are looked up once
+        entity_ids = self._entity_ids
+        append_node = self.nodes.append
+        for node in graph.nodes:
+            if node.id not in entity_ids:
+                serialized = serialize_node_to_dict(node)
+                entity_ids[node.id] = serialized["id"]
+                append_node(serialized)
+        relation_ids = self._relation_ids
+        append_relationship = self.relationships.append
+        serialize_relationship = self._serialize_relationship
+        for relation in graph.relationships:
+            if relation.id not in relation_ids:
+                relation_ids.add(relation.id)
+                append_relationship(serialize_relationship(relation))
+        return self
+
+    def result(self) -> Dict:
+        return _browser_document(self.nodes, self.relationships)
+
+    def _serialize_relationship(self, relation: Relationship) -> Dict:
+        entity_ids = self._entity_ids
+        start_node = relation.start_node
+        end_node = relation.end_node
+        return {
+            "id": str(relation.id),
+            "type": relation.type,
+            "startNode": entity_ids.get(start_node.id) or str(start_node["entityID"]),
+            "endNode": entity_ids.get(end_node.id) or str(end_node["entityID"]),
+            "properties": dict(relation.items()),
+        }
+
+
+class CompactSubgraphSerializer:
+    """
+    Serialize graphs, each node and relationship once, into a columnar document: labels and relationship
+    types are listed once and referred to by position, nodes are parallel arrays of entityIDs, label
+    positions and properties, and relationships parallel arrays of ids and of the positions of their
+    start node, end node and type. Relationships rarely have properties, which are kept by position.
+        {"format": "compact", "labels": [...], "types": [...],
+         "nodes": {"id": [...], "labels": [[...], ...], "properties": [{...}, ...]},
+         "relationships": {"id": [...], "start": [...], "end": [...], "type": [...], "properties": {"3": {...}}},
+         "errors": []}
+    """
+    def __init__(self):
+        self._labels = {}
+        self._types = {}
+        self._node_positions = {}
+        self._relation_ids = set()
+        self.node_ids = []
+        self.node_labels = []
+        self.node_properties = []
+        self.relation_ids = []
+        self.starts = []
+        self.ends = []
+        self.types = []
+        self.relation_properties = {}
+
+    def add_graph(self, graph: Graph) -> "CompactSubgraphSerializer":
+        for node in graph.nodes:
+            self._node_position(node)
+        relation_ids = self._relation_ids
+        node_position = self._node_position
+        types = self._types
+        for relation in graph.relationships:
+            if relation.id in relation_ids:
+                continue
+            relation_ids.add(relation.id)
+            if len(relation):
+                self.relation_properties[str(len(self.relation_ids))] = dict(relation.items())
+            self.relation_ids.append(str(relation.id))
+            self.starts.append(node_position(relation.start_node))
+            self.ends.append(node_position(relation.end_node))
+            self.types.append(types.setdefault(relation.type, len(types)))
+        return self
+
+    def result(self) -> Dict:
+        return {
+            "format": "compact",
+            "labels": list(self._labels),
+            "types": list(self._types),
+            "nodes": {"id": self.node_ids, "labels": self.node_labels, "properties": self.node_properties},
+            "relationships": {"id": self.relation_ids, "start": self.starts, "end": self.ends, "type": self.types,
+                              "properties": self.relation_properties},
+            "errors": []
+        }
+
+    def _node_position(self, node: Node) -> int:
+        position = self._node_positions.get(node.id)
+        if position is None:
+            position = self._node_positions[node.id] = len(self.node_ids)
+            labels = self._labels
+            self.node_ids.append(str(node["entityID"]))
+            self.node_labels.append([labels.setdefault(label, len(labels)) for label in node.labels])
+            self.node_properties.append(_serialize_properties(node))
+        return position
+
+
+def _serializer(compact: bool):
+    return CompactSubgraphSerializer() if compact else SubgraphSerializer()
+
+
+def serialize_subgraph_to_dict(graph, compact: bool = False) -> Dict:
+    """
+    Serialize a graph as the Neo4j browser does, or in the compact columnar format if compact
+    """
+    return _serializer(compact).add_graph(graph).result()
+
+
+def serialize_subgraphs_to_dict(graphs, compact: bool = False) -> Dict:
+    """
+    Serialize the union of several graphs, each node and relationship once
+    """
+    serializer = _serializer(compact)
+    for graph in graphs:
+        serializer.add_graph(graph)
+    return serializer.result()
+
+
+def merge_subgraph_documents(documents: Iterable[Dict], compact: bool = False) -> Dict:
+    """
+    Merge documents built by serialize_subgraph_to_dict in the Neo4j browser format, each node
+    (known by its entityID) and relationship once, into one document in the format asked for.
+    The serialized elements are shared with the documents merged, not copied.
+    """
+    nodes = {}
+    relationships = {}
+    for document in documents:
+        graph = document["results"][0]["data"][0]["graph"]
+        for node in graph["nodes"]:
+            nodes.setdefault(node["id"], node)
+        for relation in graph["relationships"]:
+            relationships.setdefault(relation["id"], relation)
+    if not compact:
+        return _browser_document(list(nodes.values()), list(relationships.values()))
+    labels = {}
+    types = {}
+    positions = {node_id: position for position, node_id in enumerate(nodes)}
+    node_labels = [[labels.setdefault(label, len(labels)) for label in node["labels"]] for node in nodes.values()]
+    relations = list(relationships.values())
+    relation_types = [types.setdefault(relation["type"], len(types)) for relation in relations]
+    return {
+        "format": "compact",
+        "labels": list(labels),
+        "types": list(types),
+        "nodes": {"id": list(nodes), "labels": node_labels,
+                  "properties": [node["properties"] for node in nodes.values()]},
+        "relationships": {"id": [relation["id"] for relation in relations],
+                          "start": [positions[relation["startNode"]] for relation in relations],
+                          "end": [positions[relation["endNode"]] for relation in relations],
+                          "type": relation_types,
+                          "properties": {str(position): relation["properties"]
+                                         for position, relation in enumerate(relations) if relation["properties"]}},
+        "errors": []
+    }
+
+
+def graph_entity_ids(document: Dict) -> List[str]:
+    """
+    entityIDs of the nodes of a document built by serialize_subgraph_to_dict, in either format
+    :return: list of strings
+    """
+    if document.get("format") == "compact":
+        return document["nodes"]["id"]
+    return [node["id"] for node in document["results"][0]["data"][0]["graph"]["nodes"]]
+
+
+def iter_subgraph_records(records: Iterable) -> Iterator[Tuple[str, Dict]]:
+    """
+    Serialize the nodes and relationships found in a stream of records, each once, the nodes of a
+    record before its relationships. Serialized elements are not kept, only their ids.
+    :return: iterator of ("node" | "relationship", serialized element)
+    """
+    node_ids = set()
+    relation_ids = set()
+    for record in records:
+        relations = []
+        for value in record.values():
+            if isinstance(value, Node):
+                if value.id not in node_ids:
+                    node_ids.add(value.id)
+                    yield "node", serialize_node_to_dict(value)
+            elif isinstance(value, Relationship):
+                relations.append(value)
+        for relation in relations:
+            if relation.id not in relation_ids:
+                relation_ids.add(relation.id)
+                yield "relationship", serialize_relation_to_dict(relation)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=converter, separators=(",", ":"))
+
+
+def stream_subgraph_json(records: Iterable) -> Iterator[str]:
+    """
+    Encode a stream of records as the document serialize_subgraph_to_dict would build, chunk by chunk.
+    The relationships are written as they arrive and the nodes, already encoded, after them: past
+    NODE_SPOOL_SIZE characters the encoded nodes go to a temporary file, so that the memory used stays
+    bounded whatever the size of the graph. A failure once the document is started is reported in its
+    errors.
+    :return: iterator of JSON text chunks
+    """
+    yield '{"results":[{"columns":[],"data":[{"graph":{"relationships":['
+    errors = []
+    with SpooledTemporaryFile(max_size=NODE_SPOOL_SIZE, mode="w+", encoding="utf-8") as nodes:
+        separator = node_separator = ""
+        try:
+            for kind, element in iter_subgraph_records(records):
+                if kind == "node":
+                    nodes.write(node_separator + _dumps(element))
+                    node_separator = ","
+                else:
+                    yield separator + _dumps(element)
+                    separator = ","
+        except Exception as error:
+            errors.append({"message": str(error)})
+        yield '],"nodes":['
+        nodes.seek(0)
+        for chunk in iter(lambda: nodes.read(NODE_CHUNK_SIZE), ""):
+            yield chunk
+    yield ']}}]}],"errors":' + _dumps(errors) + '}'
 
 
+def stream_subgraph_ndjson(records: Iterable) -> Iterator[str]:
+    """
+    Encode a stream of records as newline delimited JSON, one {"node": ...} or {"relationship": ...}
+    object per line. A failure once the stream is started ends it with an {"error": ...} line.
+    :return: iterator of lines
+    """
+    try:
+        for kind, element in iter_subgraph_records(records):
+            yield _dumps({kind: element}) + "\n"
+    except Exception as error:
+        yield _dumps({"error": {"message": str(error)}}) + "\n"
@@ -1,5 +1,7 @@
 import datetime
 
+from neo4j.types.temporal import Date, DateTime, Duration, Time
+
 
 def datetime_converter(date: datetime) -> str:
     return date.__str__()
@@ -8,4 +10,6 @@ def datetime_converter(date: datetime) -> str:
 def converter(obj):
     if isinstance(obj, datetime.datetime):
         return datetime_converter(obj)
-
+    # dates and times read from Neo4j, or built by the services, are written as their ISO text too
+    if isinstance(obj, (datetime.date, datetime.time, datetime.timedelta, Date, DateTime, Duration, Time)):
+        return obj.__str__()
@@ -2,6 +2,9 @@ import jwt
 from application.settings import SECRET_KEY
 import datetime
 
+# validity of the tokens issued
+TOKEN_LIFETIME = datetime.timedelta(days=1000, seconds=5)
+
 def encode_auth_token(username, isAdmin):
     """
     Generates the Auth Token
@@ -9,7 +12,7 @@ def encode_auth_token(username, isAdmin):
     """
 
     try:
-        payload = {'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1000, seconds=5),
+        payload = {'exp': datetime.datetime.utcnow() + TOKEN_LIFETIME,
                    'iat': datetime.datetime.utcnow(),
                    'username': username,
                    'isAdmin': isAdmin
@@ -27,7 +30,7 @@ def decode_auth_token(auth_token):
     """
     try:
         payload = jwt.decode(auth_token, SECRET_KEY)
-        return {"username": payload["username"], "isAdmin": payload["isAdmin"]}
+        return {"username": payload["username"], "isAdmin": payload["isAdmin"], "issuedAt": payload.get("iat")}
     except jwt.ExpiredSignatureError:
         return 'Signature expired. Please log in again.'
     except jwt.InvalidTokenError:
@@ -0,0 +1,749 @@
+import re
+from itertools import count
+from threading import RLock
+from typing import Dict, List, Optional
+
+from neo4j import CypherError, Record
+from neo4j.types.graph import Graph
+
+from .data_access_object import QueryResult, StorageBackend
+
+INDEXED_PROPERTIES = ("entityID", "username")
+DISPATCH_CACHE_SIZE = 1024
+
+_NODE = r"\((?P<{0}var>\w*)(?::(?P<{0}label>\w+))?(?P<{0}props>\{{[^}}]*\}})?\)"
+_PROJECTION_ITEM = re.compile(r"^(\w+)\.(\w+) as (\w+)$")
+_PROPERTY_ITEM = re.compile(r"^(\w+):\$(\w+)$")
+
+
+def _node_pattern(prefix=""):
+    return _NODE.format(prefix)
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def _copy_properties(properties: Dict) -> Dict:
+    return {key: _copy_value(value) for key, value in properties.items()}
+
+
+def _parse_properties(text: Optional[str], params: Dict) -> Dict:
+    """
+    Resolve an inline property map such as {entityID:$id,name:$name} against the parameters
+    """
+    if not text:
+        return {}
+    properties = {}
+    for item in text.strip("{}").split(","):
+        match = _PROPERTY_ITEM.match(item.strip())
+        if not match:
+            raise _unsupported("property map " + text)
+        properties[match.group(1)] = params.get(match.group(2))
+    return properties
+
+
+def _unsupported(query: str) -> CypherError:
+    return CypherError.hydrate(message="Statement not supported by the memory backend: " + query,
+                               code="Neo.ClientError.Statement.SyntaxError")
+
+
+def _combine(values: List):
+    combined = []
+    for value in values:
+        for item in (value if isinstance(value, list) else [value]):
+            if item not in combined:
+                combined.append(item)
+    if len(combined) == 1:
+        return combined[0]
+    return combined
+
+
+class _StoredNode:
+    __slots__ = ("id", "labels", "properties", "outgoing", "incoming")
+
+    def __init__(self, node_id, labels, properties):
+        self.id = node_id
+        self.labels = set(labels)
+        self.properties = properties
+        self.outgoing = {}
+        self.incoming = {}
+
+
+class _StoredRelationship:
+    __slots__ = ("id", "type", "start", "end", "properties")
+
+    def __init__(self, rel_id, rel_type, start, end, properties):
+        self.id = rel_id
+        self.type = rel_type
+        self.start = start
+        self.end = end
+        self.properties = properties
+
+
+class MemoryGraph:
+    """
+    In-process property graph keeping a label index, an index on the identifying
+    properties of every label and the adjacency lists of every node.
+    """
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = {}
+        self._labels = {}
+        self._indexes = {}
+        self._node_ids = count()
+        self._rel_ids = count()
+
+    def create_node(self, labels, properties: Dict) -> _StoredNode:
+        node = _StoredNode(next(self._node_ids), labels, _copy_properties(properties))
+        self.nodes[node.id] = node
+        for label in node.labels:
+            self._labels.setdefault(label, {})[node.id] = node
+        self._index(node)
+        return node
+
+    def set_properties(self, node: _StoredNode, properties: Dict):
+        self._unindex(node)
+        node.properties = _copy_properties(properties)
+        self._index(node)
+
+    def add_labels(self, node: _StoredNode, labels):
+        self._unindex(node)
+        node.labels.update(labels)
+        for label in node.labels:
+            self._labels.setdefault(label, {})[node.id] = node
+        self._index(node)
+
+    def delete_node(self, node: _StoredNode, detach=False):
+        if not detach and (node.outgoing or node.incoming):
+            raise CypherError.hydrate(message="Cannot delete node<%d>, because it still has relationships. "
+                                              "To delete this node, you must first delete its relationships."
+                                              % node.id,
+                                      code="Neo.ClientError.Schema.ConstraintValidationFailed")
+        for rel in list(node.outgoing.values()) + list(node.incoming.values()):
+            self.delete_relationship(rel)
+        self._unindex(node)
+        for label in node.labels:
+            self._labels[label].pop(node.id, None)
+        del self.nodes[node.id]
+
+    def create_relationship(self, start: _StoredNode, rel_type: str, end: _StoredNode,
+                            properties: Dict = None) -> _StoredRelationship:
+        rel = _StoredRelationship(next(self._rel_ids), rel_type, start, end, dict(properties or {}))
+        self.relationships[rel.id] = rel
+        start.outgoing[rel.id] = rel
+        end.incoming[rel.id] = rel
+        return rel
+
+    def delete_relationship(self, rel: _StoredRelationship):
+        rel.start.outgoing.pop(rel.id, None)
+        rel.end.incoming.pop(rel.id, None)
+        self.relationships.pop(rel.id, None)
+
+    def nodes_by_label(self, label: Optional[str]) -> List[_StoredNode]:
+        if label is None:
+            return list(self.nodes.values())
+        return list(self._labels.get(label, {}).values())
+
+    def find(self, label: Optional[str], properties: Dict) -> List[_StoredNode]:
+        candidates = None
+        for key in INDEXED_PROPERTIES:
+            if key in properties:
+                candidates = self._lookup(label, key, properties[key])
+                break
+        if candidates is None:
+            candidates = self.nodes_by_label(label)
+        return [node for node in candidates
+                if all(node.properties.get(key) == value for key, value in properties.items())]
+
+    def find_one(self, label: Optional[str], properties: Dict) -> Optional[_StoredNode]:
+        nodes = self.find(label, properties)
+        return nodes[0] if nodes else None
+
+    def _lookup(self, label, key, value) -> List[_StoredNode]:
+        if label is not None:
+            return list(self._indexes.get((label, key), {}).get(value, {}).values())
+        found = {}
+        for (_, indexed_key), index in self._indexes.items():
+            if indexed_key == key:
+                found.update(index.get(value, {}))
+        return list(found.values())
+
+    def _index(self, node: _StoredNode):
+        for key in INDEXED_PROPERTIES:
+            value = node.properties.get(key)
+            if value is None or isinstance(value, list):
+                continue
+            for label in node.labels:
+                self._indexes.setdefault((label, key), {}).setdefault(value, {})[node.id] = node
+
+    def _unindex(self, node: _StoredNode):
+        for key in INDEXED_PROPERTIES:
+            value = node.properties.get(key)
+            if value is None or isinstance(value, list):
+                continue
+            for label in node.labels:
+                self._indexes.get((label, key), {}).get(value, {}).pop(node.id, None)
+
+
+class _ResultBuilder:
+    """
+    Build records and the hydrated graph in the same shape as the Bolt driver does
+    """
+    def __init__(self, keys):
+        self.keys = keys
+        self.records = []
+        self.graph = Graph()
+
+    def node(self, node: _StoredNode):
+        return self.graph.put_node(node.id, node.labels, _copy_properties(node.properties))
+
+    def relationship(self, rel: _StoredRelationship):
+        return self.graph.put_relationship(rel.id, self.node(rel.start), self.node(rel.end), rel.type,
+                                           dict(rel.properties))
+
+    def add(self, *values):
+        self.records.append(Record(zip(self.keys, values)))
+
+    def result(self) -> QueryResult:
+        return QueryResult(tuple(self.keys), self.records, self.graph)
+
+
+def _parse_projection(text: str):
+    projection = []
+    for item in text.split(","):
+        match = _PROJECTION_ITEM.match(item.strip())
+        if not match:
+            raise _unsupported("projection " + text)
+        projection.append(match.groups())
+    return projection
+
+
+def _project(nodes: List[_StoredNode], projection_text: str, extra=None) -> QueryResult:
+    projection = _parse_projection(projection_text)
+    keys = [alias for _, _, alias in projection] + [key for key, _ in (extra or [])]
+    builder = _ResultBuilder(keys)
+    for index, node in enumerate(nodes):
+        values = [_copy_value(node.properties.get(prop)) for _, prop, _ in projection]
+        values += [values_of[index] for _, values_of in (extra or [])]
+        builder.add(*values)
+    return builder.result()
+
+
+def _page(nodes: List[_StoredNode], params: Dict, key="entityID") -> List[_StoredNode]:
+    if "after" in params:
+        nodes = [node for node in nodes if isinstance(node.properties.get(key), str)
+                 and node.properties[key] > params["after"]]
+    nodes = sorted(nodes, key=lambda node: (node.properties.get(key) is None, str(node.properties.get(key))))
+    start = params.get("start", 0)
+    limit = params.get("limit")
+    return nodes[start:start + limit] if limit is not None else nodes[start:]
+
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Stand-in for Neo4j executing, against a :class:`MemoryGraph`, the statements issued by the services.
+    Statements are recognised by their shape once whitespace and planner hints are normalised.
+    """
+    name = "memory"
+
+    def __init__(self, graph: MemoryGraph = None):
+        self.graph = graph or MemoryGraph()
+        self._lock = RLock()
+        n = _node_pattern
+        self._statements = [
+            (r"^CREATE INDEX (?P<name>\w+) FOR\(\w+:(?P<label>\w+)\) ON\(\w+\.(?P<prop>\w+)\)$",
+             self._create_index),
+            (r"^CREATE CONSTRAINT (?P<name>\w+) ON\(\w+:(?P<label>\w+)\) ASSERT \w+\.(?P<prop>\w+) "
+             r"IS (?P<unique>UNIQUE)$", self._create_index),
+            (r"^CALL db\.index\.fulltext\.createNodeIndex\(\"(?P<name>\w+)\",\[\"(?P<label>\w+)\"\],"
+             r"\[(?P<props>[^\]]*)\]\)$", self._create_index),
+            (r"^DROP (?:INDEX|CONSTRAINT) (?P<name>\w+)$", self._drop_index),
+            (r"^CALL db\.indexes\(\)$", self._list_indexes),
+            (r"^MATCH\(node:(?P<label>\w+)\) WHERE node\.(?P<prop>\w+) IS NOT NULL "
+             r"WITH node\.(?P=prop) as value,count\(\*\) as nodes WHERE nodes>1 "
+             r"RETURN value,nodes LIMIT (?P<limit>\d+)$", self._duplicates),
+            (r"^UNWIND \$rows as row CREATE\((?P<var>\w+):(?P<label>\w+)\) SET (?P=var)=row$", self._unwind_create),
+            (r"^UNWIND \$ids as id MATCH\((?P<var>\w+):(?P<label>\w+)\{entityID:id\}\) "
+             r"RETURN (?P=var)\.entityID as (?P<alias>\w+)$", self._unwind_match_ids),
+            (r"^MATCH\(entity:\w+\{entityID:\$id_entity\}\) RETURN '\w+' as label"
+             r"(?: UNION MATCH\(entity:\w+\{entityID:\$id_entity\}\) RETURN '\w+' as label)*$", self._resolve_labels),
+            (r"^MERGE\((?P<var>\w+):(?P<label>\w+)\) SET (?P=var)\.(?P<prop>\w+)=\$(?P<param>\w+) "
+             r"RETURN (?P<ret>.+)$", self._merge_set),
+            (r"^CALL db\.index\.fulltext\.queryNodes\('(?P<index>\w+)FullTextSearch',\$text\) "
+             r"YIELD node,score WITH node,score LIMIT \$max_hits"
+             r"(?: WHERE score<\$score OR\(score=\$score AND node\.entityID>\$after\))? "
+             r"RETURN (?P<ret>.+),score ORDER BY score DESC,node\.entityID(?: SKIP \$start)? LIMIT \$limit$",
+             self._fulltext),
+            (r"^CALL db\.index\.fulltext\.queryNodes\('(?P<index>\w+)FullTextSearch',\$text\) "
+             r"YIELD node WITH node LIMIT \$max_hits RETURN count\(node\) as (?P<alias>\w+)$", self._fulltext_count),
+            (r"^MATCH" + n() + r"(?: WHERE (?P=var)\.entityID>\$after)? RETURN (?P<ret>.+) "
+             r"ORDER BY (?P=var)\.entityID(?: SKIP \$start)? LIMIT \$limit$", self._match_page),
+            (r"^MATCH" + n() + r" WHERE ?\(?(?P=var)\.(?P<prop>\w+) CONTAINS \$property"
+             r"(?: OR (?P=var)\.(?P<prop2>\w+) CONTAINS \$property)?\)?(?: AND (?P=var)\.entityID>\$after)? "
+             r"RETURN (?P<ret>.+) ORDER BY (?P=var)\.entityID(?: SKIP \$start)? LIMIT \$limit$", self._match_contains),
+            (r"^MATCH\(entity\) WHERE any\(label IN labels\(entity\) WHERE label IN \$type_entity\) "
+             r"AND entity\.des CONTAINS \$property RETURN (?P<ret>.+)$", self._search_entity),
+            (r"^MATCH" + n() + r" RETURN size\(\((?P=var)\)(?P<incoming><)?-\[:(?P<type>\w+)\]->?\(\)\) "
+             r"as (?P<alias>\w+)$", self._count_degree),
+            (r"^MATCH\(fact:Fact\)-\[\]->" + n("e") + r" RETURN count\(fact\) as (?P<alias>\w+)$",
+             self._count_references),
+            (r"^MATCH" + n() + r" RETURN (?P<ret>.+)$", self._match_return),
+            (r"^MATCH" + n() + r" SET (?P=var)=\$(?P<param>\w+) RETURN (?P<ret>.+)$", self._match_set),
+            (r"^MATCH" + n() + r" (?P<detach>DETACH )?DELETE (?P=var)$", self._match_delete),
+            (r"^MERGE\(set:NewsSet\{entityID:\$name\}\) WITH set UNWIND \$ids as id "
+             r"MATCH\(news:News\{entityID:id\}\) MERGE\(set\)-\[:CONTAINS\]->\(news\)$", self._add_set_members),
+            (r"^MATCH\(set:NewsSet\{entityID:\$name\}\)-\[:CONTAINS\]->\(news:News\) WHERE news\.entityID>\$after "
+             r"RETURN news\.entityID as entityID ORDER BY news\.entityID LIMIT \$limit$", self._set_members_page),
+            (r"^CREATE\((?P<var>\w+):(?P<label>\w+) \$(?P<param>\w+)\) RETURN (?P<ret>.+)$", self._create),
+            (r"^CREATE\((?P<var>\w+):(?P<label>\w+)(?P<props>\{[^}]*\})\) RETURN (?P<ret>.+)$", self._create),
+            (r"^UNWIND \$entity_id_set as entity_id MATCH\(node(?::(?P<label>\w+))?\{entityID:entity_id\}\)"
+             r"(?: WHERE \$label IN labels\(node\))? WITH collect\(node\) as nodes "
+             r"CALL apoc\.refactor\.mergeNodes\(.*\) YIELD node RETURN (?P<ret>.+)$", self._merge_nodes),
+            (r"^MATCH\(news:News\{entityID:\$id_news\}\) OPTIONAL MATCH\(news\)-\[:HAS_FACT\]->\(fact:Fact\) "
+             r"DETACH DELETE news,fact$", self._delete_news),
+            (r"^MATCH\(news:News\{entityID:\$id_news\}\)-\[:HAS_FACT\]-\(fact:Fact\{entityID:\$id_fact\}\) "
+             r"(?:.* )?DETACH DELETE fact$", self._delete_fact),
+            (r"^UNWIND \$ids as id MATCH\(news:News\{entityID:id\}\) OPTIONAL MATCH\(news\)-\[stale:MENTIONS\]->\(\) "
+             r".* SET mention\.facts=references$", self._repair_news_mentions),
+            (r"^MATCH\(entity:(?P<label>\w+)\{entityID:\$id_entity\}\) OPTIONAL MATCH\(entity\)<-\[stale:MENTIONS\]-\(\) "
+             r".* SET mention\.facts=references$", self._repair_entity_mentions),
+            (r"^(?P<unwind>UNWIND \$rows as row )?MATCH\(news:News\{entityID:(?:\$|row\.)id_news\}\),\(sub:(?P<sub>\w+)\{entityID:(?:\$|row\.)id_subject\}\),"
+             r"\(obj:(?P<obj>\w+)\{entityID:(?:\$|row\.)id_object\}\) "
+             r"OPTIONAL MATCH\(loc:(?P<loc>\w+)\{entityID:(?:\$|row\.)id_location\}\) ?"
+             r"OPTIONAL MATCH\(time:(?P<time>\w+)\{entityID:(?:\$|row\.)id_time\}\) ?"
+             r"CREATE\(fact:Fact\{entityID:(?:\$|row\.)id_fact\}\),\(news\)-\[:HAS_FACT\]->\(fact\),"
+             r"\(fact\)-\[:(?P<subrel>\w+)\]->\(sub\),\(fact\)-\[:(?P<objrel>\w+)\]->\(obj\) .*"
+             r"RETURN fact\.entityID as factID$", self._create_fact),
+            (r"^(?:UNWIND \$(?P<set>\w+) as news_id )?MATCH\(news:News\{entityID:(?:\$\w+|news_id)\}\)"
+             r"-\[:HAS_FACT\]->\((?P<fact>\w+):Fact\)-\[rel\]->\(entity\)"
+             r"(?: WHERE any\(label IN labels\(entity\) WHERE label IN \$type_entity\))? "
+             r"RETURN (?P<by_news>news\.entityID as newsID,)?(?P=fact),rel,entity$", self._relations),
+            (r"^(?:UNWIND \$(?P<set>\w+) as news_id )?MATCH\(news:News\{entityID:(?:\$\w+|news_id)\}\)"
+             r"-\[:HAS_FACT\]->\((?P<fact>\w+):Fact\)-\[\]->\(:(?P<elabel>\w+)\{entityID:\$id_entity\}\) "
+             r"WITH (?:news,)?(?P=fact) MATCH\((?P=fact)\)-\[rel\]->\(entity\) "
+             r"RETURN (?P<by_news>news\.entityID as newsID,)?(?P=fact),rel,entity$",
+             self._relations),
+            (r"^(?:UNWIND \$(?P<set>\w+) as news_id )?MATCH\(news:News\{entityID:(?:\$\w+|news_id)\}\)"
+             r"-\[mention:MENTIONS\]->\(:(?P<elabel>\w+)\{entityID:\$id_entity\}\) "
+             r"RETURN sum\(mention\.facts\) as numberAppearance$", self._count_appearance),
+            (r"^MATCH\(news:News\{entityID:\$id_news\}\)-\[:HAS_FACT\]->\(facts:Fact\) WITH facts "
+             r"MATCH\(facts\)-\[r\]->\(entity\) RETURN facts\.entityID as factID,collect\(type\(r\)\) as predicate,"
+             r"collect\(entity\.entityID\) as entityID$", self._detailed_facts),
+        ]
+        self._statements = [(re.compile(pattern), handler) for pattern, handler in self._statements]
+        self._dispatch_cache = {}
+        self._schema = {}
+
+    def run_read_query(self, query, params=None, **kwparams):
+        return self._run(query, params, **kwparams)
+
+    def run_write_query(self, query, params=None, **kwparams):
+        return self._run(query, params, **kwparams)
+
+    def _run(self, query, params=None, **kwparams):
+        parameters = dict(params or {}, **kwparams)
+        handler, match = self._resolve(query)
+        with self._lock:
+            return handler(match, parameters)
+
+    def _resolve(self, query):
+        try:
+            return self._dispatch_cache[query]
+        except KeyError:
+            pass
+        statement = self.normalize(query)
+        for pattern, handler in self._statements:
+            match = pattern.match(statement)
+            if match:
+                if len(self._dispatch_cache) >= DISPATCH_CACHE_SIZE:
+                    self._dispatch_cache.clear()
+                resolved = self._dispatch_cache[query] = (handler, match)
+                return resolved
+        raise _unsupported(statement)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        statement = re.sub(r"\s+", " ", query).strip()
+        statement = re.sub(r" ?USING INDEX \w+ ?: ?\w+ ?\(\w+\)", "", statement)
+        statement = re.sub(r" ?([:,=<>]) ?", r"\1", statement)
+        statement = re.sub(r"([({\[]) ", r"\1", statement)
+        statement = re.sub(r" ([)}\]])", r"\1", statement)
+        statement = re.sub(r"(\w) ([({])", r"\1\2", statement)
+        return re.sub(r"([)}\]])(\w)", r"\1 \2", statement)
+
+    # statement handlers
+
+    def _create_index(self, match, params):
+        # every label is already indexed on its identifying properties, only the definitions are kept
+        name = match.group("name")
+        if name in self._schema:
+            raise CypherError.hydrate(message="An equivalent index already exists, '%s'." % name,
+                                      code="Neo.ClientError.Schema.EquivalentSchemaRuleAlreadyExists")
+        groups = match.groupdict()
+        if groups.get("props"):
+            kind, properties = "FULLTEXT", re.findall(r'"(\w+)"', groups["props"])
+        else:
+            kind, properties = "BTREE", [groups["prop"]]
+        self._schema[name] = {"name": name, "state": "ONLINE", "populationPercent": 100.0,
+                              "uniqueness": "UNIQUE" if groups.get("unique") else "NONUNIQUE", "type": kind,
+                              "labelsOrTypes": [groups["label"]], "properties": properties}
+        return _ResultBuilder([]).result()
+
+    def _drop_index(self, match, params):
+        if self._schema.pop(match.group("name"), None) is None:
+            raise CypherError.hydrate(message="Unable to drop index: Index does not exist: " + match.group("name"),
+                                      code="Neo.DatabaseError.Schema.IndexDropFailed")
+        return _ResultBuilder([]).result()
+
+    def _list_indexes(self, match, params):
+        keys = ["name", "state", "populationPercent", "uniqueness", "type", "labelsOrTypes", "properties"]
+        builder = _ResultBuilder(keys)
+        for name in sorted(self._schema):
+            index = self._schema[name]
+            builder.add(*[list(index[key]) if isinstance(index[key], list) else index[key] for key in keys])
+        return builder.result()
+
+    def _duplicates(self, match, params):
+        counts = {}
+        for node in self.graph.nodes_by_label(match.group("label")):
+            value = node.properties.get(match.group("prop"))
+            if value is not None:
+                counts[value] = counts.get(value, 0) + 1
+        builder = _ResultBuilder(["value", "nodes"])
+        duplicates = [(value, nodes) for value, nodes in counts.items() if nodes > 1]
+        for value, nodes in duplicates[:int(match.group("limit"))]:
+            builder.add(value, nodes)
+        return builder.result()
+
+    def _resolve_labels(self, match, params):
+        builder = _ResultBuilder(["label"])
+        for label in re.findall(r"\(entity:(\w+)\{", match.group(0)):
+            if self.graph.find_one(label, {"entityID": params["id_entity"]}) is not None:
+                builder.add(label)
+        return builder.result()
+
+    def _merge_set(self, match, params):
+        nodes = self.graph.nodes_by_label(match.group("label"))[:1] or \
+            [self.graph.create_node([match.group("label")], {})]
+        for node in nodes:
+            properties = dict(node.properties)
+            properties[match.group("prop")] = params[match.group("param")]
+            self.graph.set_properties(node, properties)
+        return _project(nodes, match.group("ret"))
+
+    def _fulltext_hits(self, index, text, max_hits):
+        label = {"agreements": "Agreement", "countries": "Country", "events": "Event",
+                 "locations": "Location", "organizations": "Organization",
+                 "persons": "Person"}.get(index)
+        terms = set(re.findall(r"\w+", text.lower()))
+        scored = []
+        for node in self.graph.nodes_by_label(label):
+            words = re.findall(r"\w+", " ".join(str(node.properties.get(key, ""))
+                                                 for key in ("name", "des")).lower())
+            score = sum(1 for word in words if word in terms)
+            if score:
+                scored.append((score / len(words), node))
+        scored.sort(key=lambda item: (-item[0], str(item[1].properties.get("entityID"))))
+        return scored[:max_hits]
+
+    def _fulltext(self, match, params):
+        scored = self._fulltext_hits(match.group("index"), params["text"], params["max_hits"])
+        if "score" in params:
+            scored = [(score, node) for score, node in scored
+                      if score < params["score"] or (score == params["score"]
+                                                     and str(node.properties.get("entityID")) > params["after"])]
+        start = params.get("start", 0)
+        scored = scored[start:start + params["limit"]]
+        return _project([node for _, node in scored], match.group("ret"),
+                        extra=[("score", [score for score, _ in scored])])
+
+    def _fulltext_count(self, match, params):
+        total = len(self._fulltext_hits(match.group("index"), params["text"], params["max_hits"]))
+        builder = _ResultBuilder([match.group("alias")])
+        builder.add(total)
+        return builder.result()
+
+    def _match_page(self, match, params):
+        nodes = self.graph.find(match.group("label"), _parse_properties(match.group("props"), params))
+        return _project(_page(nodes, params), match.group("ret"))
+
+    def _match_contains(self, match, params):
+        text = params.get("property")
+        keys = [key for key in (match.group("prop"), match.group("prop2")) if key]
+        nodes = [node for node in self.graph.nodes_by_label(match.group("label"))
+                 if any(text in _as_list(node.properties.get(key)) or
+                        (isinstance(node.properties.get(key), str) and text in node.properties.get(key))
+                        for key in keys)]
+        return _project(_page(nodes, params), match.group("ret"))
+
+    def _search_entity(self, match, params):
+        text = params.get("property")
+        nodes = []
+        for label in _as_list(params.get("type_entity")):
+            nodes += [node for node in self.graph.nodes_by_label(label)
+                      if isinstance(node.properties.get("des"), str) and text in node.properties["des"]]
+        return _project(nodes, match.group("ret"))
+
+    def _match_return(self, match, params):
+        nodes = self.graph.find(match.group("label"), _parse_properties(match.group("props"), params))
+        returned = match.group("ret")
+        if returned == match.group("var"):
+            builder = _ResultBuilder([returned])
+            for node in nodes:
+                builder.add(builder.node(node))
+            return builder.result()
+        return _project(nodes, returned)
+
+    def _match_set(self, match, params):
+        nodes = self.graph.find(match.group("label"), _parse_properties(match.group("props"), params))
+        for node in nodes:
+            self.graph.set_properties(node, params[match.group("param")])
+        return _project(nodes, match.group("ret"))
+
+    def _match_delete(self, match, params):
+        for node in self.graph.find(match.group("label"), _parse_properties(match.group("props"), params)):
+            self.graph.delete_node(node, detach=bool(match.group("detach")))
+        return _ResultBuilder([]).result()
+
+    def _add_set_members(self, match, params):
+        news_set = self.graph.find_one("NewsSet", {"entityID": params["name"]}) or \
+            self.graph.create_node(["NewsSet"], {"entityID": params["name"]})
+        members = {rel.end.id for rel in news_set.outgoing.values() if rel.type == "CONTAINS"}
+        for news_id in _as_list(params["ids"]):
+            for news in self.graph.find("News", {"entityID": news_id}):
+                if news.id not in members:
+                    members.add(news.id)
+                    self.graph.create_relationship(news_set, "CONTAINS", news)
+        return _ResultBuilder([]).result()
+
+    def _set_members_page(self, match, params):
+        builder = _ResultBuilder(["entityID"])
+        for news_set in self.graph.find("NewsSet", {"entityID": params["name"]}):
+            news = [rel.end for rel in news_set.outgoing.values()
+                    if rel.type == "CONTAINS" and "News" in rel.end.labels]
+            for node in _page(news, {"after": params["after"], "limit": params["limit"]}):
+                builder.add(node.properties["entityID"])
+        return builder.result()
+
+    def _create(self, match, params):
+        if "param" in match.groupdict() and match.group("param"):
+            properties = params[match.group("param")]
+        else:
+            properties = _parse_properties(match.group("props"), params)
+        node = self.graph.create_node([match.group("label")], properties)
+        return _project([node], match.group("ret"))
+
+    def _count_degree(self, match, params):
+        builder = _ResultBuilder([match.group("alias")])
+        for node in self.graph.find(match.group("label"), _parse_properties(match.group("props"), params)):
+            relationships = node.incoming if match.group("incoming") else node.outgoing
+            builder.add(sum(1 for rel in relationships.values() if rel.type == match.group("type")))
+        return builder.result()
+
+    def _count_references(self, match, params):
+        total = 0
+        for node in self.graph.find(match.group("elabel"), _parse_properties(match.group("eprops"), params)):
+            total += sum(1 for rel in node.incoming.values() if "Fact" in rel.start.labels)
+        builder = _ResultBuilder([match.group("alias")])
+        builder.add(total)
+        return builder.result()
+
+    def _merge_nodes(self, match, params):
+        label = match.group("label") or params.get("label")
+        nodes = []
+        for entity_id in params["entity_id_set"]:
+            nodes += self.graph.find(label, {"entityID": entity_id})
+        if not nodes:
+            return _ResultBuilder(["node"]).result()
+        target, others = nodes[0], nodes[1:]
+        properties = _copy_properties(target.properties)
+        for key in ("name", "des"):
+            values = [node.properties[key] for node in nodes if key in node.properties]
+            if values:
+                properties[key] = _combine(values)
+        for node in others:
+            for rel in list(node.outgoing.values()):
+                self._reattach(rel.type, target, rel.end, rel.properties)
+            for rel in list(node.incoming.values()):
+                self._reattach(rel.type, rel.start, target, rel.properties)
+            self.graph.delete_node(node, detach=True)
+            self.graph.add_labels(target, node.labels)
+        self.graph.set_properties(target, properties)
+        if match.group("ret") == "node":
+            builder = _ResultBuilder(["node"])
+            builder.add(builder.node(target))
+            return builder.result()
+        return _project([target], match.group("ret"))
+
+    def _reattach(self, rel_type, start, end, properties):
+        for rel in start.outgoing.values():
+            if rel.type == rel_type and rel.end is end:
+                rel.properties.update(properties)
+                return
+        self.graph.create_relationship(start, rel_type, end, properties)
+
+    def _delete_news(self, match, params):
+        for news in self.graph.find("News", {"entityID": params["id_news"]}):
+            for rel in list(news.outgoing.values()):
+                if rel.type == "HAS_FACT" and "Fact" in rel.end.labels and rel.end.id in self.graph.nodes:
+                    self.graph.delete_node(rel.end, detach=True)
+            self.graph.delete_node(news, detach=True)
+        return _ResultBuilder([]).result()
+
+    def _delete_fact(self, match, params):
+        for news in self.graph.find("News", {"entityID": params["id_news"]}):
+            for rel in list(news.outgoing.values()) + list(news.incoming.values()):
+                fact = rel.end if rel.start is news else rel.start
+                if rel.type == "HAS_FACT" and "Fact" in fact.labels \
+                        and fact.properties.get("entityID") == params["id_fact"] and fact.id in self.graph.nodes:
+                    self._count_mentions(news, fact, -1)
+                    self.graph.delete_node(fact, detach=True)
+        return _ResultBuilder([]).result()
+
+    def _unwind_create(self, match, params):
+        for row in params["rows"]:
+            self.graph.create_node([match.group("label")], row)
+        return _ResultBuilder([]).result()
+
+    def _unwind_match_ids(self, match, params):
+        builder = _ResultBuilder([match.group("alias")])
+        for entity_id in params["ids"]:
+            for node in self.graph.find(match.group("label"), {"entityID": entity_id}):
+                builder.add(node.properties.get("entityID"))
+        return builder.result()
+
+    def _create_fact(self, match, params):
+        builder = _ResultBuilder(["factID"])
+        for row in (params["rows"] if match.group("unwind") else [params]):
+            self._create_one_fact(match, row, builder)
+        return builder.result()
+
+    def _create_one_fact(self, match, params, builder):
+        news = self.graph.find_one("News", {"entityID": params["id_news"]})
+        subject = self.graph.find_one(match.group("sub"), {"entityID": params["id_subject"]})
+        obj = self.graph.find_one(match.group("obj"), {"entityID": params["id_object"]})
+        if news is None or subject is None or obj is None:
+            return
+        location = self.graph.find_one(match.group("loc"), {"entityID": params.get("id_location")})
+        time = self.graph.find_one(match.group("time"), {"entityID": params.get("id_time")})
+        fact = self.graph.create_node(["Fact"], {"entityID": params["id_fact"]})
+        self.graph.create_relationship(news, "HAS_FACT", fact)
+        self.graph.create_relationship(fact, match.group("subrel"), subject)
+        self.graph.create_relationship(fact, match.group("objrel"), obj)
+        if location is not None:
+            self.graph.create_relationship(fact, "OCCURRED_IN", location)
+        if time is not None:
+            self.graph.create_relationship(fact, "OCCURRED_ON", time)
+        self._count_mentions(news, fact, 1)
+        builder.add(params["id_fact"])
+
+    def _count_mentions(self, news: _StoredNode, fact: _StoredNode, sign: int):
+        """Add (sign 1) or remove (sign -1) the references of a fact to the MENTIONS counters of its news"""
+        for rel in list(fact.outgoing.values()):
+            mention = next((mention for mention in news.outgoing.values()
+                            if mention.type == "MENTIONS" and mention.end is rel.end), None)
+            if mention is None:
+                if sign < 0:
+                    continue
+                mention = self.graph.create_relationship(news, "MENTIONS", rel.end, {"facts": 0})
+            mention.properties["facts"] += sign
+            if mention.properties["facts"] <= 0:
+                self.graph.delete_relationship(mention)
+
+    def _recount_mentions(self, news: _StoredNode, entity: _StoredNode = None):
+        """Recount the MENTIONS counters of a news, those to entity only if given"""
+        for rel in list(news.outgoing.values()):
+            if rel.type == "MENTIONS" and (entity is None or rel.end is entity):
+                self.graph.delete_relationship(rel)
+        references = {}
+        for rel in news.outgoing.values():
+            if rel.type == "HAS_FACT" and "Fact" in rel.end.labels:
+                for reference in rel.end.outgoing.values():
+                    if entity is None or reference.end is entity:
+                        references[reference.end.id] = references.get(reference.end.id, 0) + 1
+        for entity_id, facts in references.items():
+            self.graph.create_relationship(news, "MENTIONS", self.graph.nodes[entity_id], {"facts": facts})
+
+    def _repair_news_mentions(self, match, params):
+        for news_id in params["ids"]:
+            for news in self.graph.find("News", {"entityID": news_id}):
+                self._recount_mentions(news)
+        return _ResultBuilder([]).result()
+
+    def _repair_entity_mentions(self, match, params):
+        for entity in self.graph.find(match.group("label"), {"entityID": params["id_entity"]}):
+            news_nodes = {rel.start.id: rel.start for rel in entity.incoming.values() if rel.type == "MENTIONS"}
+            for rel in entity.incoming.values():
+                if "Fact" in rel.start.labels:
+                    for fact_rel in rel.start.incoming.values():
+                        if fact_rel.type == "HAS_FACT":
+                            news_nodes[fact_rel.start.id] = fact_rel.start
+            for news in news_nodes.values():
+                self._recount_mentions(news, entity)
+        return _ResultBuilder([]).result()
+
+    def _news_of(self, match, params):
+        if match.groupdict().get("set"):
+            news_ids = params[match.group("set")]
+        else:
+            news_ids = [params.get("id", params.get("id_news"))]
+        for news_id in news_ids:
+            yield from self.graph.find("News", {"entityID": news_id})
+
+    def _news_facts(self, match, params):
+        for news in self._news_of(match, params):
+            for rel in news.outgoing.values():
+                if rel.type == "HAS_FACT" and "Fact" in rel.end.labels:
+                    yield news, rel.end
+
+    def _facts_of(self, match, params):
+        return (fact for _, fact in self._news_facts(match, params))
+
+    @staticmethod
+    def _references(fact, entity_id, label=None):
+        return [rel for rel in fact.outgoing.values() if rel.end.properties.get("entityID") == entity_id
+                and (label is None or label in rel.end.labels)]
+
+    def _relations(self, match, params):
+        by_news = bool(match.group("by_news"))
+        builder = _ResultBuilder((["newsID"] if by_news else []) + [match.group("fact"), "rel", "entity"])
+        types = set(_as_list(params["type_entity"])) if "type_entity" in params else None
+        for news, fact in self._news_facts(match, params):
+            if "id_entity" in params and not self._references(fact, params["id_entity"],
+                                                               match.groupdict().get("elabel")):
+                continue
+            for rel in fact.outgoing.values():
+                if types is not None and not rel.end.labels & types:
+                    continue
+                values = (builder.node(fact), builder.relationship(rel), builder.node(rel.end))
+                builder.add(*(((news.properties.get("entityID"),) if by_news else ()) + values))
+        return builder.result()
+
+    def _count_appearance(self, match, params):
+        total = sum(rel.properties.get("facts", 0) for news in self._news_of(match, params)
+                    for rel in news.outgoing.values()
+                    if rel.type == "MENTIONS" and match.group("elabel") in rel.end.labels
+                    and rel.end.properties.get("entityID") == params["id_entity"])
+        builder = _ResultBuilder(["numberAppearance"])
+        builder.add(total)
+        return builder.result()
+
+    def _detailed_facts(self, match, params):
+        builder = _ResultBuilder(["factID", "predicate", "entityID"])
+        for fact in self._facts_of(match, params):
+            rels = list(fact.outgoing.values())
+            if rels:
+                builder.add(fact.properties.get("entityID"), [rel.type for rel in rels],
+                            [rel.end.properties.get("entityID") for rel in rels])
+        return builder.result()
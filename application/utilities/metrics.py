@@ -0,0 +1,249 @@
+"""
+Metrics of the queries and of the HTTP requests, exposed in the Prometheus text format on /metrics.
+
+The queries are attributed to the service method issuing them, found on the call stack: the first
+function outside this package's DAO, fan-out and cache plumbing, named by its qualified name with
+any nested function dropped (NewsService._news_documents.<locals>.read counts as
+NewsService._news_documents).
+"""
+import sys
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+TEXT_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# modules whose functions only carry a query to the database
+_PLUMBING_MODULES = ("data_access_object", "async_data_access_object", "fan_out", "news_cache", "metrics",
+                     "concurrent.futures", "threading", "asyncio")
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values, for one set of labels"""
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield repr(float(bound)) if isinstance(bound, float) else str(bound), running
+        yield "+Inf", self.count
+
+
+class PrometheusText:
+    """Writer of the Prometheus text exposition format"""
+    def __init__(self, prefix: str):
+        self._prefix = prefix
+        self._lines = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict, float]]):
+        name = self._prefix + name
+        self._lines.append("# HELP %s %s" % (name, help_text))
+        self._lines.append("# TYPE %s %s" % (name, kind))
+        for labels, value in samples:
+            self._lines.append(name + _labels(labels) + " " + _number(value))
+
+    def histogram(self, name: str, help_text: str, histograms: Iterable[Tuple[Dict, Histogram]]):
+        name = self._prefix + name
+        self._lines.append("# HELP %s %s" % (name, help_text))
+        self._lines.append("# TYPE %s histogram" % name)
+        for labels, histogram in histograms:
+            for bound, count in histogram.cumulative():
+                self._lines.append(name + "_bucket" + _labels(dict(labels, le=bound)) + " " + str(count))
+            self._lines.append(name + "_sum" + _labels(labels) + " " + _number(histogram.total))
+            self._lines.append(name + "_count" + _labels(labels) + " " + str(histogram.count))
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"')
+                                                    .replace("\n", "\\n"))
+                          for key, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def calling_method(depth: int = 2) -> str:
+    """
+    Name of the service method on the call stack of the caller, skipping the query plumbing
+    :param depth: frames to skip above this function
+    :return: string
+    """
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.rsplit(".", 1)[-1] not in _PLUMBING_MODULES and not module.startswith(_PLUMBING_MODULES):
+            return _qualname(frame)
+        frame = frame.f_back
+    return "unknown"
+
+
+def _qualname(frame) -> str:
+    code = frame.f_code
+    qualname = getattr(code, "co_qualname", None)
+    if qualname is not None:
+        return qualname.split(".<locals>", 1)[0]
+    # before Python 3.11: the function name, after the class of the instance for the methods taking self
+    instance = frame.f_locals.get("self")
+    return code.co_name if instance is None else type(instance).__name__ + "." + code.co_name
+
+
+class QueryMetrics:
+    """Per calling method and kind of query (read, write, stream): the latency, the rows returned and the errors"""
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = Lock()
+        self._latencies = {}
+        self._rows = {}
+        self._errors = {}
+
+    def observe(self, method: str, kind: str, seconds: float, rows: int, error: bool = False):
+        key = (method, kind)
+        with self._lock:
+            histogram = self._latencies.get(key)
+            if histogram is None:
+                histogram = self._latencies[key] = Histogram(self._buckets)
+            histogram.observe(seconds)
+            self._rows[key] = self._rows.get(key, 0) + rows
+            if error:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def write(self, text: PrometheusText):
+        with self._lock:
+            latencies = [({"method": method, "kind": kind}, _copy(histogram))
+                         for (method, kind), histogram in sorted(self._latencies.items())]
+            rows = [({"method": method, "kind": kind}, count) for (method, kind), count in sorted(self._rows.items())]
+            errors = [({"method": method, "kind": kind}, count)
+                      for (method, kind), count in sorted(self._errors.items())]
+        text.histogram("db_query_duration_seconds", "Duration of the database queries by calling method", latencies)
+        text.metric("db_query_rows_total", "counter", "Records returned by the database queries", rows)
+        text.metric("db_query_errors_total", "counter", "Database queries that failed", errors)
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.total = histogram.total
+    copy.count = histogram.count
+    return copy
+
+
+class RequestMetrics:
+    """
+    Per route template and HTTP method: the latency and the status of the requests, the size of their
+    bodies and of the responses, as sent once compressed; and the requests in progress. The latency of
+    a streamed response ends when its headers are sent, and its size, unknown, is not observed.
+    """
+    def __init__(self, latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                 size_buckets: Tuple[float, ...] = SIZE_BUCKETS):
+        self._latency_buckets = latency_buckets
+        self._size_buckets = size_buckets
+        self._lock = Lock()
+        self._in_flight = 0
+        self._latencies = {}
+        self._requests = {}
+        self._request_sizes = {}
+        self._response_sizes = {}
+
+    def init_app(self, app: Flask, render: Callable[[], str], path: str = "/metrics"):
+        """
+        Observe the requests of app and serve the text render returns on path. Register before the
+        response compressor, so that the sizes observed are the compressed ones.
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(path, "metrics", lambda: Response(render(), content_type=TEXT_MIMETYPE))
+
+    def started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def finished(self, route: str, method: str, status: Optional[int], seconds: float,
+                 request_size: Optional[int], response_size: Optional[int], observe: bool = True):
+        """
+        End a request counted by started
+        :param observe: False to leave the request out of the metrics but the in-flight gauge
+        """
+        key = (route, method)
+        with self._lock:
+            self._in_flight -= 1
+            if not observe:
+                return
+            histogram = self._latencies.get(key)
+            if histogram is None:
+                histogram = self._latencies[key] = Histogram(self._latency_buckets)
+            histogram.observe(seconds)
+            status_key = (route, method, str(status))
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            for size, sizes in ((request_size, self._request_sizes), (response_size, self._response_sizes)):
+                if size is not None:
+                    if key not in sizes:
+                        sizes[key] = Histogram(self._size_buckets)
+                    sizes[key].observe(size)
+
+    def write(self, text: PrometheusText):
+        with self._lock:
+            in_flight = self._in_flight
+            latencies = [({"route": route, "method": method}, _copy(histogram))
+                         for (route, method), histogram in sorted(self._latencies.items())]
+            requests = [({"route": route, "method": method, "status": status}, count)
+                        for (route, method, status), count in sorted(self._requests.items())]
+            request_sizes = [({"route": route, "method": method}, _copy(histogram))
+                             for (route, method), histogram in sorted(self._request_sizes.items())]
+            response_sizes = [({"route": route, "method": method}, _copy(histogram))
+                              for (route, method), histogram in sorted(self._response_sizes.items())]
+        text.metric("http_requests_in_flight", "gauge", "Requests being handled", [({}, in_flight)])
+        text.metric("http_requests_total", "counter", "Requests handled by route and status", requests)
+        text.histogram("http_request_duration_seconds", "Time to answer the requests by route", latencies)
+        text.histogram("http_request_size_bytes", "Size of the request bodies by route", request_sizes)
+        text.histogram("http_response_size_bytes", "Size of the response bodies sent by route", response_sizes)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        self.started()
+
+    def _after_request(self, response):
+        if g.get("metrics_started") is None:
+            return response
+        self.finished(request.url_rule.rule if request.url_rule is not None else "unmatched", request.method,
+                      response.status_code, time.perf_counter() - g.metrics_started, request.content_length,
+                      None if response.is_streamed else response.calculate_content_length())
+        g.metrics_started = None
+        return response
+
+    def _teardown_request(self, error):
+        # requests failing outside of the error handlers never reach after_request
+        started = g.get("metrics_started")
+        if started is not None:
+            self.finished(request.url_rule.rule if request.url_rule is not None else "unmatched", request.method,
+                          500, time.perf_counter() - started, request.content_length, None)
+
+
+request_metrics = RequestMetrics()
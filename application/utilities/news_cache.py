@@ -0,0 +1,163 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+from application.settings import NEWS_CACHE_SIZE, NEWS_CACHE_TTL
+from application.utilities.graph import graph_entity_ids
+
+
+class NewsResultCache:
+    """
+    Read-through LRU cache of the serialized results of the reads of one news. Keys are tuples whose
+    first item is the id of the news; every entry also remembers the entityIDs its result holds,
+    so that the writes of a news or of an entity evict exactly the entries they make stale.
+    Entries expire after ttl seconds (0 keeps them until evicted), which bounds the staleness seen
+    by other processes, whose writes are not known here. Cached results are shared: callers
+    must not modify them.
+    """
+    def __init__(self, max_size=10000, ttl=0.0):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._keys_by_news = {}
+        self._keys_by_entity = {}
+        # bumped by every invalidation: a result read before one is not stored after it
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def load(self, key: Tuple, loader: Callable, entity_ids: Callable[..., Iterable[str]]):
+        """
+        Get the result cached under key, or compute it with loader and cache it
+        :param entity_ids: function listing the entityIDs held by a result of loader
+        """
+        return self.load_many([key], lambda missing: {key: loader()}, entity_ids)[key]
+
+    def load_many(self, keys: Iterable[Tuple], loader: Callable, entity_ids: Callable[..., Iterable[str]]) -> Dict:
+        """
+        Get the results cached under keys, computing those missing together with one call of loader
+        :param loader: function taking the list of the missing keys and returning their results by key
+        :param entity_ids: function listing the entityIDs held by a result of loader
+        :return: dict of the results by key
+        """
+        found, missing, generation = self.lookup(keys)
+        if missing:
+            loaded = loader(missing)
+            self.store(loaded, entity_ids, generation)
+            found.update(loaded)
+        return found
+
+    def lookup(self, keys: Iterable[Tuple]) -> Tuple[Dict, List[Tuple], int]:
+        """
+        Get the results cached under keys, for callers computing the missing ones themselves, which
+        hand them to store with the generation returned here
+        :return: the results found by key, the missing keys and the current generation
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and (not self._ttl or entry[1] > now):
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+            self._hits += len(found)
+            self._misses += len(missing)
+            return found, missing, self._generation
+
+    def store(self, results: Dict, entity_ids: Callable[..., Iterable[str]], generation: int):
+        """
+        Cache results computed after a lookup, unless an invalidation happened since
+        """
+        entities = {key: frozenset(entity_ids(result)) for key, result in results.items()}
+        expires_at = time.monotonic() + self._ttl
+        with self._lock:
+            if generation == self._generation:
+                for key, result in results.items():
+                    self._store(key, result, entities[key], expires_at)
+
+    def invalidate_news(self, news_ids: Iterable[str]):
+        with self._lock:
+            self._generation += 1
+            for news_id in news_ids:
+                for key in list(self._keys_by_news.get(news_id, ())):
+                    self._remove(key)
+                    self._invalidations += 1
+
+    def invalidate_entities(self, entity_ids: Iterable[str]):
+        with self._lock:
+            self._generation += 1
+            for entity_id in entity_ids:
+                for key in list(self._keys_by_entity.get(entity_id, ())):
+                    self._remove(key)
+                    self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys_by_news.clear()
+            self._keys_by_entity.clear()
+
+    def statistics(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRatio": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def _store(self, key: Tuple, result, entities: frozenset, expires_at: float):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (result, expires_at, entities)
+        self._keys_by_news.setdefault(key[0], set()).add(key)
+        for entity_id in entities:
+            self._keys_by_entity.setdefault(entity_id, set()).add(key)
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: Hashable):
+        _, _, entities = self._entries.pop(key)
+        self._discard(self._keys_by_news, key[0], key)
+        for entity_id in entities:
+            self._discard(self._keys_by_entity, entity_id, key)
+
+    @staticmethod
+    def _discard(index: Dict, name: str, key: Hashable):
+        keys = index.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[name]
+
+
+news_result_cache = NewsResultCache(max_size=NEWS_CACHE_SIZE, ttl=NEWS_CACHE_TTL)
+
+
+def fact_entity_ids(facts: List[Dict]) -> List[str]:
+    """entityIDs held by the detailed facts of a news"""
+    return [fact.get(key) for fact in facts
+            for key in ("factID", "subjectID", "objectID", "timeID", "locationID") if fact.get(key)]
+
+
+def entity_relation_ids(entity_id: str) -> Callable[[Dict], List[str]]:
+    """
+    Function listing the entityIDs held by a document of the relations of entity_id in a news, and
+    entity_id itself: a news without any fact about the entity caches an empty document, which the
+    writes of the entity must evict all the same
+    """
+    return lambda document: graph_entity_ids(document) + [entity_id]
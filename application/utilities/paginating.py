@@ -1,19 +1,70 @@
+import base64
+import binascii
+import json
+from flask_restx import abort
 from application.settings import START_PAGIN, LIMIT_PAGIN
 
+CURSOR_KEYS = ("entityID", "score")
 
-def paginate_results(req_parser, base_url, f, *paras):
+
+def encode_cursor(record) -> str:
+    """
+    Encode the sort keys of the last record of a page into an opaque cursor
+    :return: string
+    """
+    position = {key: record[key] for key in CURSOR_KEYS if key in record}
+    raw = json.dumps(position, separators=(",", ":"), ensure_ascii=False).encode("utf8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by encode_cursor
+    :return: dict|None
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw.decode("utf8"))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(position, dict) or not set(position) <= set(CURSOR_KEYS):
+        return None
+    return position
+
+
+def paginate_results(req_parser, base_url, f, *paras, count=None):
+    """
+    Run f for the page described by the request arguments. The page size is capped at LIMIT_PAGIN.
+    If count is given, its result (the total number of hits) is merged into the response
+    """
     pagin_paras = req_parser.parse_args()
     start = pagin_paras['start']
     limit = pagin_paras['limit']
+    cursor = pagin_paras.get('cursor')
+    if limit is not None:
+        limit = min(limit, LIMIT_PAGIN)
     result = {"previous": None, "next": None, "data": None}
-    if (start is not None and start >= 0) and (limit is not None and limit >0):
+    if count is not None:
+        result.update(count(*paras))
+    if cursor is None and (start is not None and start >= 0) and (limit is not None and limit >0):
         pre_start = max(0, start - limit)
         result['previous'] = base_url + "?start=" + str(pre_start) + "&limit=" + str(start)
-    else:
-        start = START_PAGIN
+        data = f(start, limit, *paras)
+        result['data'] = data
+        if len(result['data']) == limit:
+            result['next'] = base_url + "?start=" + str(start + limit) + "&limit=" + str(limit)
+        return result
+
+    # keyset pagination: seek past the last entity returned instead of skipping rows
+    position = {}
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if position is None:
+            abort(400, "The cursor is not valid")
+    if limit is None or limit <= 0:
         limit = LIMIT_PAGIN
-    data = f(start, limit, *paras)
+    data = f(START_PAGIN, limit, *paras, cursor=position)
     result['data'] = data
     if len(result['data']) == limit:
-        result['next'] = base_url + "?start=" + str(start + limit) + "&limit=" + str(limit)
-    return result
\ No newline at end of file
+        result['next'] = base_url + "?cursor=" + encode_cursor(data[-1]) + "&limit=" + str(limit)
+    return result
@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class PrincipalCache:
+    """
+    In-process cache of the accounts known to exist, keyed by (username, isAdmin), with the time each
+    account was created. Entries expire after ttl seconds and the least recently used ones are evicted
+    beyond max_size. Only existing accounts are cached, so a lookup of an unknown account always reaches
+    the database. Every process has its own cache: an account deleted through another process is
+    still accepted here until its entry expires.
+    """
+    def __init__(self, ttl=60, max_size=10000):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def contains(self, username: str, is_admin: bool, issued_at=None) -> bool:
+        """Whether the account is cached and was created before the token was issued"""
+        key = (username, is_admin)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            expires_at, created_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+        return not issued_before(issued_at, created_at)
+
+    def add(self, username: str, is_admin: bool, created_at=None):
+        key = (username, is_admin)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str, is_admin: bool):
+        with self._lock:
+            self._entries.pop((username, is_admin), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def issued_before(issued_at, created_at) -> bool:
+    """
+    Whether a token was issued before the account was created, i.e. for a deleted account with the same
+    username. Accounts created before the creation time was recorded accept every token.
+    """
+    if created_at is None:
+        return False
+    return issued_at is None or issued_at < created_at
+
+
+class RevocationList:
+    """
+    Tokens of an account issued before its revocation are rejected, even if an account
+    with the same username is created again later. Token issue times have a resolution of one second,
+    so a token issued during the second of the revocation is rejected as well.
+    The list lives in the memory of the process: the other processes reject the tokens of a deleted
+    account once their principal cache entry expires, and those of a deleted account created again on
+    a cache miss, from the creation time stored on the account.
+    A revocation is forgotten lifetime seconds after it was made, once every token it rejects has expired.
+    """
+    def __init__(self, lifetime: float):
+        self._lifetime = lifetime
+        self._lock = Lock()
+        # ordered by revocation time, the oldest first
+        self._revoked_at = OrderedDict()
+
+    def revoke(self, username: str, is_admin: bool):
+        key = (username, is_admin)
+        now = time.time()
+        with self._lock:
+            self._revoked_at[key] = now
+            self._revoked_at.move_to_end(key)
+            while next(iter(self._revoked_at.values())) < now - self._lifetime:
+                self._revoked_at.popitem(last=False)
+
+    def is_revoked(self, username: str, is_admin: bool, issued_at) -> bool:
+        with self._lock:
+            revoked_at = self._revoked_at.get((username, is_admin))
+        if revoked_at is None or revoked_at < time.time() - self._lifetime:
+            return False
+        return issued_at is None or issued_at < revoked_at
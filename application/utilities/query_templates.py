@@ -0,0 +1,56 @@
+from itertools import product
+from application.news.model import SUBJECT_TYPES, OBJECT_TYPES, LOCATION_TYPES, RELATIONS
+
+
+def relation_type(prefix: str, relation: str) -> str:
+    """
+    Name of the relationship type linking a fact to its subject or object, e.g. HAS_SUBJECT_GẶP_GỠ
+    :return: string
+    """
+    return prefix + "_" + relation.replace(" ", "_").upper()
+
+
+def _create_fact_query(subject_type: str, object_type: str, location_type: str, relation: str,
+                       batched: bool = False) -> str:
+    # the batched variant reads the identifiers from the rows of $rows instead of parameters;
+    # both count the references of the fact in the MENTIONS counters of its news (see appearance_counters)
+    query = """
+        MATCH (news:News{entityID: $id_news}), (sub:%s{entityID: $id_subject}), (obj:%s{entityID: $id_object})
+        OPTIONAL MATCH (loc:%s{entityID: $id_location})
+        OPTIONAL MATCH (time:Time{entityID: $id_time})
+        CREATE (fact:Fact{entityID: $id_fact}), (news)-[:HAS_FACT]->(fact),
+            (fact)-[:%s]->(sub), (fact)-[:%s]->(obj)
+        FOREACH (_ IN CASE WHEN loc IS NOT NULL THEN [1] ELSE [] END | CREATE (fact)-[:OCCURRED_IN]->(loc))
+        FOREACH (_ IN CASE WHEN time IS NOT NULL THEN [1] ELSE [] END | CREATE (fact)-[:OCCURRED_ON]->(time))
+        WITH news, fact
+        MATCH (fact)-[]->(entity)
+        WITH news, fact, entity, count(*) as references
+        MERGE (news)-[mention:MENTIONS]->(entity)
+        SET mention.facts = coalesce(mention.facts, 0) + references
+        WITH DISTINCT fact
+        RETURN fact.entityID as factID
+        """ % (subject_type, object_type, location_type,
+               relation_type("HAS_SUBJECT", relation), relation_type("HAS_OBJECT", relation))
+    if batched:
+        query = "\n        UNWIND $rows as row" + query.replace("$id_", "row.id_")
+    return query
+
+
+FACT_SIGNATURES = list(product(SUBJECT_TYPES, OBJECT_TYPES, LOCATION_TYPES, RELATIONS))
+
+# Labels and relationship types cannot be parameters, so every combination the fact model accepts
+# gets its own query text, built once. Any fact then reuses one of these texts and its cached plan.
+CREATE_FACT_QUERIES = {signature: _create_fact_query(*signature) for signature in FACT_SIGNATURES}
+CREATE_FACTS_QUERIES = {signature: _create_fact_query(*signature, batched=True) for signature in FACT_SIGNATURES}
+
+
+def create_fact_query(subject_type: str, object_type: str, location_type: str, relation: str,
+                      batched: bool = False) -> str:
+    """
+    Get the query creating a fact with the given signature, or a batch of them from $rows if batched
+    :return: string
+    """
+    key = (subject_type, object_type, location_type, relation)
+    if key not in CREATE_FACT_QUERIES:
+        raise ValueError("Unsupported fact signature: " + ", ".join(key))
+    return CREATE_FACTS_QUERIES[key] if batched else CREATE_FACT_QUERIES[key]
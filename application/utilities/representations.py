@@ -0,0 +1,36 @@
+"""
+Response encodings offered besides JSON, chosen by flask_restx from the Accept header of the request.
+"""
+from flask import make_response
+
+from application.utilities.json_converter import converter
+
+try:
+    import msgpack
+except ImportError:  # optional: without it the API only speaks JSON
+    msgpack = None
+
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+def _msgpack_default(obj):
+    value = converter(obj)
+    if value is None:
+        raise TypeError("Object of type %s is not MessagePack serializable" % type(obj).__name__)
+    return value
+
+
+def output_msgpack(data, code, headers=None):
+    """Encode a resource result as MessagePack, temporal values as the JSON encoding writes them"""
+    body = msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    return response
+
+
+def register_representations(api):
+    """
+    Add the optional encodings to an Api. JSON stays first, hence the answer to clients accepting anything.
+    """
+    if msgpack is not None:
+        api.representations[MSGPACK_MIMETYPE] = output_msgpack
@@ -0,0 +1,218 @@
+from threading import Lock, Thread
+from typing import Dict, List
+from neo4j import CypherError
+from application.news.model import ENTITY_TYPES
+
+FULLTEXT_LABELS = {"agreementsFullTextSearch": "Agreement", "countriesFullTextSearch": "Country",
+                   "eventsFullTextSearch": "Event", "locationsFullTextSearch": "Location",
+                   "organizationsFullTextSearch": "Organization", "personsFullTextSearch": "Person"}
+
+# errors meaning that the statement has already been applied
+ALREADY_APPLIED_CODES = {"Neo.ClientError.Schema.EquivalentSchemaRuleAlreadyExists",
+                         "Neo.ClientError.Schema.IndexAlreadyExists",
+                         "Neo.ClientError.Schema.ConstraintAlreadyExists",
+                         "Neo.DatabaseError.Schema.IndexDropFailed",
+                         "Neo.ClientError.Schema.IndexNotFound"}
+
+
+class SchemaMigration:
+    """
+    A set of schema statements bringing the database to a version. ``indexes`` are the names
+    of the indexes (including the ones backing constraints) that must exist once it is applied.
+    ``checks`` are queries run first, returning the rows (value and count of nodes) that would make
+    a statement fail; any row leaves the migration unapplied. ``restore`` are the statements run when
+    a statement fails, to put back what the migration dropped.
+    """
+    def __init__(self, version: int, description: str, statements: List[str], indexes: List[str] = None,
+                 dropped: List[str] = None, checks: Dict[str, str] = None, restore: List[str] = None):
+        self.version = version
+        self.description = description
+        self.statements = statements
+        self.indexes = indexes or []
+        self.dropped = dropped or []
+        self.checks = checks or {}
+        self.restore = restore or []
+
+
+def _unique_constraint(name: str, label: str, key: str) -> str:
+    return "CREATE CONSTRAINT %s ON (node:%s) ASSERT node.%s IS UNIQUE" % (name, label, key)
+
+
+def _duplicates(label: str, key: str) -> str:
+    return """
+    MATCH (node:%s) WHERE node.%s IS NOT NULL
+    WITH node.%s as value, count(*) as nodes WHERE nodes > 1
+    RETURN value, nodes LIMIT 5
+    """ % (label, key, key)
+
+
+def _fulltext_index(name: str, label: str) -> str:
+    return 'CALL db.index.fulltext.createNodeIndex("%s",["%s"],["name", "des"])' % (name, label)
+
+
+NEWS_INDEX = "CREATE INDEX index_news FOR (news:News) ON (news.entityID)"
+
+MIGRATIONS = [
+    SchemaMigration(1, "News entityID index and fulltext indexes on the name and description of entities",
+                    [NEWS_INDEX] +
+                    [_fulltext_index(name, label) for name, label in FULLTEXT_LABELS.items()],
+                    indexes=["index_news"] + list(FULLTEXT_LABELS)),
+    # a uniqueness constraint cannot share its label and property with an index, so index_news is
+    # replaced by the constraint on News. Duplicated keys are looked for before dropping it, and it is
+    # created again if a constraint fails all the same
+    SchemaMigration(2, "entityID uniqueness constraints for entities, News and Fact, username for accounts",
+                    ["DROP INDEX index_news"] +
+                    [_unique_constraint(label.lower() + "_entity_id", label, "entityID")
+                     for label in ENTITY_TYPES + ["News", "Fact"]] +
+                    [_unique_constraint(label.lower() + "_username", label, "username")
+                     for label in ["User", "Admin"]],
+                    indexes=[label.lower() + "_entity_id" for label in ENTITY_TYPES + ["News", "Fact"]] +
+                    ["user_username", "admin_username"],
+                    dropped=["index_news"],
+                    checks=dict([("%s entityID" % label, _duplicates(label, "entityID"))
+                                 for label in ENTITY_TYPES + ["News", "Fact"]] +
+                                [("%s username" % label, _duplicates(label, "username"))
+                                 for label in ["User", "Admin"]]),
+                    restore=[NEWS_INDEX]),
+    SchemaMigration(3, "entityID uniqueness constraint for news sets",
+                    [_unique_constraint("newsset_entity_id", "NewsSet", "entityID")],
+                    indexes=["newsset_entity_id"]),
+]
+
+
+class SchemaManager:
+    """
+    Bring the database schema to the latest version of the migrations. The version reached is kept
+    in the SchemaVersion node. Migrations run in a background thread: creating an index or a constraint
+    returns as soon as it is registered and the database populates it online, so the application can
+    serve requests meanwhile.
+    """
+    def __init__(self, dao, migrations: List[SchemaMigration] = None):
+        self._dao = dao
+        self._migrations = sorted(migrations if migrations is not None else MIGRATIONS,
+                                  key=lambda migration: migration.version)
+        self._lock = Lock()
+        self._thread = None
+        self._state = "pending"
+        self._errors = []
+
+    @property
+    def target_version(self) -> int:
+        return self._migrations[-1].version if self._migrations else 0
+
+    def current_version(self) -> int:
+        query = """
+        MATCH (schema:SchemaVersion)
+        RETURN schema.version as version
+        """
+        result = self._dao.run_read_query(query).data()
+        return result[0]["version"] if result else 0
+
+    def _set_version(self, version: int):
+        query = """
+        MERGE (schema:SchemaVersion)
+        SET schema.version = $version
+        RETURN schema.version as version
+        """
+        self._dao.run_write_query(query, version=version)
+
+    def _check(self, migration: SchemaMigration) -> List[str]:
+        errors = []
+        for name, query in migration.checks.items():
+            for record in self._dao.run_read_query(query).data():
+                errors.append("version %d: duplicate %s %r on %d nodes"
+                              % (migration.version, name, record["value"], record["nodes"]))
+        return errors
+
+    def _run_statements(self, version: int, statements: List[str]) -> List[str]:
+        errors = []
+        for statement in statements:
+            try:
+                self._dao.run_write_query(statement)
+            except CypherError as error:
+                if error.code in ALREADY_APPLIED_CODES or "already exists" in str(error.message).lower():
+                    continue
+                errors.append("version %d: %s: %s" % (version, error.code, error.message))
+        return errors
+
+    def _apply(self, migration: SchemaMigration) -> List[str]:
+        errors = self._check(migration)
+        if errors:
+            return errors
+        errors = self._run_statements(migration.version, migration.statements)
+        if errors:
+            errors += self._run_statements(migration.version, migration.restore)
+        return errors
+
+    def migrate(self) -> Dict:
+        """
+        Apply, in order, the migrations newer than the current version. A migration failing, or
+        finding duplicated keys, leaves the version where it was; its statements are retried by the
+        next run.
+        :return: dict with the status of the schema
+        """
+        self._migrate()
+        return self.status()
+
+    def _migrate(self):
+        with self._lock:
+            self._state = "running"
+            self._errors = []
+        errors = []
+        try:
+            version = self.current_version()
+            for migration in self._migrations:
+                if migration.version <= version:
+                    continue
+                errors = self._apply(migration)
+                if errors:
+                    break
+                self._set_version(migration.version)
+                version = migration.version
+        except CypherError as error:
+            errors = errors + [error.code + ": " + str(error.message)]
+        except Exception as error:
+            errors = errors + [str(error) or type(error).__name__]
+        with self._lock:
+            self._errors = errors
+            self._state = "failed" if errors else "done"
+
+    def migrate_in_background(self) -> bool:
+        """
+        Start migrating in a daemon thread unless a migration is already running
+        :return: whether a migration was started
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._state = "running"
+            self._thread = Thread(target=self._migrate, name="schema-migration", daemon=True)
+            self._thread.start()
+        return True
+
+    def indexes(self) -> List[Dict]:
+        fields = ("name", "state", "populationPercent", "uniqueness", "type", "labelsOrTypes", "properties")
+        return [{field: record.get(field) for field in fields}
+                for record in self._dao.run_read_query("CALL db.indexes()").data()]
+
+    def status(self) -> Dict:
+        """
+        Report the schema version, the migration state and the population of every index
+        :return: dict
+        """
+        with self._lock:
+            state = self._state
+            errors = list(self._errors)
+        indexes = self.indexes()
+        expected = set()
+        for migration in self._migrations:
+            expected = (expected - set(migration.dropped)) | set(migration.indexes)
+        present = {index["name"] for index in indexes}
+        return {
+            "version": self.current_version(),
+            "targetVersion": self.target_version,
+            "migration": state,
+            "errors": errors,
+            "missingIndexes": sorted(expected - present),
+            "indexes": indexes,
+        }
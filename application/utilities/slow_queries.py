@@ -0,0 +1,131 @@
+"""
+Slow-query log. The queries lasting more than a threshold are logged with the shape of their
+parameters, never their values, and kept in a ring buffer of the last ones. Optionally, each slow
+read is run once more under PROFILE in the background, to capture its plan and its database hits;
+a slow write is planned under EXPLAIN instead, which does not execute it.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parameter_shape(value):
+    """
+    The type of a parameter value, with the size of the lists and the shape of the maps
+    :return: string, or dict for a map
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return {key: parameter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        shapes = {str(parameter_shape(item)) for item in value}
+        return "list<%s>[%d]" % ("|".join(sorted(shapes)) or "any", len(value))
+    return type(value).__name__
+
+
+def plan_operators(plan: Dict) -> List[str]:
+    """The distinct operators of a plan, from the leaves up"""
+    operators = []
+    for child in plan.get("children", []):
+        operators += [operator for operator in plan_operators(child) if operator not in operators]
+    if plan["operator"] not in operators:
+        operators.append(plan["operator"])
+    return operators
+
+
+class SlowQueryLog:
+    """
+    Keep the last size queries lasting more than threshold_ms milliseconds. With profile, their plans
+    are captured by profiler(query, params, execute) on a single background thread, once per query
+    text: the later entries of a text share the plan of the first. The profiler returns None when the
+    backend cannot profile.
+    """
+    def __init__(self, profiler: Callable[[str, Dict, bool], Optional[Dict]], threshold_ms: float = 500,
+                 size: int = 100, profile: bool = False):
+        self.threshold_ms = threshold_ms
+        self.profile = profile
+        self._profiler = profiler
+        self._lock = Lock()
+        self._entries = deque(maxlen=size)
+        self._plans = {}
+        self._max_plans = size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-profile")
+
+    def observe(self, method: str, kind: str, query: str, params: Dict, seconds: float, rows: int,
+                error: str = None):
+        duration_ms = 1000 * seconds
+        if duration_ms < self.threshold_ms:
+            return
+        shapes = {key: parameter_shape(value) for key, value in params.items()}
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "method": method,
+            "kind": kind,
+            "query": " ".join(query.split()),
+            "parameters": shapes,
+            "durationMs": round(duration_ms, 3),
+            "rows": rows,
+            "error": error,
+            "profile": None,
+        }
+        logger.warning("Slow %s query in %s: %.1f ms, %d rows, parameters %s%s: %s", kind, method, duration_ms, rows,
+                       shapes, ", failed: " + error if error else "", entry["query"])
+        with self._lock:
+            self._entries.append(entry)
+            if not self.profile:
+                return
+            profile = self._plans.get(entry["query"])
+            if profile is None:
+                if len(self._plans) >= self._max_plans:
+                    self._plans.pop(next(iter(self._plans)))
+                profile = self._plans[entry["query"]] = {"state": "pending"}
+                self._executor.submit(self._capture, profile, query, params, kind != "write")
+            entry["profile"] = profile
+
+    def entries(self) -> List[Dict]:
+        """The entries, the slowest first"""
+        with self._lock:
+            entries = [dict(entry, profile=dict(entry["profile"]) if entry["profile"] else None)
+                       for entry in self._entries]
+        return sorted(entries, key=lambda entry: entry["durationMs"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans = {}
+
+    def status(self) -> Dict:
+        return {"thresholdMs": self.threshold_ms, "profile": self.profile, "size": self._entries.maxlen,
+                "queries": self.entries()}
+
+    def _capture(self, profile: Dict, query: str, params: Dict, execute: bool):
+        started = time.perf_counter()
+        try:
+            plan = self._profiler(query, params, execute)
+        except Exception as error:
+            result = {"state": "failed", "error": str(error)}
+        else:
+            if plan is None:
+                result = {"state": "unsupported"}
+            else:
+                result = {"state": "done", "mode": "PROFILE" if execute else "EXPLAIN",
+                          "seconds": round(time.perf_counter() - started, 3), "dbHits": plan.get("totalDbHits"),
+                          "operators": plan_operators(plan), "plan": plan}
+        with self._lock:
+            profile.clear()
+            profile.update(result)
@@ -0,0 +1,80 @@
+from itertools import chain
+from typing import Callable, Iterable, List, Optional
+
+from flask import Response, request
+from flask_restx import reqparse
+
+from application.settings import SET_NEWS_MAX_IDS
+from application.utilities.graph import stream_subgraph_json, stream_subgraph_ndjson
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_MODES = ("json", "ndjson")
+GRAPH_FORMATS = ("graph", "compact")
+
+graph_stream_parser = reqparse.RequestParser()
+graph_stream_parser.add_argument('stream', location='args', type=str, choices=STREAM_MODES,
+                                 help='Stream the graph as chunked JSON or as NDJSON (also chosen by '
+                                      'Accept: ' + NDJSON_MIMETYPE + ')')
+graph_stream_parser.add_argument('format', location='args', type=str, choices=GRAPH_FORMATS, default="graph",
+                                 help='graph: nodes and relationships as objects, compact: string tables '
+                                      'and parallel arrays of indices')
+
+
+def graph_stream_mode() -> Optional[str]:
+    """
+    Streaming mode asked by the current request: the stream argument, else ndjson if the client
+    accepts it in preference to JSON, else None for a buffered response
+    :return: string or None
+    """
+    mode = graph_stream_parser.parse_args()['stream']
+    if mode is None and request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        mode = "ndjson"
+    return mode
+
+
+def stream_graph(records: Iterable, mode: str) -> Response:
+    """
+    Build a chunked response writing the nodes and relationships of the records as they are read.
+    The first record is read before answering, so that a query failing from the start still gets
+    an error status.
+    :return: flask Response
+    """
+    records = iter(records)
+    first = next(records, None)
+    records = records if first is None else chain([first], records)
+    if mode == "ndjson":
+        return Response(stream_subgraph_ndjson(records), mimetype=NDJSON_MIMETYPE)
+    return Response(stream_subgraph_json(records), mimetype="application/json")
+
+
+def graph_response(service_method: Callable, *args):
+    """
+    Answer a graph request with the output its arguments ask for: a stream of the records, the
+    compact document or the buffered Neo4j browser document built by the service method
+    :return: flask Response, or the document and its status
+    """
+    compact = graph_stream_parser.parse_args()['format'] == "compact"
+    mode = graph_stream_mode()
+    if mode and compact:
+        return {"message": "The compact format cannot be streamed"}, 400
+    if mode:
+        return stream_graph(service_method(*args, stream=True), mode)
+    return service_method(*args, compact=compact), 200
+
+
+def too_many_news(set_news_id: List[str]) -> bool:
+    """Whether a set of news is too large to be read into one document: beyond SET_NEWS_MAX_IDS news"""
+    return len(set(set_news_id)) > SET_NEWS_MAX_IDS
+
+
+def set_news_graph_response(service_method: Callable, set_news_id: List[str], *args):
+    """
+    Answer a graph request over a set of news sent in the body as graph_response does. A document
+    holds the whole set in memory, so larger sets are refused unless streamed; they can also be read
+    page by page through a named news set
+    :return: flask Response, or the document and its status
+    """
+    if graph_stream_mode() is None and too_many_news(set_news_id):
+        return {"message": "A set of more than %d news must be streamed or stored as a news set"
+                           % SET_NEWS_MAX_IDS}, 413
+    return graph_response(service_method, set_news_id, *args)
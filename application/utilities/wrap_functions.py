@@ -18,11 +18,7 @@ def user_token_required(f):
             if isinstance(resp, str):
                 return {'message': resp}, 401
             else:
-                if resp['isAdmin']:
-                    user = AuthService.getAdmin(resp["username"])
-                else:
-                    user = AuthService.getUser(resp["username"])
-                if not user:
+                if not AuthService.principal_exists(resp["username"], resp["isAdmin"], resp["issuedAt"]):
                     return {'message': 'User does not exist. Please log in again'}, 401
         return f(*args, **kwargs)
     return decorated
@@ -43,8 +39,7 @@ def admin_token_required(f):
                 is_admin = resp['isAdmin']
                 if not is_admin:
                     return {'message': "Require admin privilege!"}, 405
-                admin = AuthService.getAdmin(resp["username"])
-                if not admin:
+                if not AuthService.principal_exists(resp["username"], True, resp["issuedAt"]):
                     return {'message': 'Admin account does not exist. Please log in again'}, 401
             else:
                 return {'message': resp}, 401
@@ -0,0 +1,47 @@
+"""
+Compare two benchmark reports and flag the endpoints that got slower.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.15 --metric p95_ms
+
+Exits with status 1 when at least one endpoint regressed by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+
+def compare_reports(baseline: Dict, candidate: Dict, metric: str, threshold: float) -> List[Dict]:
+    rows = []
+    for name, current in sorted(candidate["endpoints"].items()):
+        previous = baseline["endpoints"].get(name)
+        if previous is None or not previous.get(metric):
+            rows.append({"endpoint": name, "baseline": None, "candidate": current.get(metric),
+                         "change": None, "regressed": False})
+            continue
+        change = (current[metric] - previous[metric]) / previous[metric]
+        rows.append({"endpoint": name, "baseline": previous[metric], "candidate": current[metric],
+                     "change": round(change, 4), "regressed": change > threshold})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two endpoint benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p95_ms", help="Report field to compare")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown counted as regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        rows = compare_reports(json.load(baseline_file), json.load(candidate_file), args.metric, args.threshold)
+    for row in rows:
+        change = "new" if row["change"] is None else "%+.1f%%" % (row["change"] * 100)
+        print("%-40s %12s %12s %9s %s" % (row["endpoint"], row["baseline"], row["candidate"], change,
+                                          "REGRESSION" if row["regressed"] else ""))
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
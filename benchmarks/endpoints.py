@@ -0,0 +1,477 @@
+"""
+Benchmark every route registered by application.routes through the Flask test client.
+
+Usage:
+    python -m benchmarks.endpoints --scale 1 --iterations 50 --output bench_report.json
+    python -m benchmarks.endpoints --only news --only persons
+
+The storage backend defaults to the in-memory engine (STORAGE_BACKEND=memory) so the
+numbers measure Flask, the services and serialization. Export STORAGE_BACKEND=neo4j to
+benchmark against a live database (the dataset is written to it).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.stats import summarize_latencies  # noqa: E402
+
+ENTITY_NAMESPACES = {
+    "Person": "persons",
+    "Organization": "organizations",
+    "Country": "countries",
+    "Location": "locations",
+    "Time": "times",
+    "Event": "events",
+    "Agreement": "agreements",
+}
+SET_NEWS_SIZE = 50
+BATCH_NEWS_SIZE = 10
+BATCH_FACTS_PER_NEWS = 8
+
+
+class Scenario:
+    """
+    One benchmarked request. ``request`` builds the (url, json body) of the i-th call and
+    ``prepare`` creates, outside of the timed section, whatever the call consumes. ``headers``
+    are sent on top of the authorization header.
+    """
+    def __init__(self, name: str, method: str, route: str, request: Callable,
+                 prepare: Optional[Callable] = None, namespace: str = None, headers: Dict = None):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.request = request
+        self.prepare = prepare
+        self.headers = headers or {}
+        self.namespace = namespace or route.split("/")[2]
+
+
+class BenchmarkContext:
+    def __init__(self, client, admin_headers, dataset: Dict, seed: int):
+        self.client = client
+        self.admin_headers = admin_headers
+        self.dataset = dataset
+        self.random = random.Random(seed)
+        self._counter = 0
+
+    def unique(self, prefix: str) -> str:
+        self._counter += 1
+        return "bench-%s-%d" % (prefix, self._counter)
+
+    def pick(self, key: str):
+        return self.random.choice(self.dataset[key])
+
+    def news_set(self, size=SET_NEWS_SIZE) -> List[str]:
+        news = self.dataset["News"]
+        return self.random.sample(news, min(size, len(news)))
+
+
+def _entity_properties(label: str, entity_id: str) -> Dict:
+    if label == "Time":
+        return {"entityID": entity_id, "name": entity_id, "des": "2020-01-01"}
+    return {"entityID": entity_id, "name": "name " + entity_id, "des": "description of " + entity_id}
+
+
+def _create_entity(ctx: BenchmarkContext, label: str, entity_id: str):
+    ctx.client.post("/api/%s/" % ENTITY_NAMESPACES[label], json=_entity_properties(label, entity_id),
+                    headers=ctx.admin_headers)
+
+
+def _create_news(ctx: BenchmarkContext, news_id: str):
+    ctx.client.post("/api/news/", json={"entityID": news_id, "link": "http://bench.local/" + news_id,
+                                        "topics": ["benchmark"]}, headers=ctx.admin_headers)
+
+
+def _fact_body(ctx: BenchmarkContext, fact_id: str) -> Dict:
+    return {"entityID": fact_id, "relation": "gặp gỡ", "time_id": ctx.pick("Time"), "time_type": "Time",
+            "location_id": ctx.pick("Location"), "location_type": "Location",
+            "subject_id": ctx.pick("Person"), "object_id": ctx.pick("Organization"),
+            "subject_type": "Person", "object_type": "Organization"}
+
+
+def entity_scenarios(label: str) -> List[Scenario]:
+    namespace = ENTITY_NAMESPACES[label]
+    base = "/api/%s/" % namespace
+    pending = {}
+
+    def prepare_fresh(ctx, i):
+        entity_id = ctx.unique(namespace)
+        _create_entity(ctx, label, entity_id)
+        pending[i] = entity_id
+
+    def prepare_pair(ctx, i):
+        pair = [ctx.unique(namespace), ctx.unique(namespace)]
+        for entity_id in pair:
+            _create_entity(ctx, label, entity_id)
+        pending[i] = pair
+
+    def deep_page(ctx, i):
+        total = len(ctx.dataset[label])
+        return base + "?start=%d&limit=20" % max(0, total - 20), None
+
+    def update(ctx, i):
+        entity_id = ctx.pick(label)
+        return base + entity_id, _entity_properties(label, entity_id)
+
+    return [
+        Scenario(namespace + ".list", "GET", base, lambda ctx, i: (base, None)),
+        Scenario(namespace + ".list_page", "GET", base, lambda ctx, i: (base + "?start=0&limit=20", None)),
+        Scenario(namespace + ".list_deep_page", "GET", base, deep_page),
+        Scenario(namespace + ".get", "GET", base + "<string:id>",
+                 lambda ctx, i: (base + ctx.pick(label), None)),
+        Scenario(namespace + ".create", "POST", base,
+                 lambda ctx, i: (base, _entity_properties(label, ctx.unique(namespace)))),
+        Scenario(namespace + ".update", "PUT", base + "<string:id>", update),
+        Scenario(namespace + ".delete", "DELETE", base + "<string:id>",
+                 lambda ctx, i: (base + pending.pop(i), None), prepare=prepare_fresh),
+        Scenario(namespace + ".search", "POST", base + "search",
+                 lambda ctx, i: (base + "search?start=0&limit=20", {"text": label + " 1"})),
+        Scenario(namespace + ".merge_nodes", "POST", base + "merge_nodes",
+                 lambda ctx, i: (base + "merge_nodes", {"set_entity_id": pending.pop(i)}), prepare=prepare_pair),
+    ]
+
+
+def news_scenarios() -> List[Scenario]:
+    base = "/api/news/"
+    pending = {}
+
+    def prepare_news(ctx, i):
+        news_id = ctx.unique("news")
+        _create_news(ctx, news_id)
+        pending[i] = news_id
+
+    def prepare_fact(ctx, i):
+        news_id = ctx.pick("News")
+        fact_id = ctx.unique("fact")
+        ctx.client.post(base + news_id + "/facts", json=_fact_body(ctx, fact_id), headers=ctx.admin_headers)
+        pending[i] = (news_id, fact_id)
+
+    def prepare_merge(ctx, i):
+        pair = [ctx.unique("persons"), ctx.unique("persons")]
+        for entity_id in pair:
+            _create_entity(ctx, "Person", entity_id)
+        pending[i] = pair
+
+    def update(ctx, i):
+        news_id = ctx.pick("News")
+        return base + news_id, {"entityID": news_id, "link": "http://bench.local/" + news_id,
+                                "topics": ["benchmark", "updated"]}
+
+    def delete_fact(ctx, i):
+        news_id, fact_id = pending.pop(i)
+        return base + news_id + "/facts/" + fact_id, None
+
+    def popular_entity(ctx):
+        return ctx.dataset["Person"][0]
+
+    def batch(ctx, i):
+        news = []
+        for _ in range(BATCH_NEWS_SIZE):
+            news_id = ctx.unique("news")
+            news.append({"entityID": news_id, "link": "http://bench.local/" + news_id, "topics": ["benchmark"],
+                         "facts": [_fact_body(ctx, ctx.unique("fact")) for _ in range(BATCH_FACTS_PER_NEWS)]})
+        return base + "batch", {"news": news}
+
+    return [
+        Scenario("news.list", "GET", base, lambda ctx, i: (base, None)),
+        Scenario("news.list_page", "GET", base, lambda ctx, i: (base + "?start=0&limit=20", None)),
+        Scenario("news.get", "GET", base + "<string:id>", lambda ctx, i: (base + ctx.pick("News"), None)),
+        Scenario("news.create", "POST", base, lambda ctx, i: (base, {
+            "entityID": ctx.unique("news"), "link": "http://bench.local/new", "topics": ["benchmark"]})),
+        Scenario("news.batch", "POST", base + "batch", batch),
+        Scenario("news.update", "PUT", base + "<string:id>", update),
+        Scenario("news.delete", "DELETE", base + "<string:id>",
+                 lambda ctx, i: (base + pending.pop(i), None), prepare=prepare_news),
+        Scenario("news.facts", "GET", base + "<string:news_id>/facts",
+                 lambda ctx, i: (base + ctx.pick("News") + "/facts", None)),
+        Scenario("news.create_fact", "POST", base + "<string:news_id>/facts",
+                 lambda ctx, i: (base + ctx.pick("News") + "/facts", _fact_body(ctx, ctx.unique("fact")))),
+        Scenario("news.delete_fact", "DELETE", base + "<string:news_id>/facts/<string:fact_id>",
+                 delete_fact, prepare=prepare_fact),
+        Scenario("news.relations", "GET", base + "<string:news_id>/relations",
+                 lambda ctx, i: (base + ctx.pick("News") + "/relations", None)),
+        Scenario("news.set_relations", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations", {"set_news_id": ctx.news_set()})),
+        Scenario("news.set_relations_stream_json", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations?stream=json", {"set_news_id": ctx.news_set()})),
+        Scenario("news.set_relations_stream_ndjson", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations?stream=ndjson", {"set_news_id": ctx.news_set()})),
+        Scenario("news.set_relations_compact", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations?format=compact", {"set_news_id": ctx.news_set()})),
+        Scenario("news.set_relations_msgpack", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations", {"set_news_id": ctx.news_set()}),
+                 headers={"Accept": "application/msgpack"}),
+        Scenario("news.set_relations_gzip", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations", {"set_news_id": ctx.news_set()}),
+                 headers={"Accept-Encoding": "gzip"}),
+        Scenario("news.set_relations_stream_zstd", "POST", base + "relations",
+                 lambda ctx, i: (base + "relations?stream=ndjson", {"set_news_id": ctx.news_set()}),
+                 headers={"Accept-Encoding": "zstd"}),
+        Scenario("news.appearance", "GET", base + "<string:news_id>/appearance/<string:entity_id>",
+                 lambda ctx, i: (base + ctx.pick("News") + "/appearance/" + popular_entity(ctx), None)),
+        Scenario("news.set_appearance", "POST", base + "appearance/<string:entity_id>",
+                 lambda ctx, i: (base + "appearance/" + popular_entity(ctx), {"set_news_id": ctx.news_set()})),
+        Scenario("news.type_relations", "POST", base + "<string:news_id>/type/relations",
+                 lambda ctx, i: (base + ctx.pick("News") + "/type/relations",
+                                 {"set_entity_types": ["Person", "Organization"]})),
+        Scenario("news.set_type_relations", "POST", base + "type/relations",
+                 lambda ctx, i: (base + "type/relations", {"set_news_id": ctx.news_set(),
+                                                           "set_entity_types": ["Person", "Organization"]})),
+        Scenario("news.entity_relations", "GET", base + "<string:news_id>/entity/<string:entity_id>/relations",
+                 lambda ctx, i: (base + ctx.pick("News") + "/entity/" + popular_entity(ctx) + "/relations", None)),
+        Scenario("news.set_entity_relations", "POST", base + "entity/<string:entity_id>/relations",
+                 lambda ctx, i: (base + "entity/" + popular_entity(ctx) + "/relations",
+                                 {"set_news_id": ctx.news_set()})),
+        Scenario("news.merge_nodes", "POST", base + "merge_nodes",
+                 lambda ctx, i: (base + "merge_nodes", {"set_entity_id": pending.pop(i), "entity_type": "Person"}),
+                 prepare=prepare_merge),
+        Scenario("news.search", "POST", base + "search",
+                 lambda ctx, i: (base + "search?start=0&limit=20", {"text": "news.example.vn/1"})),
+        Scenario("news.entity_search", "POST", base + "entity/search",
+                 lambda ctx, i: (base + "entity/search", {"text": "số 1", "type_entity": "Person"})),
+    ]
+
+
+def news_set_scenarios() -> List[Scenario]:
+    base = "/api/news-sets/"
+    name = "bench-set"
+    pending = {}
+
+    def prepare_set(ctx, i):
+        ctx.client.post(base + name, json={"set_news_id": ctx.news_set(10 * SET_NEWS_SIZE)}, headers=ctx.admin_headers)
+
+    def prepare_delete(ctx, i):
+        pending[i] = ctx.unique("set")
+        ctx.client.post(base + pending[i], json={"set_news_id": ctx.news_set()}, headers=ctx.admin_headers)
+
+    def popular_entity(ctx):
+        return ctx.dataset["Person"][0]
+
+    return [
+        Scenario("news_sets.add", "POST", base + "<string:name>",
+                 lambda ctx, i: (base + name, {"set_news_id": ctx.news_set()})),
+        Scenario("news_sets.get", "GET", base + "<string:name>", lambda ctx, i: (base + name, None),
+                 prepare=prepare_set),
+        Scenario("news_sets.delete", "DELETE", base + "<string:name>",
+                 lambda ctx, i: (base + pending.pop(i), None), prepare=prepare_delete),
+        Scenario("news_sets.relations", "GET", base + "<string:name>/relations",
+                 lambda ctx, i: (base + name + "/relations?limit=" + str(SET_NEWS_SIZE), None), prepare=prepare_set),
+        Scenario("news_sets.relations_stream_ndjson", "GET", base + "<string:name>/relations",
+                 lambda ctx, i: (base + name + "/relations?stream=ndjson", None), prepare=prepare_set),
+        Scenario("news_sets.type_relations", "POST", base + "<string:name>/type/relations",
+                 lambda ctx, i: (base + name + "/type/relations?limit=" + str(SET_NEWS_SIZE),
+                                 {"set_entity_types": ["Person", "Organization"]}), prepare=prepare_set),
+        Scenario("news_sets.entity_relations", "GET", base + "<string:name>/entity/<string:entity_id>/relations",
+                 lambda ctx, i: (base + name + "/entity/" + popular_entity(ctx) + "/relations", None),
+                 prepare=prepare_set),
+        Scenario("news_sets.appearance", "GET", base + "<string:name>/appearance/<string:entity_id>",
+                 lambda ctx, i: (base + name + "/appearance/" + popular_entity(ctx), None), prepare=prepare_set),
+    ]
+
+
+def auth_scenarios() -> List[Scenario]:
+    base = "/api/auth/"
+    pending = {}
+
+    def prepare_account(kind):
+        def prepare(ctx, i):
+            username = ctx.unique(kind)
+            ctx.client.post(base + kind + "/register", json={"username": username, "password": "pw"},
+                            headers=ctx.admin_headers)
+            pending[i] = username
+        return prepare
+
+    return [
+        Scenario("auth.user_register", "POST", base + "user/register",
+                 lambda ctx, i: (base + "user/register", {"username": ctx.unique("user"), "password": "pw"})),
+        Scenario("auth.user_login", "POST", base + "user/login",
+                 lambda ctx, i: (base + "user/login", {"username": "bench-user", "password": "bench"})),
+        Scenario("auth.admin_register", "POST", base + "admin/register",
+                 lambda ctx, i: (base + "admin/register", {"username": ctx.unique("admin"), "password": "pw"})),
+        Scenario("auth.admin_login", "POST", base + "admin/login",
+                 lambda ctx, i: (base + "admin/login", {"username": "bench-admin", "password": "bench"})),
+        Scenario("auth.user_delete", "DELETE", base + "user/<string:username>",
+                 lambda ctx, i: (base + "user/" + pending.pop(i), None), prepare=prepare_account("user")),
+        Scenario("auth.admin_delete", "DELETE", base + "admin/<string:username>",
+                 lambda ctx, i: (base + "admin/" + pending.pop(i), None), prepare=prepare_account("admin")),
+    ]
+
+
+def admin_scenarios() -> List[Scenario]:
+    def prepare_repair(ctx, i):
+        # a repair still running since the previous call would answer 409 Conflict
+        from application.utilities.appearance_counters import appearance_counter_repair
+        appearance_counter_repair.wait()
+
+    return [
+        Scenario("admin.pool", "GET", "/api/admin/pool", lambda ctx, i: ("/api/admin/pool", None)),
+        Scenario("admin.schema", "GET", "/api/admin/schema", lambda ctx, i: ("/api/admin/schema", None)),
+        Scenario("admin.migrate_schema", "POST", "/api/admin/schema", lambda ctx, i: ("/api/admin/schema", None)),
+        Scenario("admin.queries", "GET", "/api/admin/queries", lambda ctx, i: ("/api/admin/queries", None)),
+        Scenario("admin.reset_queries", "DELETE", "/api/admin/queries", lambda ctx, i: ("/api/admin/queries", None)),
+        Scenario("admin.cache", "GET", "/api/admin/cache", lambda ctx, i: ("/api/admin/cache", None)),
+        Scenario("admin.clear_cache", "DELETE", "/api/admin/cache", lambda ctx, i: ("/api/admin/cache", None)),
+        Scenario("admin.compression", "GET", "/api/admin/compression",
+                 lambda ctx, i: ("/api/admin/compression", None)),
+        Scenario("admin.reset_compression", "DELETE", "/api/admin/compression",
+                 lambda ctx, i: ("/api/admin/compression", None)),
+        Scenario("admin.appearances", "GET", "/api/admin/appearances",
+                 lambda ctx, i: ("/api/admin/appearances", None)),
+        Scenario("admin.repair_appearances", "POST", "/api/admin/appearances",
+                 lambda ctx, i: ("/api/admin/appearances", None), prepare=prepare_repair),
+        Scenario("admin.slow_queries", "GET", "/api/admin/slow-queries",
+                 lambda ctx, i: ("/api/admin/slow-queries", None)),
+        Scenario("admin.clear_slow_queries", "DELETE", "/api/admin/slow-queries",
+                 lambda ctx, i: ("/api/admin/slow-queries", None)),
+        Scenario("admin.metrics", "GET", "/metrics", lambda ctx, i: ("/metrics", None), namespace="admin"),
+        Scenario("admin.fan_out", "GET", "/api/admin/fan-out", lambda ctx, i: ("/api/admin/fan-out", None)),
+        Scenario("admin.reset_fan_out", "DELETE", "/api/admin/fan-out", lambda ctx, i: ("/api/admin/fan-out", None)),
+    ]
+
+
+def all_scenarios() -> List[Scenario]:
+    scenarios = news_scenarios() + news_set_scenarios()
+    for label in ENTITY_NAMESPACES:
+        scenarios += entity_scenarios(label)
+    return scenarios + auth_scenarios() + admin_scenarios()
+
+
+def seed_dataset(ctx: BenchmarkContext, scale: float, seed: int) -> Dict:
+    """
+    Load a synthetic news graph into the configured backend (see benchmarks.generator)
+    """
+    from application import dao
+    from application.utilities.memory_graph import MemoryBackend
+    from benchmarks.generator import NewsGraphGenerator, load_into_memory, load_into_neo4j
+
+    generator = NewsGraphGenerator(scale=scale, seed=seed)
+    if isinstance(dao.backend, MemoryBackend):
+        load_into_memory(dao.backend.graph, generator)
+    else:
+        load_into_neo4j(dao, generator)
+    dataset = ctx.dataset
+    for label in ENTITY_NAMESPACES:
+        dataset[label] = generator.entity_ids(label)
+    dataset["News"] = ["news-%d" % index for index in range(generator.news_count)]
+    return dataset
+
+
+def run_scenario(ctx: BenchmarkContext, scenario: Scenario, iterations: int, warmup: int) -> Dict:
+    call = getattr(ctx.client, scenario.method.lower())
+    headers = dict(ctx.admin_headers, **scenario.headers)
+    latencies = []
+    statuses = {}
+    payload_bytes = 0
+    peak_memory = 0
+    for i in range(warmup + iterations + 1):
+        if scenario.prepare is not None:
+            scenario.prepare(ctx, i)
+        url, body = scenario.request(ctx, i)
+        traced = i == warmup + iterations
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        response = call(url, json=body, headers=headers)
+        elapsed = time.perf_counter() - start
+        if traced:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        elif i >= warmup:
+            latencies.append(elapsed)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            payload_bytes += len(response.get_data())
+    report = {"method": scenario.method, "route": scenario.route}
+    report.update(summarize_latencies(latencies))
+    report["peak_memory_kb"] = round(peak_memory / 1024, 1)
+    report["mean_payload_bytes"] = payload_bytes // max(1, iterations)
+    report["status_codes"] = statuses
+    return report
+
+
+def uncovered_routes(app, scenarios: List[Scenario]) -> List[str]:
+    covered = {(scenario.route, scenario.method) for scenario in scenarios}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith("/api/"):
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            if (rule.rule, method) not in covered:
+                missing.append(method + " " + rule.rule)
+    return missing
+
+
+def create_context(seed: int) -> BenchmarkContext:
+    from application.main import app
+    from application.auth.service import AuthService
+    from application.utilities.jw_token import encode_auth_token
+
+    if not AuthService.getAdmin("bench-admin"):
+        AuthService.createAdmin("bench-admin", "bench")
+    if not AuthService.getUser("bench-user"):
+        AuthService.createUser("bench-user", "bench")
+    admin_token = encode_auth_token("bench-admin", True)
+    return BenchmarkContext(app.test_client(), {"Authorization": admin_token.decode("utf8")}, {}, seed)
+
+
+def run_benchmarks(scale: float, iterations: int, warmup: int, seed: int, only: List[str] = None) -> Dict:
+    from application.main import app
+    from application import settings
+
+    ctx = create_context(seed)
+    seed_start = time.perf_counter()
+    seed_dataset(ctx, scale, seed)
+    seed_seconds = time.perf_counter() - seed_start
+    scenarios = all_scenarios()
+    selected = [scenario for scenario in scenarios if not only or scenario.namespace in only]
+    endpoints = {}
+    for scenario in selected:
+        endpoints[scenario.name] = run_scenario(ctx, scenario, iterations, warmup)
+        print("%-40s p50 %9.3f ms  p95 %9.3f ms  p99 %9.3f ms  %8.1f rps" % (
+            scenario.name, endpoints[scenario.name]["p50_ms"], endpoints[scenario.name]["p95_ms"],
+            endpoints[scenario.name]["p99_ms"], endpoints[scenario.name]["throughput_rps"]), file=sys.stderr)
+    return {
+        "meta": {
+            "created": datetime.datetime.utcnow().isoformat(),
+            "backend": settings.STORAGE_BACKEND,
+            "python": platform.python_version(),
+            "scale": scale,
+            "iterations": iterations,
+            "warmup": warmup,
+            "seed": seed,
+            "dataset": {key: len(value) for key, value in ctx.dataset.items()},
+            "seed_seconds": round(seed_seconds, 3),
+            "uncovered_routes": uncovered_routes(app, scenarios),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint through the Flask test client")
+    parser.add_argument("--scale", type=float, default=1.0, help="Data scale factor (1 = 1000 news)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per endpoint")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--only", action="append", help="Restrict to a namespace (news, persons, auth, ...)")
+    parser.add_argument("--output", default="bench_report.json", help="Where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scale, args.iterations, args.warmup, args.seed, args.only)
+    with open(args.output, "w") as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+    if report["meta"]["uncovered_routes"]:
+        print("Routes without a scenario: " + ", ".join(report["meta"]["uncovered_routes"]), file=sys.stderr)
+    print("Report written to " + args.output, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
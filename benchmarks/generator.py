@@ -0,0 +1,301 @@
+"""
+Synthetic news graph shaped like production data.
+
+News carry a variable number of Facts. Every Fact links a subject and an object through
+HAS_SUBJECT_<REL>/HAS_OBJECT_<REL> relationships named after the relations of news/model.py,
+and optionally a location (OCCURRED_IN) and a time (OCCURRED_ON). Entities are picked with a
+Zipfian popularity so that a few of them appear in a large share of the facts. Every news also
+gets the MENTIONS appearance counters the application maintains (application/utilities/appearance_counters.py).
+
+Usage:
+    python -m benchmarks.generator --scale 10 --seed 7 --target neo4j --batch-size 5000
+    python -m benchmarks.generator --scale 1 --target jsonl --output ./dataset
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+ENTITY_TYPES = ["Person", "Country", "Location", "Time", "Event", "Organization", "Agreement"]
+
+# (subject types, object types) accepted by every relation, following the README
+RELATION_SIGNATURES = {
+    "gặp gỡ": (["Person"], ["Person"]),
+    "tổ chức": (["Person", "Organization"], ["Event"]),
+    "ký thỏa thuận": (["Country"], ["Country"]),
+    "tham gia": (["Person", "Organization"], ["Organization", "Event", "Agreement"]),
+    "ủng hộ": (["Person", "Country"], ["Country", "Event", "Agreement"]),
+    "phản đối": (["Person", "Country"], ["Country", "Event", "Agreement"]),
+    "phát biểu tại": (["Person"], ["Event"]),
+    "căng thẳng với": (["Person", "Country"], ["Person", "Country"]),
+    "hủy bỏ": (["Person", "Country"], ["Event", "Agreement"]),
+    "đàm phán với": (["Person", "Country"], ["Person", "Country"]),
+}
+
+# entities per label at scale 1
+BASE_ENTITY_COUNTS = {
+    "Person": 2000,
+    "Organization": 500,
+    "Country": 200,
+    "Location": 1000,
+    "Time": 3650,
+    "Event": 800,
+    "Agreement": 300,
+}
+BASE_NEWS_COUNT = 1000
+TOPICS = ["Chính trị", "Kinh tế", "Xã hội", "Thể thao", "Giáo dục", "Sức khỏe", "Quốc tế"]
+EPOCH = datetime.date(2010, 1, 1)
+
+
+def relation_type(prefix: str, relation: str) -> str:
+    """Relationship type written by NewsService.create_fact for a relation"""
+    return prefix + relation.replace(" ", "_").upper()
+
+
+class ZipfSampler:
+    def __init__(self, population: List[str], exponent: float, rng: random.Random):
+        self._population = population
+        self._cum_weights = list(itertools.accumulate(1.0 / (rank ** exponent)
+                                                      for rank in range(1, len(population) + 1)))
+        self._rng = rng
+
+    def sample(self) -> str:
+        return self._rng.choices(self._population, cum_weights=self._cum_weights)[0]
+
+
+class NewsGraphGenerator:
+    def __init__(self, scale: float = 1.0, seed: int = 42, zipf_exponent: float = 1.1,
+                 facts_per_news: int = 8, location_ratio: float = 0.6, time_ratio: float = 0.7):
+        self.scale = scale
+        self.seed = seed
+        self.zipf_exponent = zipf_exponent
+        self.facts_per_news = facts_per_news
+        self.location_ratio = location_ratio
+        self.time_ratio = time_ratio
+        self.entity_counts = {label: max(2, int(count * scale)) for label, count in BASE_ENTITY_COUNTS.items()}
+        self.news_count = max(1, int(BASE_NEWS_COUNT * scale))
+        from application.news.model import ENTITY_TYPES as MODEL_ENTITY_TYPES, RELATIONS
+        assert set(ENTITY_TYPES) == set(MODEL_ENTITY_TYPES)
+        assert set(RELATION_SIGNATURES) == set(RELATIONS)
+        self.relations = list(RELATIONS)
+
+    @staticmethod
+    def entity_id(label: str, index: int) -> str:
+        return "%s-%d" % (label.lower(), index)
+
+    def entity_ids(self, label: str) -> List[str]:
+        return [self.entity_id(label, index) for index in range(self.entity_counts[label])]
+
+    def entities(self) -> Iterator[Tuple[str, Dict]]:
+        for label in ENTITY_TYPES:
+            for index in range(self.entity_counts[label]):
+                entity_id = self.entity_id(label, index)
+                if label == "Time":
+                    day = EPOCH + datetime.timedelta(days=index)
+                    yield label, {"entityID": entity_id, "name": day.strftime("%d/%m/%Y"), "des": day}
+                else:
+                    yield label, {"entityID": entity_id, "name": "%s %d" % (label, index),
+                                  "des": "Mô tả của %s số %d" % (label.lower(), index)}
+
+    def news(self) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """Yield every news with the facts it contains, in the shape of news_model and fact_model"""
+        rng = random.Random(self.seed)
+        samplers = {label: ZipfSampler(self.entity_ids(label), self.zipf_exponent, rng) for label in ENTITY_TYPES}
+        fact_ids = itertools.count()
+        for index in range(self.news_count):
+            news_id = "news-%d" % index
+            news = {"entityID": news_id, "link": "https://news.example.vn/%d.html" % index,
+                    "topics": rng.sample(TOPICS, rng.randint(1, 3))}
+            facts = []
+            for _ in range(rng.randint(1, 2 * self.facts_per_news - 1)):
+                relation = rng.choice(self.relations)
+                subject_types, object_types = RELATION_SIGNATURES[relation]
+                subject_type, object_type = rng.choice(subject_types), rng.choice(object_types)
+                subject_id, object_id = samplers[subject_type].sample(), samplers[object_type].sample()
+                if subject_type == object_type and subject_id == object_id:
+                    continue
+                location_type = rng.choice(["Location", "Country"])
+                fact = {
+                    "entityID": "fact-%d" % next(fact_ids),
+                    "relation": relation,
+                    "time_id": samplers["Time"].sample() if rng.random() < self.time_ratio else None,
+                    "time_type": "Time",
+                    "location_id": samplers[location_type].sample() if rng.random() < self.location_ratio else None,
+                    "location_type": location_type,
+                    "subject_id": subject_id,
+                    "object_id": object_id,
+                    "subject_type": subject_type,
+                    "object_type": object_type,
+                }
+                facts.append(fact)
+            yield news, facts
+
+
+def _fact_relationships(fact: Dict) -> Iterator[Tuple[str, str, str]]:
+    """(relationship type, end label, end entityID) of every relationship leaving a fact"""
+    yield relation_type("HAS_SUBJECT_", fact["relation"]), fact["subject_type"], fact["subject_id"]
+    yield relation_type("HAS_OBJECT_", fact["relation"]), fact["object_type"], fact["object_id"]
+    if fact.get("location_id"):
+        yield "OCCURRED_IN", fact["location_type"], fact["location_id"]
+    if fact.get("time_id"):
+        yield "OCCURRED_ON", fact["time_type"], fact["time_id"]
+
+
+class LoadStats:
+    def __init__(self):
+        self.counts = {"entities": 0, "news": 0, "facts": 0, "relationships": 0}
+        self._start = time.perf_counter()
+
+    def add(self, key: str, amount: int = 1):
+        self.counts[key] += amount
+
+    def report(self) -> Dict:
+        elapsed = time.perf_counter() - self._start
+        report = dict(self.counts)
+        report["seconds"] = round(elapsed, 3)
+        report["facts_per_second"] = round(self.counts["facts"] / elapsed, 1) if elapsed > 0 else 0.0
+        return report
+
+
+def load_into_memory(graph, generator: NewsGraphGenerator) -> Dict:
+    """Build the dataset straight into a MemoryGraph"""
+    stats = LoadStats()
+    for label, properties in generator.entities():
+        graph.create_node([label], properties)
+        stats.add("entities")
+    for news, facts in generator.news():
+        news_node = graph.create_node(["News"], news)
+        stats.add("news")
+        mentions = {}
+        for fact in facts:
+            fact_node = graph.create_node(["Fact"], {"entityID": fact["entityID"]})
+            graph.create_relationship(news_node, "HAS_FACT", fact_node)
+            stats.add("facts")
+            stats.add("relationships")
+            for rel_type, label, entity_id in _fact_relationships(fact):
+                entity = graph.find_one(label, {"entityID": entity_id})
+                graph.create_relationship(fact_node, rel_type, entity)
+                stats.add("relationships")
+                mentions[entity.id] = mentions.get(entity.id, 0) + 1
+        for entity_id, references in mentions.items():
+            graph.create_relationship(news_node, "MENTIONS", graph.nodes[entity_id], {"facts": references})
+    return stats.report()
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def load_into_neo4j(dao, generator: NewsGraphGenerator, batch_size: int = 5000) -> Dict:
+    """Write the dataset with one UNWIND transaction per batch and per label or relationship type"""
+    stats = LoadStats()
+    for batch in _batches(generator.entities(), batch_size):
+        rows_by_label = {}
+        for label, properties in batch:
+            rows_by_label.setdefault(label, []).append(properties)
+        for label, rows in rows_by_label.items():
+            assert label in ENTITY_TYPES
+            dao.run_write_query("UNWIND $rows as row CREATE (entity:" + label + ") SET entity = row", rows=rows)
+            stats.add("entities", len(rows))
+
+    for batch in _batches(generator.news(), max(1, batch_size // max(1, generator.facts_per_news))):
+        dao.run_write_query("UNWIND $rows as row CREATE (news:News) SET news = row",
+                            rows=[news for news, _ in batch])
+        stats.add("news", len(batch))
+        facts = [{"news_id": news["entityID"], "fact_id": fact["entityID"]} for news, facts in batch for fact in facts]
+        dao.run_write_query("""
+        UNWIND $rows as row
+        MATCH (news:News{entityID: row.news_id})
+        USING INDEX news:News(entityID)
+        CREATE (news)-[:HAS_FACT]->(:Fact{entityID: row.fact_id})
+        """, rows=facts)
+        stats.add("facts", len(facts))
+        stats.add("relationships", len(facts))
+        rows_by_type = {}
+        for news, facts in batch:
+            for fact in facts:
+                for rel_type, label, entity_id in _fact_relationships(fact):
+                    rows_by_type.setdefault((rel_type, label), []).append(
+                        {"news_id": news["entityID"], "fact_id": fact["entityID"], "entity_id": entity_id})
+        for (rel_type, label), rows in rows_by_type.items():
+            assert label in ENTITY_TYPES
+            dao.run_write_query("""
+            UNWIND $rows as row
+            MATCH (news:News{entityID: row.news_id})-[:HAS_FACT]->(fact:Fact{entityID: row.fact_id})
+            USING INDEX news:News(entityID)
+            MATCH (entity:""" + label + """{entityID: row.entity_id})
+            CREATE (fact)-[:""" + rel_type + """]->(entity)
+            """, rows=rows)
+            stats.add("relationships", len(rows))
+        dao.run_write_query("""
+        UNWIND $ids as id
+        MATCH (news:News{entityID: id})-[:HAS_FACT]->(:Fact)-[]->(entity)
+        USING INDEX news:News(entityID)
+        WITH news, entity, count(*) as references
+        CREATE (news)-[:MENTIONS{facts: references}]->(entity)
+        """, ids=[news["entityID"] for news, _ in batch])
+    return stats.report()
+
+
+def write_jsonl(directory: str, generator: NewsGraphGenerator) -> Dict:
+    """Export entities.jsonl, news.jsonl and facts.jsonl (one fact_model object plus news_id per line)"""
+    stats = LoadStats()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "entities.jsonl"), "w", encoding="utf8") as entities_file:
+        for label, properties in generator.entities():
+            row = dict(properties, type=label)
+            if isinstance(row["des"], datetime.date):
+                row["des"] = row["des"].isoformat()
+            entities_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            stats.add("entities")
+    with open(os.path.join(directory, "news.jsonl"), "w", encoding="utf8") as news_file, \
+            open(os.path.join(directory, "facts.jsonl"), "w", encoding="utf8") as facts_file:
+        for news, facts in generator.news():
+            news_file.write(json.dumps(news, ensure_ascii=False) + "\n")
+            stats.add("news")
+            for fact in facts:
+                facts_file.write(json.dumps(dict(fact, news_id=news["entityID"]), ensure_ascii=False) + "\n")
+                stats.add("facts")
+    return stats.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic news graph")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale factor (1 = 1000 news)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exponent of the entity popularity")
+    parser.add_argument("--facts-per-news", type=int, default=8, help="Average number of facts per news")
+    parser.add_argument("--target", choices=["neo4j", "memory", "jsonl"], default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per UNWIND transaction")
+    parser.add_argument("--output", default="dataset", help="Output directory of the jsonl target")
+    args = parser.parse_args(argv)
+
+    if args.target != "neo4j":
+        os.environ["STORAGE_BACKEND"] = "memory"
+    generator = NewsGraphGenerator(scale=args.scale, seed=args.seed, zipf_exponent=args.zipf,
+                                   facts_per_news=args.facts_per_news)
+    if args.target == "jsonl":
+        report = write_jsonl(args.output, generator)
+    elif args.target == "memory":
+        from application.utilities.memory_graph import MemoryGraph
+        report = load_into_memory(MemoryGraph(), generator)
+    else:
+        # the generator writes the counters along with the facts
+        os.environ.setdefault("APPEARANCE_REPAIR_ON_STARTUP", "false")
+        from application import dao
+        report = load_into_neo4j(dao, generator, args.batch_size)
+    print(json.dumps(report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Micro-benchmark of the subgraph serializer of application.utilities.graph against the
+implementation it replaced, on synthetic graphs shaped like the relation endpoint results.
+
+Usage:
+    python -m benchmarks.serializer --facts 50000 --entities 5000 --repeat 5
+
+Both serializers must produce the same document; the benchmark stops if they do not.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from itertools import chain
+from typing import Dict, List
+
+from neo4j import Node, Relationship
+from neo4j.types.graph import Graph
+from neo4j.types.temporal import Date
+
+# importing the application opens its storage backend
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from application.utilities.graph import serialize_subgraph_to_dict, serialize_subgraphs_to_dict  # noqa: E402
+
+LABELS = ["Person", "Country", "Location", "Time", "Event", "Organization", "Agreement"]
+
+
+def legacy_serialize_node_to_dict(node: Node) -> Dict:
+    result_node = {}
+    if isinstance(node, Node):
+        result_node["id"] = str(node["entityID"])
+        result_node["labels"] = list(chain(node.labels))
+        result_node["properties"] = dict(node)
+        result_node["properties"].pop("entityID", None)
+        if "Time" in result_node["labels"]:
+            if not isinstance(result_node["properties"]["des"], list):
+                result_node["properties"]["des"] = result_node["properties"]["des"].__str__()
+            else:
+                # the legacy code converted the list of the node in place; copy it to keep the graph intact
+                result_node["properties"]["des"] = list(result_node["properties"]["des"])
+                for index in range(0, len(result_node["properties"]["des"])):
+                    result_node["properties"]["des"][index] = result_node["properties"]["des"][index].__str__()
+    return result_node
+
+
+def legacy_serialize_relation_to_dict(relation: Relationship) -> Dict:
+    result_relation = {}
+    if isinstance(relation, Relationship):
+        result_relation["id"] = str(relation.id)
+        result_relation["type"] = relation.type
+        result_relation["startNode"] = str(relation.start_node["entityID"])
+        result_relation["endNode"] = str(relation.end_node["entityID"])
+        result_relation["properties"] = dict(relation)
+    return result_relation
+
+
+def legacy_serialize_subgraph_to_dict(graph) -> Dict:
+    graph_format_result = {"results": [{"columns": [], "data": [{"graph": {"nodes": [], "relationships": []}}]}],
+                           "errors": []}
+    for node in graph.nodes:
+        graph_format_result["results"][0]["data"][0]["graph"]["nodes"].append(legacy_serialize_node_to_dict(node))
+    for relation in graph.relationships:
+        graph_format_result["results"][0]["data"][0]["graph"]["relationships"].append(
+            legacy_serialize_relation_to_dict(relation))
+    return graph_format_result
+
+
+def legacy_serialize_subgraphs_to_dict(graphs) -> Dict:
+    graph_format_result = legacy_serialize_subgraph_to_dict(Graph())
+    serialized_graph = graph_format_result["results"][0]["data"][0]["graph"]
+    node_ids = set()
+    relation_ids = set()
+    for graph in graphs:
+        for node in graph.nodes:
+            if node.id not in node_ids:
+                node_ids.add(node.id)
+                serialized_graph["nodes"].append(legacy_serialize_node_to_dict(node))
+        for relation in graph.relationships:
+            if relation.id not in relation_ids:
+                relation_ids.add(relation.id)
+                serialized_graph["relationships"].append(legacy_serialize_relation_to_dict(relation))
+    return graph_format_result
+
+
+def build_graphs(facts: int, entities: int, parts: int, seed: int) -> List[Graph]:
+    """
+    Build parts graphs sharing their entities, each holding facts / parts facts linked to a subject,
+    an object and often a time, as the per-label queries of the individual relation endpoints return
+    """
+    rng = random.Random(seed)
+    graphs = [Graph() for _ in range(parts)]
+    entity_specs = []
+    for index in range(entities):
+        label = LABELS[index % len(LABELS)]
+        if label == "Time":
+            day = Date(2015, 1, 1) if index % 5 else [Date(2015, 1, 1), Date(2016, 2, 2)]
+            properties = {"entityID": "time-%d" % index, "name": "01/01/2015", "des": day}
+        else:
+            properties = {"entityID": "%s-%d" % (label.lower(), index), "name": "Tên %d" % index,
+                          "des": "Mô tả số %d" % index}
+        entity_specs.append((index, label, properties))
+    relation_id = 0
+    for fact in range(facts):
+        graph = graphs[fact % parts]
+        fact_node = graph.put_node(entities + fact, ("Fact",), {"entityID": "fact-%d" % fact})
+        for relation_type, _ in zip(["HAS_SUBJECT_GẶP_GỠ", "HAS_OBJECT_GẶP_GỠ", "OCCURRED_ON"],
+                                    range(rng.randint(2, 3))):
+            node_id, label, properties = entity_specs[min(int(rng.paretovariate(1.2)) - 1, entities - 1)]
+            entity = graph.put_node(node_id, (label,), properties)
+            graph.put_relationship(relation_id, fact_node, entity, relation_type)
+            relation_id += 1
+    return graphs
+
+
+def measure(function, argument, repeat: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        # collections triggered by the garbage of the previous run would be charged to this one
+        gc.collect()
+        gc.disable()
+        started = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started)
+        gc.enable()
+    tracemalloc.start()
+    function(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_ms": round(min(timings) * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the subgraph serializer")
+    parser.add_argument("--facts", type=int, default=50000)
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--parts", type=int, default=3, help="Graphs merged by the union serializer")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    graphs = build_graphs(args.facts, args.entities, args.parts, args.seed)
+    whole = build_graphs(args.facts, args.entities, 1, args.seed)[0]
+    cases = [
+        ("subgraph", legacy_serialize_subgraph_to_dict, serialize_subgraph_to_dict, whole),
+        ("subgraphs", legacy_serialize_subgraphs_to_dict, serialize_subgraphs_to_dict, graphs),
+    ]
+    report = {}
+    for name, legacy, current, argument in cases:
+        if json.dumps(legacy(argument), sort_keys=True) != json.dumps(current(argument), sort_keys=True):
+            print("%s: the serializers disagree" % name, file=sys.stderr)
+            return 1
+        before = measure(legacy, argument, args.repeat)
+        after = measure(current, argument, args.repeat)
+        report[name] = {"legacy": before, "current": after,
+                        "speedup": round(before["best_ms"] / after["best_ms"], 2) if after["best_ms"] else None}
+        print("%-10s legacy %10.3f ms %10.1f KiB   current %10.3f ms %10.1f KiB   x%s"
+              % (name, before["best_ms"], before["peak_kib"], after["best_ms"], after["peak_kib"],
+                 report[name]["speedup"]))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import math
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], rank: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(math.ceil(rank / 100.0 * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict:
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "samples": len(ordered),
+        "mean_ms": round(total / len(ordered) * 1000, 4) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4) if ordered else 0.0,
+        "throughput_rps": round(len(ordered) / total, 2) if total > 0 else 0.0,
+    }
@@ -0,0 +1,57 @@
+import json
+import os
+from threading import Lock
+from typing import Dict
+
+
+class Checkpoint:
+    """
+    Persist, per export file, the number of leading lines already written. Batches complete out of
+    order when written in parallel, so the position only moves past a batch once every batch before it
+    has completed; batches written past the position are written again on resume, which the MERGE
+    queries of the loader make harmless.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        self._state = {}
+        self._completed = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf8") as checkpoint_file:
+                self._state = json.load(checkpoint_file)
+
+    def position(self, name: str) -> int:
+        with self._lock:
+            return self._state.get(name, {}).get("line", 0)
+
+    def is_done(self, name: str) -> bool:
+        with self._lock:
+            return self._state.get(name, {}).get("done", False)
+
+    def complete(self, name: str, start: int, end: int):
+        """Record that the lines [start, end) of an export are written"""
+        with self._lock:
+            entry = self._state.setdefault(name, {"line": 0, "done": False})
+            completed = self._completed.setdefault(name, {})
+            completed[start] = end
+            moved = False
+            while entry["line"] in completed:
+                entry["line"] = completed.pop(entry["line"])
+                moved = True
+            if moved:
+                self._save()
+
+    def finish(self, name: str):
+        with self._lock:
+            self._state.setdefault(name, {"line": 0})["done"] = True
+            self._save()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return json.loads(json.dumps(self._state))
+
+    def _save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf8") as checkpoint_file:
+            json.dump(self._state, checkpoint_file)
+        os.replace(temporary, self.path)
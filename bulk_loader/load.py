@@ -0,0 +1,239 @@
+"""
+Offline bulk loader of JSONL exports of entities, news and facts.
+
+The exports are read and validated as a stream and written in batches by a pool of workers,
+one UNWIND transaction per batch and label (or fact signature). Every write MERGEs on entityID,
+so a batch can be written twice without duplicating anything. A checkpoint file records how far
+each export has been written: a load that stopped resumes where it stopped when run again.
+Lines failing validation, and facts whose news, subject or object is missing, are appended to
+the rejected file with their reasons, each (file, line) once even when a resumed load writes its
+batch again; --restart empties it along with the checkpoint. The appearance counters of the news of
+every batch of facts are recounted once the batch is written.
+
+Usage:
+    python -m bulk_loader.load --input ./dataset --workers 8 --batch-size 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from threading import Lock
+from typing import Dict, List
+
+from bulk_loader.checkpoint import Checkpoint
+
+# exports in loading order: facts reference news and entities
+EXPORTS = [("entities", "entities.jsonl"), ("news", "news.jsonl"), ("facts", "facts.jsonl")]
+
+
+def entity_query(label: str) -> str:
+    return """
+    UNWIND $rows as row
+    MERGE (entity:%s{entityID: row.entityID})
+    SET entity = row
+    """ % label
+
+
+NEWS_QUERY = """
+    UNWIND $rows as row
+    MERGE (news:News{entityID: row.entityID})
+    SET news = row
+    """
+
+
+def facts_query(subject_type: str, object_type: str, location_type: str, relation: str) -> str:
+    from application.utilities.query_templates import relation_type
+    return """
+    UNWIND $rows as row
+    MATCH (news:News{entityID: row.id_news}), (sub:%s{entityID: row.id_subject}), (obj:%s{entityID: row.id_object})
+    MERGE (fact:Fact{entityID: row.id_fact})
+    MERGE (news)-[:HAS_FACT]->(fact)
+    MERGE (fact)-[:%s]->(sub)
+    MERGE (fact)-[:%s]->(obj)
+    WITH fact, row
+    OPTIONAL MATCH (loc:%s{entityID: row.id_location})
+    FOREACH (_ IN CASE WHEN loc IS NOT NULL THEN [1] ELSE [] END | MERGE (fact)-[:OCCURRED_IN]->(loc))
+    WITH fact, row
+    OPTIONAL MATCH (time:Time{entityID: row.id_time})
+    FOREACH (_ IN CASE WHEN time IS NOT NULL THEN [1] ELSE [] END | MERGE (fact)-[:OCCURRED_ON]->(time))
+    RETURN fact.entityID as factID
+    """ % (subject_type, object_type, relation_type("HAS_SUBJECT", relation),
+           relation_type("HAS_OBJECT", relation), location_type)
+
+
+class Progress:
+    """Count written and rejected lines and print the throughput every interval seconds"""
+    def __init__(self, interval: float, stream=sys.stderr):
+        self._interval = interval
+        self._stream = stream
+        self._lock = Lock()
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        self.counts = {}
+
+    def add(self, name: str, written: int, rejected: int):
+        with self._lock:
+            counts = self.counts.setdefault(name, {"written": 0, "rejected": 0})
+            counts["written"] += written
+            counts["rejected"] += rejected
+            now = time.perf_counter()
+            if now - self._last_report >= self._interval:
+                self._last_report = now
+                self._print(name, now)
+
+    def _print(self, name: str, now: float):
+        counts = self.counts[name]
+        elapsed = now - self._start
+        print("%s: %d written, %d rejected, %.0f rows/s" % (name, counts["written"], counts["rejected"],
+                                                            counts["written"] / elapsed if elapsed else 0.0),
+              file=self._stream)
+
+    def report(self) -> Dict:
+        with self._lock:
+            report = {name: dict(counts) for name, counts in self.counts.items()}
+            report["seconds"] = round(time.perf_counter() - self._start, 3)
+            return report
+
+
+class BulkLoader:
+    def __init__(self, dao, checkpoint: Checkpoint, rejected_path: str, workers: int = 4, batch_size: int = 2000,
+                 progress: Progress = None):
+        self.dao = dao
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.batch_size = batch_size
+        self.progress = progress or Progress(interval=5)
+        self._rejected_path = rejected_path
+        self._rejected_lock = Lock()
+        # the lines rejected by the earlier runs, written again by a resumed load
+        self._rejected_lines = set()
+        if os.path.exists(rejected_path):
+            with open(rejected_path, encoding="utf8") as rejected_file:
+                for text in rejected_file:
+                    rejection = json.loads(text)
+                    self._rejected_lines.add((rejection["file"], rejection["line"]))
+
+    def load(self, directory: str) -> Dict:
+        from bulk_loader.records import RecordReader
+        for kind, file_name in EXPORTS:
+            path = os.path.join(directory, file_name)
+            if not os.path.exists(path) or self.checkpoint.is_done(file_name):
+                continue
+            records = RecordReader(kind).read(path, self.checkpoint.position(file_name))
+            self._load_export(kind, file_name, records)
+            self.checkpoint.finish(file_name)
+        return self.progress.report()
+
+    def _load_export(self, kind: str, file_name: str, records):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            try:
+                while True:
+                    batch = list(islice(records, self.batch_size))
+                    if not batch:
+                        break
+                    pending.add(executor.submit(self._write_batch, kind, file_name, batch))
+                    # bound the batches held in memory
+                    if len(pending) >= 2 * self.workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+            finally:
+                done, _ = wait(pending)
+            for future in done:
+                future.result()
+
+    def _write_batch(self, kind: str, file_name: str, batch):
+        rejected = [(record.line, record.errors) for record in batch if record.errors]
+        rows_by_key = {}
+        for record in batch:
+            if record.row is not None:
+                rows_by_key.setdefault(record.key, []).append((record.line, record.row))
+        written = 0
+        for key, lines_rows in rows_by_key.items():
+            rows = [row for _, row in lines_rows]
+            if kind == "entities":
+                self.dao.run_write_query(entity_query(key), rows=rows)
+            elif kind == "news":
+                self.dao.run_write_query(NEWS_QUERY, rows=rows)
+            else:
+                created = set(self.dao.run_write_query(facts_query(*key), rows=rows).value("factID"))
+                missing = [(line, ["the news, the subject or the object of the fact does not exist"])
+                           for line, row in lines_rows if row["id_fact"] not in created]
+                rejected += missing
+                written -= len(missing)
+            written += len(rows)
+        if kind == "facts" and rows_by_key:
+            from application.utilities.appearance_counters import REPAIR_NEWS_QUERY
+            news_ids = {row["id_news"] for lines_rows in rows_by_key.values() for _, row in lines_rows}
+            self.dao.run_write_query(REPAIR_NEWS_QUERY, ids=sorted(news_ids))
+        self._reject(file_name, rejected)
+        self.checkpoint.complete(file_name, batch[0].line, batch[-1].line + 1)
+        self.progress.add(kind, written, len(rejected))
+
+    def _reject(self, file_name: str, rejected: List):
+        if not rejected:
+            return
+        with self._rejected_lock:
+            rejected = [(line, errors) for line, errors in rejected
+                        if (file_name, line + 1) not in self._rejected_lines]
+            if not rejected:
+                return
+            with open(self._rejected_path, "a", encoding="utf8") as rejected_file:
+                for line, errors in rejected:
+                    self._rejected_lines.add((file_name, line + 1))
+                    rejected_file.write(json.dumps({"file": file_name, "line": line + 1, "errors": errors},
+                                                   ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load JSONL exports of entities, news and facts")
+    parser.add_argument("--input", required=True, help="Directory holding entities.jsonl, news.jsonl, facts.jsonl")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel writers")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Lines per UNWIND transaction")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <input>/.bulk_load.checkpoint.json)")
+    parser.add_argument("--rejected", help="File of the rejected lines (default: <input>/rejected.jsonl)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and load from the start")
+    parser.add_argument("--progress-interval", type=float, default=5, help="Seconds between progress lines")
+    parser.add_argument("--skip-schema", action="store_true", help="Do not apply the schema migrations first")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or os.path.join(args.input, ".bulk_load.checkpoint.json")
+    rejected_path = args.rejected or os.path.join(args.input, "rejected.jsonl")
+    if args.restart:
+        # the lines rejected by the earlier runs are rejected again from the start
+        for path in (checkpoint_path, rejected_path):
+            if os.path.exists(path):
+                os.remove(path)
+    # the constraints backing the MERGE lookups are created synchronously below, before loading
+    os.environ.setdefault("SCHEMA_MIGRATE_ON_STARTUP", "false")
+    # the counters of the news written are recounted batch by batch, not all at once in the background
+    os.environ.setdefault("APPEARANCE_REPAIR_ON_STARTUP", "false")
+    from application import dao, schema_manager
+    if not args.skip_schema:
+        status = schema_manager.migrate()
+        if status["errors"]:
+            print(json.dumps(status["errors"]), file=sys.stderr)
+            return 1
+
+    loader = BulkLoader(dao, Checkpoint(checkpoint_path), rejected_path,
+                        workers=args.workers, batch_size=args.batch_size,
+                        progress=Progress(interval=args.progress_interval))
+    try:
+        report = loader.load(args.input)
+    except Exception as error:
+        # the checkpoint holds the batches written before the failure: run again to resume
+        print("Loading stopped: %s" % error, file=sys.stderr)
+        print(json.dumps(loader.progress.report()), file=sys.stderr)
+        return 1
+    finally:
+        dao.close()
+    print(json.dumps(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
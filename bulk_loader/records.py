@@ -0,0 +1,129 @@
+"""
+Streaming reader and validator of the JSONL exports loaded by bulk_loader.load.
+
+entities.jsonl holds one entity per line in the shape of its namespace model plus a ``type``
+property naming its label, news.jsonl one news_model object per line and facts.jsonl one
+fact_model object plus the ``news_id`` of its news per line (see benchmarks.generator.write_jsonl).
+"""
+import datetime
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask_restx import Model
+from jsonschema import Draft4Validator, FormatChecker
+
+from application.agreements.model import agreement_model
+from application.countries.model import country_model
+from application.events.model import event_model
+from application.locations.model import location_model
+from application.news.model import news_model, fact_model
+from application.organizations.model import organization_model
+from application.persons.model import person_model
+from application.times.model import time_model
+
+ENTITY_MODELS = {
+    "Agreement": agreement_model,
+    "Country": country_model,
+    "Event": event_model,
+    "Location": location_model,
+    "Organization": organization_model,
+    "Person": person_model,
+    "Time": time_model,
+}
+
+
+def _validator(name: str, model: Dict) -> Draft4Validator:
+    return Draft4Validator(Model(name, model).__schema__, format_checker=FormatChecker())
+
+
+class Record:
+    """A line of an export: its number, the row to write (None if rejected) and the rejection reasons"""
+    __slots__ = ("line", "key", "row", "errors")
+
+    def __init__(self, line: int, key=None, row: Optional[Dict] = None, errors: List[str] = None):
+        self.line = line
+        self.key = key
+        self.row = row
+        self.errors = errors or []
+
+
+class RecordReader:
+    """
+    Parse and validate the lines of one export. ``key`` groups the rows written by the same query:
+    the label of an entity, the signature of a fact.
+    """
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._entity_validators = {label: _validator(label, model) for label, model in ENTITY_MODELS.items()}
+        self._news_validator = _validator("News", news_model)
+        self._fact_validator = _validator("Fact", fact_model)
+
+    def read(self, path: str, start_line: int = 0) -> Iterator[Record]:
+        with open(path, encoding="utf8") as export:
+            for line_number, line in enumerate(export):
+                if line_number < start_line:
+                    continue
+                if not line.strip():
+                    yield Record(line_number)
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError as error:
+                    yield Record(line_number, errors=["invalid JSON: " + str(error)])
+                    continue
+                if not isinstance(data, dict):
+                    yield Record(line_number, errors=["a line must hold a JSON object"])
+                    continue
+                yield self.parse(line_number, data)
+
+    def parse(self, line_number: int, data: Dict) -> Record:
+        # optional properties exported as null are treated as missing
+        data = {key: value for key, value in data.items() if value is not None}
+        if self.kind == "entities":
+            key, row, errors = self._entity(data)
+        elif self.kind == "news":
+            key, row, errors = self._news(data)
+        else:
+            key, row, errors = self._fact(data)
+        if errors:
+            return Record(line_number, errors=errors)
+        return Record(line_number, key, row)
+
+    @staticmethod
+    def _errors(validator: Draft4Validator, data: Dict) -> List[str]:
+        return ["%s: %s" % (".".join(str(part) for part in error.path) or "object", error.message)
+                for error in validator.iter_errors(data)]
+
+    def _entity(self, data: Dict) -> Tuple[str, Dict, List[str]]:
+        label = data.pop("type", None)
+        if label not in ENTITY_MODELS:
+            return None, None, ["type: %r is not one of %s" % (label, sorted(ENTITY_MODELS))]
+        errors = self._errors(self._entity_validators[label], data)
+        if errors:
+            return None, None, errors
+        row = {key: data[key] for key in ENTITY_MODELS[label] if key in data}
+        if label == "Time":
+            try:
+                row["des"] = datetime.date.fromisoformat(row["des"])
+            except ValueError:
+                return None, None, ["des: %r is not a date" % row["des"]]
+        return label, row, []
+
+    def _news(self, data: Dict) -> Tuple[str, Dict, List[str]]:
+        errors = self._errors(self._news_validator, data)
+        if errors:
+            return None, None, errors
+        return "News", {key: data[key] for key in news_model if key in data}, []
+
+    def _fact(self, data: Dict) -> Tuple[Tuple, Dict, List[str]]:
+        errors = self._errors(self._fact_validator, data)
+        if not isinstance(data.get("news_id"), str):
+            errors.append("news_id: the id of the news of the fact is required")
+        if not errors and data["subject_id"] == data["object_id"] and data["subject_type"] == data["object_type"]:
+            errors.append("Subject and Object cannot be the same entity!")
+        if errors:
+            return None, None, errors
+        signature = (data["subject_type"], data["object_type"], data["location_type"], data["relation"])
+        return signature, {"id_news": data["news_id"], "id_fact": data["entityID"],
+                           "id_subject": data["subject_id"], "id_object": data["object_id"],
+                           "id_location": data.get("location_id"), "id_time": data.get("time_id")}, []
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+# the services run against the in-memory storage backend
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from application.auth.service import AuthService  # noqa: E402
+from application.main import app  # noqa: E402
+from application.utilities.jw_token import encode_auth_token  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    return app.test_client()
+
+
+def _token_headers(username: str, is_admin: bool):
+    token = encode_auth_token(username, is_admin)
+    return {"Authorization": token.decode() if isinstance(token, bytes) else token}
+
+
+@pytest.fixture(scope="session")
+def admin_headers():
+    AuthService.createAdmin("test-admin", "password")
+    return _token_headers("test-admin", True)
+
+
+@pytest.fixture(scope="session")
+def user_headers():
+    AuthService.createUser("test-user", "password")
+    return _token_headers("test-user", False)
@@ -0,0 +1,64 @@
+import datetime
+import time
+from itertools import count
+
+import jwt
+
+from application.auth import service
+from application.settings import SECRET_KEY
+from application.utilities.jw_token import TOKEN_LIFETIME
+from application.utilities.principal_cache import PrincipalCache, RevocationList
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-token-test-%d" % (prefix, next(_ids))
+
+
+def token_headers(username: str, is_admin: bool, age: datetime.timedelta = datetime.timedelta()):
+    issued_at = datetime.datetime.utcnow() - age
+    token = jwt.encode({"exp": issued_at + TOKEN_LIFETIME, "iat": issued_at, "username": username,
+                        "isAdmin": is_admin}, SECRET_KEY, algorithm="HS256")
+    return {"Authorization": token.decode() if isinstance(token, bytes) else token}
+
+
+def create_user(username: str, created_at=None):
+    """A user account as created by an earlier release, or long enough ago for a token to be issued since"""
+    properties = "" if created_at is None else ", createdAt: $created"
+    service.dao.run_write_query("CREATE (usr:User { username: $usr, password: $paswd, isAdmin: $isAd%s }) "
+                                "RETURN usr.username as username" % properties, usr=username, paswd="password",
+                                isAd=False, created=created_at)
+
+
+def another_process(monkeypatch):
+    """The caches of a worker that did not serve the deletion"""
+    monkeypatch.setattr(service, "principal_cache", PrincipalCache(ttl=60))
+    monkeypatch.setattr(service, "revocation_list", RevocationList(lifetime=TOKEN_LIFETIME.total_seconds()))
+
+
+def test_tokens_of_a_deleted_account_are_rejected_by_every_process(client, admin_headers, monkeypatch):
+    username = unique("user")
+    create_user(username, created_at=int(time.time()) - 20)
+    old_token = token_headers(username, False, age=datetime.timedelta(seconds=10))
+    assert client.get("/api/persons/", headers=old_token).status_code == 200
+
+    assert client.delete("/api/auth/user/" + username, headers=admin_headers).status_code == 200
+    assert client.get("/api/persons/", headers=old_token).status_code == 401
+    another_process(monkeypatch)
+    assert client.get("/api/persons/", headers=old_token).status_code == 401
+
+    client.post("/api/auth/user/register", json={"username": username, "password": "password"})
+    another_process(monkeypatch)
+    assert client.get("/api/persons/", headers=old_token).status_code == 401
+    assert client.get("/api/persons/", headers=old_token).status_code == 401
+    assert client.get("/api/persons/", headers=token_headers(username, False)).status_code == 200
+
+
+def test_accounts_created_before_the_creation_time_was_stored_accept_their_tokens(client, monkeypatch):
+    username = unique("user")
+    create_user(username)
+    another_process(monkeypatch)
+
+    assert client.get("/api/persons/", headers=token_headers(username, False, age=datetime.timedelta(days=1))) \
+        .status_code == 200
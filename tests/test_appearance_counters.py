@@ -0,0 +1,55 @@
+from application.utilities.appearance_counters import AppearanceCounterRepair
+from application.utilities.data_access_object import DataAccessObject
+from application.utilities.memory_graph import MemoryBackend
+
+
+def old_database():
+    """A graph written before the counters: a person referred to by a fact, no MENTIONS relationship"""
+    backend = MemoryBackend()
+    graph = backend.graph
+    person = graph.create_node(["Person"], {"entityID": "person", "name": "Person", "des": "Person"})
+    graph.create_node(["Person"], {"entityID": "absent", "name": "Absent", "des": "Absent"})
+    news = graph.create_node(["News"], {"entityID": "news"})
+    fact = graph.create_node(["Fact"], {"entityID": "fact"})
+    graph.create_relationship(news, "HAS_FACT", fact)
+    graph.create_relationship(fact, "HAS_SUBJECT_PERSON", person)
+    return DataAccessObject(backend)
+
+
+def mentions(dao):
+    return [rel.properties["facts"] for rel in dao.backend.graph.relationships.values() if rel.type == "MENTIONS"]
+
+
+def test_entities_are_found_through_their_facts_before_the_first_repair():
+    repair = AppearanceCounterRepair(old_database())
+
+    assert not repair.counters_complete()
+    assert repair.is_in_news("person", "Person")
+    assert not repair.is_in_news("absent", "Person")
+
+
+def test_a_completed_repair_marks_the_counters_complete_in_the_database():
+    dao = old_database()
+    repair = AppearanceCounterRepair(dao, batch_size=1)
+
+    status = repair.repair()
+
+    assert status["state"] == "done" and status["repairedNews"] == 1 and status["countersComplete"]
+    assert mentions(dao) == [1]
+    assert repair.is_in_news("person", "Person")
+    assert not repair.is_in_news("absent", "Person")
+    assert AppearanceCounterRepair(dao).counters_complete()
+
+
+def test_the_startup_repair_runs_only_on_incomplete_counters():
+    dao = old_database()
+    repair = AppearanceCounterRepair(dao)
+    assert repair.repair_in_background(incomplete_only=True)
+    repair.wait()
+    assert repair.status()["state"] == "done" and mentions(dao) == [1]
+
+    restarted = AppearanceCounterRepair(dao)
+    assert restarted.repair_in_background(incomplete_only=True)
+    restarted.wait()
+
+    assert restarted.status()["state"] == "idle" and restarted.status()["repairedNews"] == 0
@@ -0,0 +1,44 @@
+from application.main import app
+from benchmarks.compare import compare_reports
+from benchmarks.endpoints import all_scenarios, run_benchmarks, uncovered_routes
+from benchmarks.stats import percentile, summarize_latencies
+
+
+def test_latencies_are_summarized_with_nearest_rank_percentiles():
+    latencies = [index / 1000 for index in range(1, 101)]
+
+    summary = summarize_latencies(latencies)
+
+    assert percentile([], 50) == 0.0 and percentile([0.5], 99) == 0.5
+    assert (summary["samples"], summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]) == \
+        (100, 50.0, 95.0, 99.0, 100.0)
+    assert summary["throughput_rps"] == round(100 / sum(latencies), 2)
+
+
+def test_every_route_has_a_scenario():
+    scenarios = all_scenarios()
+
+    assert uncovered_routes(app, scenarios) == []
+    assert len({scenario.name for scenario in scenarios}) == len(scenarios)
+
+
+def test_the_scenarios_of_a_namespace_succeed_on_a_generated_dataset():
+    report = run_benchmarks(scale=0.01, iterations=2, warmup=0, seed=7, only=["persons", "news-sets"])
+
+    assert report["meta"]["dataset"]["News"] == 10 and report["meta"]["uncovered_routes"] == []
+    assert {endpoint["route"].split("/")[2] for endpoint in report["endpoints"].values()} == {"persons", "news-sets"}
+    for name, endpoint in report["endpoints"].items():
+        assert endpoint["samples"] == 2
+        assert all(status.startswith("2") for status in endpoint["status_codes"]), name
+
+
+def test_endpoints_slower_than_the_threshold_are_flagged():
+    baseline = {"endpoints": {"a": {"p95_ms": 10.0}, "b": {"p95_ms": 10.0}, "c": {"p95_ms": 0.0}}}
+    candidate = {"endpoints": {"a": {"p95_ms": 12.0}, "b": {"p95_ms": 11.0}, "c": {"p95_ms": 1.0},
+                               "d": {"p95_ms": 1.0}}}
+
+    rows = {row["endpoint"]: row for row in compare_reports(baseline, candidate, "p95_ms", 0.15)}
+
+    assert [name for name, row in sorted(rows.items()) if row["regressed"]] == ["a"]
+    assert rows["b"]["change"] == 0.1
+    assert rows["c"]["change"] is None and rows["d"]["baseline"] is None
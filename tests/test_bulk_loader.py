@@ -0,0 +1,49 @@
+import json
+
+from bulk_loader.checkpoint import Checkpoint
+from bulk_loader.load import BulkLoader, Progress
+
+
+class RecordingDao:
+    """Counts the rows written instead of writing them"""
+    def __init__(self):
+        self.rows = 0
+
+    def run_write_query(self, query, **params):
+        self.rows += len(params["rows"])
+
+
+def write_entities(directory):
+    lines = [{"entityID": "person-%d" % index, "name": "Person", "des": "Person", "type": "Person"}
+             for index in range(4)]
+    lines[1]["type"] = "Unknown"
+    lines[3]["type"] = "Unknown"
+    with open(directory / "entities.jsonl", "w", encoding="utf8") as export:
+        for line in lines:
+            export.write(json.dumps(line) + "\n")
+
+
+def load(directory, dao):
+    loader = BulkLoader(dao, Checkpoint(str(directory / "checkpoint.json")), str(directory / "rejected.jsonl"),
+                        workers=2, batch_size=2, progress=Progress(interval=3600))
+    return loader.load(str(directory))
+
+
+def rejected_lines(directory):
+    with open(directory / "rejected.jsonl", encoding="utf8") as rejected_file:
+        return [(rejection["file"], rejection["line"]) for rejection in map(json.loads, rejected_file)]
+
+
+def test_a_resumed_load_rejects_each_line_once(tmp_path):
+    write_entities(tmp_path)
+    dao = RecordingDao()
+    report = load(tmp_path, dao)
+    assert report["entities"] == {"written": 2, "rejected": 2}
+
+    # the position persisted before the batches written past it
+    with open(tmp_path / "checkpoint.json", "w", encoding="utf8") as checkpoint_file:
+        json.dump({"entities.jsonl": {"line": 0, "done": False}}, checkpoint_file)
+    load(tmp_path, dao)
+
+    assert dao.rows == 4
+    assert sorted(rejected_lines(tmp_path)) == [("entities.jsonl", 2), ("entities.jsonl", 4)]
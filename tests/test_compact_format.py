@@ -0,0 +1,99 @@
+import json
+from itertools import count
+
+from neo4j.types.graph import Graph
+
+from application.news.service import NewsService
+from application.persons.service import PersonService
+from application.utilities.graph import graph_entity_ids, merge_subgraph_documents, serialize_subgraph_to_dict, \
+    serialize_subgraphs_to_dict
+from application.utilities.json_converter import converter
+from benchmarks.serializer import build_graphs
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-compact-test-%d" % (prefix, next(_ids))
+
+
+def encoded(value) -> str:
+    return json.dumps(value, sort_keys=True, default=converter)
+
+
+def browser_elements(document):
+    graph = document["results"][0]["data"][0]["graph"]
+    nodes = sorted((node["id"], sorted(node["labels"]), encoded(node["properties"])) for node in graph["nodes"])
+    relationships = sorted((relation["id"], relation["startNode"], relation["endNode"], relation["type"],
+                            encoded(relation["properties"])) for relation in graph["relationships"])
+    return nodes, relationships
+
+
+def compact_elements(document):
+    """The nodes and relationships of a compact document, as browser_elements lists them"""
+    labels, types, nodes, relationships = document["labels"], document["types"], document["nodes"], \
+        document["relationships"]
+    node_ids = nodes["id"]
+    return sorted((node_id, sorted(labels[index] for index in indices), encoded(properties))
+                  for node_id, indices, properties in zip(node_ids, nodes["labels"], nodes["properties"])), \
+        sorted((relation_id, node_ids[start], node_ids[end], types[relation_type],
+                encoded(relationships["properties"].get(str(position), {})))
+               for position, (relation_id, start, end, relation_type)
+               in enumerate(zip(relationships["id"], relationships["start"], relationships["end"],
+                                relationships["type"])))
+
+
+def test_the_compact_format_holds_the_same_nodes_and_relationships():
+    graph = build_graphs(facts=100, entities=30, parts=1, seed=5)[0]
+
+    compact = serialize_subgraph_to_dict(graph, compact=True)
+
+    assert compact["format"] == "compact" and compact["errors"] == []
+    assert len(compact["labels"]) == len(set(compact["labels"]))
+    assert len(compact["types"]) == len(set(compact["types"]))
+    assert compact_elements(compact) == browser_elements(serialize_subgraph_to_dict(graph))
+
+
+def test_unions_and_merged_documents_keep_each_element_once():
+    graphs = build_graphs(facts=300, entities=40, parts=3, seed=6)
+    documents = [serialize_subgraph_to_dict(graph) for graph in graphs]
+
+    union = browser_elements(serialize_subgraphs_to_dict(graphs))
+
+    assert compact_elements(serialize_subgraphs_to_dict(graphs, compact=True)) == union
+    assert browser_elements(merge_subgraph_documents(documents)) == union
+    assert compact_elements(merge_subgraph_documents(documents, compact=True)) == union
+
+
+def test_relationship_properties_are_kept_by_position():
+    graph = Graph()
+    news = graph.put_node(0, ("News",), {"entityID": "news"})
+    person = graph.put_node(1, ("Person",), {"entityID": "person"})
+    fact = graph.put_node(2, ("Fact",), {"entityID": "fact"})
+    graph.put_relationship(10, news, fact, graph.relationship_type("HAS_FACT"), {})
+    graph.put_relationship(11, news, person, graph.relationship_type("MENTIONS"), {"facts": 2})
+
+    compact = serialize_subgraph_to_dict(graph, compact=True)
+
+    position = compact["relationships"]["id"].index("11")
+    assert compact["relationships"]["properties"] == {str(position): {"facts": 2}}
+    assert compact_elements(compact) == browser_elements(serialize_subgraph_to_dict(graph))
+
+
+def test_graph_requests_answer_in_the_compact_format(client, user_headers):
+    news_id, people = unique("news"), [unique("person") for _ in range(2)]
+    NewsService.create({"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]})
+    for person_id in people:
+        PersonService.create({"entityID": person_id, "name": "Person", "des": "Person"})
+    NewsService.create_fact(news_id, {"entityID": unique("fact"), "relation": "gặp gỡ", "subject_id": people[0],
+                                      "subject_type": "Person", "object_id": people[1], "object_type": "Person",
+                                      "location_id": None, "location_type": "Location", "time_id": None,
+                                      "time_type": "Time"})
+    url = "/api/news/%s/relations" % news_id
+
+    graph = client.get(url, headers=user_headers).get_json()
+    compact = client.get(url + "?format=compact", headers=user_headers).get_json()
+
+    assert compact_elements(compact) == browser_elements(graph)
+    assert sorted(graph_entity_ids(compact)) == sorted(graph_entity_ids(graph))
+    assert client.get(url + "?format=columns", headers=user_headers).status_code == 400
@@ -0,0 +1,119 @@
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response
+from werkzeug.datastructures import Accept
+
+from application.utilities.compression import ResponseCompressor
+
+LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+BODY = b'{"value":"' + b"m\xc3\xb4 t\xe1\xba\xa3 " * 500 + b'"}'
+
+
+class Chunks:
+    """A streamed body remembering whether it was closed"""
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def application(compressor: ResponseCompressor, chunks: Chunks = None):
+    app = Flask(__name__)
+
+    @app.route("/large")
+    def large():
+        return Response(BODY, mimetype="application/json")
+
+    @app.route("/small")
+    def small():
+        return Response(b'{"value":1}', mimetype="application/json")
+
+    @app.route("/page")
+    def page():
+        return Response(BODY, mimetype="text/plain")
+
+    @app.route("/stream")
+    def stream():
+        return Response(chunks, mimetype="application/x-ndjson")
+
+    compressor.init_app(app)
+    return app.test_client()
+
+
+def test_the_preferred_available_encoding_is_chosen():
+    compressor = ResponseCompressor(["zstd", "br", "gzip"], LEVELS)
+    available = list(compressor.codecs)
+
+    assert available[-1] == "gzip"
+    assert compressor.negotiate(Accept([("gzip", 1), ("deflate", 1)])) == "gzip"
+    assert compressor.negotiate(Accept([("gzip", 1)] + [(name, 0.5) for name in available[:-1]])) == "gzip"
+    assert compressor.negotiate(Accept([(name, 1) for name in reversed(available)])) == available[0]
+    assert compressor.negotiate(Accept([("deflate", 1)])) is None
+
+
+def test_buffered_bodies_are_compressed_from_the_minimum_size():
+    compressor = ResponseCompressor(["gzip"], LEVELS, min_size=1024, mimetypes=["application/json"])
+    client = application(compressor)
+
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    page = client.get("/page", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/large")
+
+    assert large.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in large.headers["Vary"]
+    assert gzip.decompress(large.get_data()) == BODY
+    assert "Content-Encoding" not in small.headers and "Content-Encoding" not in page.headers
+    assert identity.get_data() == BODY
+    statistics = compressor.statistics.snapshot()
+    assert statistics["uncompressedResponses"] == 2
+    assert statistics["algorithms"]["gzip"]["responses"] == 1
+    assert statistics["algorithms"]["gzip"]["bytesIn"] == len(BODY)
+    assert statistics["algorithms"]["gzip"]["ratio"] > 1
+
+
+def test_streams_are_compressed_in_blocks_each_decodable_on_arrival():
+    chunks = Chunks(['{"line":%d}\n' % number for number in range(300)])
+    compressor = ResponseCompressor(["gzip"], LEVELS, min_size=512, mimetypes=["application/x-ndjson"])
+    client = application(compressor, chunks)
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    blocks = list(response.response)
+    response.close()
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded = [decompressor.decompress(block) for block in blocks]
+    assert len(blocks) > 2 and all(decoded[:-1])
+    assert b"".join(decoded) == "".join(chunks.chunks).encode("utf8")
+    assert chunks.closed and "Content-Length" not in response.headers
+    assert compressor.statistics.snapshot()["algorithms"]["gzip"]["bytesIn"] == len(b"".join(decoded))
+
+
+@pytest.mark.parametrize("algorithm, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_algorithms_are_used_when_installed(algorithm, module):
+    package = pytest.importorskip(module)
+    compressor = ResponseCompressor([algorithm, "gzip"], LEVELS, mimetypes=["application/json"])
+
+    response = application(compressor).get("/large", headers={"Accept-Encoding": "gzip, " + algorithm})
+
+    assert response.headers["Content-Encoding"] == algorithm
+    if algorithm == "br":
+        assert package.decompress(response.get_data()) == BODY
+    else:
+        assert package.ZstdDecompressor().decompressobj().decompress(response.get_data()) == BODY
+
+
+def test_the_statistics_are_reported_to_admins(client, admin_headers):
+    client.get("/api/persons/?limit=1000", headers=dict(admin_headers, **{"Accept-Encoding": "gzip"}))
+
+    statistics = client.get("/api/admin/compression", headers=admin_headers).get_json()
+
+    assert set(statistics) == {"algorithms", "uncompressedResponses"}
+    assert client.delete("/api/admin/compression", headers=admin_headers).status_code == 200
+    assert client.get("/api/admin/compression", headers=admin_headers).get_json()["algorithms"] == {}
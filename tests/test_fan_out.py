@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from itertools import count
+
+import pytest
+from werkzeug.exceptions import GatewayTimeout
+
+from application.news.service import NewsService
+from application.persons.service import PersonService
+from application.utilities import fan_out as fan_out_module
+from application.utilities.fan_out import QueryFanOut, batches
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-fan-out-test-%d" % (prefix, next(_ids))
+
+
+class Reads:
+    """A read recording the chunks it was given, the threads running it and the most run at once"""
+    def __init__(self, seconds: float = 0.0, slow: int = None):
+        self.seconds = seconds
+        self.slow = slow
+        self.chunks = []
+        self.threads = set()
+        self.running = self.most_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, chunk):
+        with self._lock:
+            self.chunks.append(chunk)
+            self.threads.add(threading.get_ident())
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(self.seconds * (10 if chunk[0] == self.slow else 1))
+        with self._lock:
+            self.running -= 1
+        return sum(chunk)
+
+
+def test_items_are_split_in_order():
+    assert batches(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert batches([], 2) == []
+
+
+def test_chunks_are_read_concurrently_and_returned_in_order():
+    fan_out = QueryFanOut(max_workers=3, chunk_size=2)
+    reads = Reads(seconds=0.02)
+
+    results = fan_out.map(reads, list(range(11)))
+
+    assert results == [1, 5, 9, 13, 17, 10]
+    assert reads.most_running == 3
+    statistics = fan_out.statistics.snapshot()
+    assert (statistics["fanOuts"], statistics["maxChunks"], statistics["chunks"]) == (1, 6, 6)
+    assert statistics["p50Ms"] >= 20
+
+
+def test_a_single_chunk_is_read_on_the_calling_thread():
+    reads = Reads()
+
+    assert QueryFanOut(chunk_size=10).map(reads, [1, 2, 3]) == [6]
+    assert reads.threads == {threading.get_ident()}
+
+
+def test_a_slow_chunk_fails_the_read_and_cancels_the_chunks_not_started():
+    fan_out = QueryFanOut(max_workers=1, chunk_size=1, chunk_timeout=0.1)
+    reads = Reads(seconds=0.03, slow=1)
+
+    with pytest.raises(GatewayTimeout):
+        fan_out.map(reads, [0, 1, 2, 3])
+
+    assert [chunk[0] for chunk in reads.chunks] == [0, 1]
+    assert fan_out.statistics.snapshot()["timeouts"] == 1
+
+
+def test_the_timeout_of_a_chunk_starts_with_its_read():
+    fan_out = QueryFanOut(max_workers=1, chunk_size=1, chunk_timeout=0.1)
+
+    assert fan_out.map(Reads(seconds=0.04), [0, 1, 2, 3, 4]) == [0, 1, 2, 3, 4]
+
+
+def test_a_failing_chunk_fails_the_read():
+    fan_out = QueryFanOut(max_workers=2, chunk_size=1)
+
+    def read(chunk):
+        if chunk == [2]:
+            raise ValueError("chunk 2")
+        return chunk
+
+    with pytest.raises(ValueError):
+        fan_out.map(read, [0, 1, 2, 3])
+    assert fan_out.statistics.snapshot()["failures"] == 1
+
+
+def test_coroutines_are_fanned_out_in_the_event_loop():
+    fan_out = QueryFanOut(max_workers=2, chunk_size=2, chunk_timeout=0.1)
+
+    async def read(chunk):
+        await asyncio.sleep(0.3 if chunk == [9] else 0.01)
+        return sum(chunk)
+
+    assert asyncio.run(fan_out.map_async(read, [1, 2, 3, 4, 5])) == [3, 7, 5]
+    with pytest.raises(GatewayTimeout):
+        asyncio.run(fan_out.map_async(read, [9]))
+    assert fan_out.statistics.snapshot()["timeouts"] == 1
+
+
+def test_reads_over_a_set_of_news_give_the_same_answer_whatever_the_chunks(client, user_headers, monkeypatch):
+    person_id, other_id = unique("person"), unique("person")
+    for entity_id in [person_id, other_id]:
+        PersonService.create({"entityID": entity_id, "name": "Person", "des": "Person"})
+    news = [unique("news") for _ in range(5)]
+    for news_id in news:
+        NewsService.create({"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]})
+        NewsService.create_fact(news_id, {"entityID": unique("fact"), "relation": "gặp gỡ",
+                                          "subject_id": person_id, "subject_type": "Person",
+                                          "object_id": other_id, "object_type": "Person", "location_id": None,
+                                          "location_type": "Location", "time_id": None, "time_type": "Time"})
+
+    def read():
+        appearance = client.post("/api/news/appearance/" + person_id, json={"set_news_id": news},
+                                 headers=user_headers).get_json()
+        relations = client.post("/api/news/relations?format=compact", json={"set_news_id": news},
+                                headers=user_headers).get_json()
+        return appearance["numberAppearance"], sorted(relations["nodes"]["id"])
+
+    whole = read()
+    monkeypatch.setattr(fan_out_module.query_fan_out, "chunk_size", 2)
+    chunks = fan_out_module.query_fan_out.statistics.snapshot()["chunks"]
+
+    assert read() == whole and whole[0] == 5 and len(whole[1]) == 7
+    assert fan_out_module.query_fan_out.statistics.snapshot()["chunks"] >= chunks + 3
@@ -0,0 +1,52 @@
+from itertools import count
+from urllib.parse import urlsplit
+
+from application.utilities import fulltext
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-search-test-%d" % (prefix, next(_ids))
+
+
+def create_persons(client, headers, word: str):
+    """Five persons named after word, two pairs of them with the same score"""
+    for padding in [0, 1, 1, 2, 2]:
+        client.post("/api/persons/", json={"entityID": unique("person"), "name": word,
+                                           "des": " ".join([word] + ["khác"] * padding)}, headers=headers)
+
+
+def search(client, headers, word: str, limit: int):
+    url, hits = "/api/persons/search?limit=%d" % limit, []
+    while url:
+        page = client.post(url, json={"text": word}, headers=headers).get_json()
+        hits += page["data"]
+        url = page["next"] and urlsplit(page["next"]).path + "?" + urlsplit(page["next"]).query
+    return hits, page
+
+
+def test_hits_are_paged_by_score_then_id(client, admin_headers, user_headers):
+    word = unique("tìm").replace("-", "")
+    create_persons(client, admin_headers, word)
+
+    everything = client.post("/api/persons/search?start=0&limit=10", json={"text": word},
+                             headers=user_headers).get_json()["data"]
+    hits, last_page = search(client, user_headers, word, limit=2)
+
+    assert [hit["entityID"] for hit in hits] == [hit["entityID"] for hit in everything]
+    assert len(hits) == 5
+    assert [(-hit["score"], hit["entityID"]) for hit in hits] == sorted((-hit["score"], hit["entityID"])
+                                                                         for hit in hits)
+    assert last_page["total"] == 5 and last_page["totalExact"]
+
+
+def test_only_the_first_hits_are_counted_and_paged(client, admin_headers, user_headers, monkeypatch):
+    word = unique("giới").replace("-", "")
+    create_persons(client, admin_headers, word)
+    monkeypatch.setattr(fulltext, "SEARCH_MAX_HITS", 3)
+
+    hits, last_page = search(client, user_headers, word, limit=2)
+
+    assert len(hits) == 3
+    assert last_page["total"] == 3 and not last_page["totalExact"]
@@ -0,0 +1,56 @@
+from collections import Counter
+
+from application.utilities.memory_graph import MemoryGraph
+from benchmarks.generator import RELATION_SIGNATURES, NewsGraphGenerator, load_into_memory, write_jsonl
+from bulk_loader.records import RecordReader
+
+
+def facts(generator: NewsGraphGenerator):
+    return [fact for _, news_facts in generator.news() for fact in news_facts]
+
+
+def test_the_dataset_depends_on_the_seed_only():
+    assert list(NewsGraphGenerator(scale=0.02, seed=1).news()) == list(NewsGraphGenerator(scale=0.02, seed=1).news())
+    assert list(NewsGraphGenerator(scale=0.02, seed=1).news()) != list(NewsGraphGenerator(scale=0.02, seed=2).news())
+
+
+def test_facts_follow_the_signatures_of_their_relation():
+    generator = NewsGraphGenerator(scale=0.05, seed=3)
+    ids = {label: set(generator.entity_ids(label)) for label in generator.entity_counts}
+
+    for fact in facts(generator):
+        subject_types, object_types = RELATION_SIGNATURES[fact["relation"]]
+        assert fact["subject_type"] in subject_types and fact["object_type"] in object_types
+        assert fact["subject_id"] in ids[fact["subject_type"]] and fact["object_id"] in ids[fact["object_type"]]
+        assert (fact["subject_type"], fact["subject_id"]) != (fact["object_type"], fact["object_id"])
+        assert fact["location_id"] is None or fact["location_id"] in ids[fact["location_type"]]
+
+
+def test_a_few_entities_appear_in_most_facts():
+    generator = NewsGraphGenerator(scale=0.2, seed=5)
+    people = Counter(fact["subject_id"] for fact in facts(generator) if fact["subject_type"] == "Person")
+
+    most_common = sum(count for _, count in people.most_common(len(generator.entity_ids("Person")) // 20))
+
+    assert most_common > sum(people.values()) / 2
+
+
+def test_news_mention_every_entity_their_facts_refer_to():
+    graph = MemoryGraph()
+    report = load_into_memory(graph, NewsGraphGenerator(scale=0.02, seed=9))
+
+    assert report["news"] == 20 and report["facts"] == len(graph.nodes_by_label("Fact"))
+    for news in graph.nodes_by_label("News"):
+        references = Counter(rel.end.id for fact_rel in news.outgoing.values() if fact_rel.type == "HAS_FACT"
+                             for rel in fact_rel.end.outgoing.values())
+        mentions = {rel.end.id: rel.properties["facts"] for rel in news.outgoing.values() if rel.type == "MENTIONS"}
+        assert mentions == dict(references)
+
+
+def test_the_jsonl_exports_are_accepted_by_the_bulk_loader(tmp_path):
+    report = write_jsonl(str(tmp_path), NewsGraphGenerator(scale=0.02, seed=11))
+
+    for kind, count in [("entities", report["entities"]), ("news", report["news"]), ("facts", report["facts"])]:
+        records = list(RecordReader(kind).read(str(tmp_path / (kind + ".jsonl"))))
+        assert len(records) == count
+        assert [record.errors for record in records if record.errors] == []
@@ -0,0 +1,47 @@
+import json
+
+from neo4j.types.graph import Graph
+from neo4j.types.temporal import Date
+
+from application.utilities.graph import serialize_node_to_dict, serialize_subgraph_to_dict, \
+    serialize_subgraphs_to_dict
+from application.utilities.json_converter import converter
+from benchmarks.serializer import build_graphs, legacy_serialize_node_to_dict, legacy_serialize_subgraph_to_dict, \
+    legacy_serialize_subgraphs_to_dict
+
+
+def encoded(document) -> str:
+    return json.dumps(document, sort_keys=True, default=converter)
+
+
+def node(graph: Graph, node_id: int, label: str, **properties):
+    return graph.put_node(node_id, (label,), dict(properties, entityID="%s-%d" % (label.lower(), node_id)))
+
+
+def test_the_description_of_a_time_is_written_as_text_whatever_its_type():
+    graph = Graph()
+    nodes = [node(graph, 0, "Time", des=Date(2015, 1, 1)),
+             node(graph, 1, "Time", des=2015),
+             node(graph, 2, "Time", des=["2015", Date(2016, 2, 2)]),
+             node(graph, 3, "Time", des=[Date(2015, 1, 1), 2016])]
+
+    serialized = [serialize_node_to_dict(time)["properties"]["des"] for time in nodes]
+
+    assert serialized == ["2015-01-01", "2015", ["2015", "2016-02-02"], ["2015-01-01", "2016"]]
+    assert serialized == [legacy_serialize_node_to_dict(time)["properties"]["des"] for time in nodes]
+
+
+def test_temporal_values_in_lists_are_converted_one_by_one():
+    graph = Graph()
+    person = node(graph, 0, "Person", des="Person", born=[1990, Date(1990, 1, 1)])
+
+    assert serialize_node_to_dict(person)["properties"] == {"des": "Person", "born": [1990, "1990-01-01"]}
+    assert encoded(serialize_node_to_dict(person)) == encoded(legacy_serialize_node_to_dict(person))
+
+
+def test_subgraphs_are_serialized_as_before():
+    graphs = build_graphs(facts=300, entities=70, parts=3, seed=3)
+
+    assert encoded(serialize_subgraph_to_dict(graphs[0])) == encoded(legacy_serialize_subgraph_to_dict(graphs[0]))
+    assert encoded(serialize_subgraphs_to_dict(graphs)) == encoded(legacy_serialize_subgraphs_to_dict(graphs))
+
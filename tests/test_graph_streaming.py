@@ -0,0 +1,93 @@
+import json
+from itertools import count
+
+from neo4j import Record
+
+from application.news.service import NewsService
+from application.persons.service import PersonService
+from application.utilities import graph as graph_module
+from application.utilities.graph import serialize_subgraph_to_dict, stream_subgraph_json, stream_subgraph_ndjson
+from benchmarks.serializer import build_graphs
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-stream-test-%d" % (prefix, next(_ids))
+
+
+def records(graph):
+    for relation in graph.relationships:
+        yield Record(zip(["facts", "rel", "entity"], [relation.start_node, relation, relation.end_node]))
+
+
+def failing(graph):
+    for number, record in enumerate(records(graph)):
+        if number == 5:
+            raise RuntimeError("connection lost")
+        yield record
+
+
+def elements(document):
+    graph = document["results"][0]["data"][0]["graph"]
+    return sorted(graph["nodes"], key=lambda node: node["id"]), \
+        sorted(graph["relationships"], key=lambda relation: relation["id"])
+
+
+def test_the_json_stream_is_the_buffered_document():
+    graph = build_graphs(facts=200, entities=50, parts=1, seed=1)[0]
+
+    streamed = json.loads("".join(stream_subgraph_json(records(graph))))
+
+    assert streamed["errors"] == []
+    assert elements(streamed) == elements(serialize_subgraph_to_dict(graph))
+
+
+def test_nodes_past_the_spool_size_are_read_back_from_the_temporary_file(monkeypatch):
+    graph = build_graphs(facts=200, entities=50, parts=1, seed=2)[0]
+    buffered = "".join(stream_subgraph_json(records(graph)))
+    monkeypatch.setattr(graph_module, "NODE_SPOOL_SIZE", 64)
+    monkeypatch.setattr(graph_module, "NODE_CHUNK_SIZE", 100)
+
+    chunks = list(stream_subgraph_json(records(graph)))
+
+    assert "".join(chunks) == buffered
+    assert max(len(chunk) for chunk in chunks[chunks.index('],"nodes":[') + 1:-1]) == 100
+
+
+def test_a_failure_once_started_ends_the_stream_with_an_error():
+    graph = build_graphs(facts=50, entities=20, parts=1, seed=3)[0]
+
+    document = json.loads("".join(stream_subgraph_json(failing(graph))))
+    lines = [json.loads(line) for line in stream_subgraph_ndjson(failing(graph))]
+
+    assert document["errors"] == [{"message": "connection lost"}]
+    assert len(document["results"][0]["data"][0]["graph"]["relationships"]) == 5
+    assert lines[-1] == {"error": {"message": "connection lost"}}
+    assert sum("relationship" in line for line in lines) == 5
+
+
+def test_the_relations_of_a_news_are_streamed_as_asked(client, user_headers):
+    news_id, people = unique("news"), [unique("person") for _ in range(3)]
+    NewsService.create({"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]})
+    for person_id in people:
+        PersonService.create({"entityID": person_id, "name": "Person", "des": "Person"})
+    for subject_id, object_id in [people[:2], people[1:]]:
+        NewsService.create_fact(news_id, {"entityID": unique("fact"), "relation": "gặp gỡ",
+                                          "subject_id": subject_id, "subject_type": "Person",
+                                          "object_id": object_id, "object_type": "Person", "location_id": None,
+                                          "location_type": "Location", "time_id": None, "time_type": "Time"})
+    url = "/api/news/%s/relations" % news_id
+
+    buffered = client.get(url, headers=user_headers).get_json()
+    streamed = client.get(url + "?stream=json", headers=user_headers)
+    negotiated = client.get(url, headers=dict(user_headers, Accept="application/x-ndjson"))
+
+    assert streamed.is_streamed and elements(json.loads(streamed.get_data())) == elements(buffered)
+    assert negotiated.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in negotiated.get_data(as_text=True).splitlines()]
+    assert sorted(line["node"]["id"] for line in lines if "node" in line) == \
+        [node["id"] for node in elements(buffered)[0]]
+    assert sum("relationship" in line for line in lines) == len(buffered["results"][0]["data"][0]["graph"]
+                                                                ["relationships"]) == 4
+    assert client.get(url + "?stream=ndjson&format=compact", headers=user_headers).status_code == 400
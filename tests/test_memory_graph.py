@@ -0,0 +1,346 @@
+"""
+The statements the memory backend recognises, one test per shape, written as the services send them
+"""
+import pytest
+from neo4j import CypherError
+
+from application.news.service import APPEARANCE_IN_NEWS, APPEARANCE_IN_SET_NEWS, EXISTING_IDS, \
+    INDIVIDUAL_RELATIONS_BY_NEWS, INDIVIDUAL_RELATIONS_IN_NEWS, RELATIONS_BY_NEWS, TYPE_RELATIONS_BY_NEWS
+from application.news_sets.service import ADD_MEMBERS_QUERY, MEMBERS_PAGE_QUERY
+from application.utilities.appearance_counters import MARK_COMPLETE_QUERY, REFERENCED_QUERIES, \
+    REPAIR_ENTITY_QUERIES, REPAIR_NEWS_QUERY
+from application.utilities.entity_labels import RESOLVE_LABELS_QUERY
+from application.utilities.memory_graph import MemoryBackend
+from application.utilities.query_templates import CREATE_FACT_QUERIES, CREATE_FACTS_QUERIES
+from application.utilities.schema_manager import NEWS_INDEX, _duplicates, _fulltext_index, _unique_constraint
+
+MEETS = ("Person", "Person", "Location", "gặp gỡ")
+ENTITY_PROJECTION = "per.entityID as entityID, per.name as name, per.des as description"
+
+
+@pytest.fixture
+def backend():
+    """Two people meeting in a news n1, the first meeting an organization in n2"""
+    backend = MemoryBackend()
+    for label, entity_id, name in [("Person", "p1", "Nguyễn Văn A"), ("Person", "p2", "Trần Văn B"),
+                                   ("Organization", "o1", "Liên hợp quốc"), ("Location", "l1", "Hà Nội")]:
+        backend.run_write_query("CREATE (entity:%s $props) RETURN entity.entityID as entityID" % label,
+                                props={"entityID": entity_id, "name": name, "des": name + " mô tả"})
+    for news_id in ["n1", "n2"]:
+        backend.run_write_query("CREATE (news:News $props) RETURN news.entityID as entityID",
+                                props={"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]})
+    backend.run_write_query(CREATE_FACT_QUERIES[MEETS], id_news="n1", id_fact="f1", id_subject="p1",
+                            id_object="p2", id_location="l1", id_time=None)
+    backend.run_write_query(CREATE_FACT_QUERIES[("Person", "Organization", "Location", "gặp gỡ")], id_news="n2",
+                            id_fact="f2", id_subject="p1", id_object="o1", id_location=None, id_time=None)
+    return backend
+
+
+def mentions(backend, news_id):
+    news = backend.graph.find_one("News", {"entityID": news_id})
+    return {rel.end.properties["entityID"]: rel.properties["facts"] for rel in news.outgoing.values()
+            if rel.type == "MENTIONS"}
+
+
+def test_statements_are_normalised_before_dispatch():
+    assert MemoryBackend.normalize("""
+        MATCH (news:News{entityID: $id})
+        USING INDEX news:News(entityID)
+        RETURN news.entityID as id
+        """) == "MATCH(news:News{entityID:$id}) RETURN news.entityID as id"
+
+
+def test_unknown_statements_raise_a_syntax_error(backend):
+    with pytest.raises(CypherError) as error:
+        backend.run_read_query("MATCH (a)-[*]->(b) RETURN a")
+    assert error.value.code == "Neo.ClientError.Statement.SyntaxError"
+
+
+def test_indexes_and_constraints_are_created_listed_and_dropped(backend):
+    backend.run_write_query(NEWS_INDEX)
+    backend.run_write_query(_unique_constraint("person_entity_id", "Person", "entityID"))
+    backend.run_write_query(_fulltext_index("personsFullTextSearch", "Person"))
+    with pytest.raises(CypherError) as error:
+        backend.run_write_query(NEWS_INDEX)
+    assert error.value.code == "Neo.ClientError.Schema.EquivalentSchemaRuleAlreadyExists"
+
+    indexes = {index["name"]: index for index in backend.run_read_query("CALL db.indexes()").data()}
+    assert indexes["person_entity_id"]["uniqueness"] == "UNIQUE"
+    assert indexes["personsFullTextSearch"]["properties"] == ["name", "des"]
+
+    backend.run_write_query("DROP INDEX index_news")
+    assert "index_news" not in [index["name"] for index in backend.run_read_query("CALL db.indexes()").data()]
+    with pytest.raises(CypherError):
+        backend.run_write_query("DROP INDEX index_news")
+
+
+def test_duplicated_keys_are_reported(backend):
+    backend.run_write_query("CREATE (entity:Person $props) RETURN entity.entityID as entityID",
+                            props={"entityID": "p1", "name": "Copy"})
+
+    assert backend.run_read_query(_duplicates("Person", "entityID")).data() == [{"value": "p1", "nodes": 2}]
+    assert backend.run_read_query(_duplicates("News", "entityID")).data() == []
+
+
+def test_rows_are_created_and_matched_by_id(backend):
+    backend.run_write_query("UNWIND $rows as row CREATE (news:News) SET news = row",
+                            rows=[{"entityID": "n3"}, {"entityID": "n4"}])
+
+    assert backend.run_read_query(EXISTING_IDS["News"], ids=["n1", "n3", "n5"]).value("entityID") == ["n1", "n3"]
+
+
+def test_labels_are_resolved_from_an_id(backend):
+    assert backend.run_read_query(RESOLVE_LABELS_QUERY, id_entity="o1").value("label") == ["Organization"]
+    assert backend.run_read_query(RESOLVE_LABELS_QUERY, id_entity="missing").value("label") == []
+
+
+def test_a_single_node_is_merged_and_set(backend):
+    first = backend.run_write_query(MARK_COMPLETE_QUERY, complete=False).data()
+    second = backend.run_write_query(MARK_COMPLETE_QUERY, complete=True).data()
+
+    assert first == [{"complete": False}] and second == [{"complete": True}]
+    assert len(backend.graph.nodes_by_label("AppearanceCounters")) == 1
+
+
+def test_fulltext_hits_are_paged_by_score_and_id(backend):
+    backend.run_write_query("CREATE (entity:Person $props) RETURN entity.entityID as entityID",
+                            props={"entityID": "p3", "name": "Văn", "des": "Văn"})
+    query = "CALL db.index.fulltext.queryNodes('personsFullTextSearch', $text) YIELD node, score " \
+            "WITH node, score LIMIT $max_hits " \
+            "RETURN node.entityID as entityID, node.name as name, node.des as description, score " \
+            "ORDER BY score DESC, node.entityID SKIP $start LIMIT $limit"
+    after = "CALL db.index.fulltext.queryNodes('personsFullTextSearch', $text) YIELD node, score " \
+            "WITH node, score LIMIT $max_hits " \
+            "WHERE score < $score OR (score = $score AND node.entityID > $after) " \
+            "RETURN node.entityID as entityID, node.name as name, node.des as description, score " \
+            "ORDER BY score DESC, node.entityID LIMIT $limit"
+
+    first = backend.run_read_query(query, text="văn", max_hits=10, start=0, limit=2).data()
+    rest = backend.run_read_query(after, text="văn", max_hits=10, score=first[-1]["score"],
+                                  after=first[-1]["entityID"], limit=2).data()
+
+    assert [hit["entityID"] for hit in first + rest] == ["p3", "p1", "p2"]
+    assert first[0]["score"] > first[1]["score"] == rest[0]["score"]
+
+
+def test_fulltext_hits_are_counted_up_to_the_maximum(backend):
+    query = "CALL db.index.fulltext.queryNodes('personsFullTextSearch', $text) YIELD node " \
+            "WITH node LIMIT $max_hits RETURN count(node) as total"
+
+    assert backend.run_read_query(query, text="văn", max_hits=10).single()["total"] == 2
+    assert backend.run_read_query(query, text="văn", max_hits=1).single()["total"] == 1
+
+
+def test_nodes_are_paged_by_offset_and_by_id(backend):
+    by_offset = """
+        MATCH (per:Person)
+        RETURN %s
+        ORDER BY per.entityID
+        SKIP $start
+        LIMIT $limit
+        """ % ENTITY_PROJECTION
+    by_id = """
+        MATCH (per:Person)
+        WHERE per.entityID > $after
+        RETURN %s
+        ORDER BY per.entityID
+        LIMIT $limit
+        """ % ENTITY_PROJECTION
+
+    assert backend.run_read_query(by_offset, start=1, limit=5).value("entityID") == ["p2"]
+    assert backend.run_read_query(by_id, after="p1", limit=5).value("entityID") == ["p2"]
+
+
+def test_nodes_are_searched_by_contained_text(backend):
+    query = """
+        MATCH(news:News)
+        WHERE news.link CONTAINS $property AND news.entityID > $after
+        RETURN news.entityID as entityID, news.link as link, news.topics as topics
+        ORDER BY news.entityID
+        LIMIT $limit
+        """
+    either = """
+        MATCH(entity:Person)
+        WHERE (entity.des CONTAINS $property OR entity.name CONTAINS $property)
+        RETURN entity.entityID as entityID
+        ORDER BY entity.entityID
+        SKIP $start
+        LIMIT $limit
+        """
+
+    assert backend.run_read_query(query, property="http", after="n1", limit=10).value("entityID") == ["n2"]
+    assert backend.run_read_query(either, property="Trần", start=0, limit=10).value("entityID") == ["p2"]
+
+
+def test_entities_are_searched_by_type_and_description(backend):
+    query = """
+        MATCH(entity)
+        WHERE any( label IN labels(entity) WHERE label IN $type_entity) AND entity.des CONTAINS $property
+        RETURN entity.entityID as entityID, entity.name as name, entity.des as description
+        """
+
+    assert backend.run_read_query(query, type_entity=["Organization", "Location"],
+                                  property="mô tả").value("entityID") == ["o1", "l1"]
+
+
+def test_degrees_and_references_are_counted(backend):
+    size = """
+        MATCH (entity:Person{entityID: $id_entity})
+        RETURN size((entity)<-[:MENTIONS]-()) as numAppearance
+        """
+
+    assert backend.run_read_query(size, id_entity="p1").single()["numAppearance"] == 2
+    assert backend.run_read_query(REFERENCED_QUERIES["Person"], id_entity="p2").single()["numAppearance"] == 1
+    assert backend.run_read_query(REFERENCED_QUERIES["Person"], id_entity="o1").single()["numAppearance"] == 0
+
+
+def test_nodes_are_matched_updated_and_deleted(backend):
+    match = "MATCH (per:Person{entityID: $id}) RETURN " + ENTITY_PROJECTION
+    update = "MATCH (per:Person{entityID: $id}) SET per = $props RETURN " + ENTITY_PROJECTION
+
+    backend.run_write_query(update, id="p2", props={"entityID": "p2", "name": "B", "des": "B"})
+    assert backend.run_read_query(match, id="p2").data() == [{"entityID": "p2", "name": "B", "description": "B"}]
+    node = backend.run_read_query("MATCH (fact:Fact{entityID: $id}) RETURN fact", id="f1").single()["fact"]
+    assert node["entityID"] == "f1" and set(node.labels) == {"Fact"}
+
+    with pytest.raises(CypherError):
+        backend.run_write_query("MATCH (per:Person{entityID: $id}) DELETE per", id="p2")
+    backend.run_write_query("MATCH (per:Person{entityID: $id}) DETACH DELETE per", id="p2")
+    assert backend.run_read_query(match, id="p2").data() == []
+
+
+def test_news_sets_hold_each_news_once(backend):
+    backend.run_write_query(ADD_MEMBERS_QUERY, name="set", ids=["n2", "n1", "missing"])
+    backend.run_write_query(ADD_MEMBERS_QUERY, name="set", ids=["n1"])
+
+    assert backend.run_read_query(MEMBERS_PAGE_QUERY, name="set", after="", limit=10).value("entityID") == \
+        ["n1", "n2"]
+    assert backend.run_read_query(MEMBERS_PAGE_QUERY, name="set", after="n1", limit=10).value("entityID") == ["n2"]
+
+
+def test_nodes_are_created_from_inline_properties(backend):
+    query = """
+        CREATE (usr:User { username: $usr, password: $paswd, isAdmin: $isAd })
+        RETURN usr.username as username, usr.isAdmin as isAdmin
+        """
+
+    assert backend.run_write_query(query, usr="user", paswd="hash", isAd=False).data() == \
+        [{"username": "user", "isAdmin": False}]
+
+
+def test_merged_nodes_keep_every_relationship(backend):
+    query = """
+        UNWIND $entity_id_set as entity_id
+        MATCH (node:Person{entityID: entity_id})
+        WITH collect(node) as nodes
+        CALL apoc.refactor.mergeNodes(nodes, {properties: {entityID: "discard", name:"combine", des:"combine"},
+                mergeRels:True})
+        YIELD node
+        RETURN node.entityID as entityID, node.name as name
+        """
+
+    merged = backend.run_write_query(query, entity_id_set=["p1", "p2"]).single()
+
+    assert merged["entityID"] == "p1" and merged["name"] == ["Nguyễn Văn A", "Trần Văn B"]
+    assert backend.run_read_query(REFERENCED_QUERIES["Person"], id_entity="p1").single()["numAppearance"] == 3
+    assert backend.graph.find("Person", {"entityID": "p2"}) == []
+
+
+def test_facts_are_created_with_their_counters(backend):
+    backend.run_write_query(CREATE_FACTS_QUERIES[MEETS], rows=[
+        {"id_news": "n2", "id_fact": "f3", "id_subject": "p2", "id_object": "p1", "id_location": "l1",
+         "id_time": None},
+        {"id_news": "n2", "id_fact": "f4", "id_subject": "p2", "id_object": "missing", "id_location": None,
+         "id_time": None}])
+
+    assert mentions(backend, "n1") == {"p1": 1, "p2": 1, "l1": 1}
+    assert mentions(backend, "n2") == {"p1": 2, "o1": 1, "p2": 1, "l1": 1}
+    assert backend.graph.find("Fact", {"entityID": "f4"}) == []
+
+
+def test_facts_and_news_are_deleted_with_their_counters(backend):
+    delete_fact = """
+        MATCH (news:News{entityID: $id_news})-[:HAS_FACT]-(fact:Fact{entityID: $id_fact})
+        OPTIONAL MATCH (fact)-[reference]->(entity)<-[mention:MENTIONS]-(news)
+        WITH fact, mention, count(reference) as references
+        SET mention.facts = mention.facts - references
+        WITH fact, collect(mention) as mentions
+        FOREACH (mention IN [mention IN mentions WHERE mention.facts <= 0] | DELETE mention)
+        DETACH DELETE fact
+        """
+    delete_news = """
+        MATCH (news:News{entityID: $id_news})
+        OPTIONAL MATCH (news)-[:HAS_FACT]->(fact:Fact)
+        DETACH DELETE news, fact
+        """
+
+    backend.run_write_query(delete_fact, id_news="n1", id_fact="f1")
+    assert mentions(backend, "n1") == {} and backend.graph.find("Fact", {"entityID": "f1"}) == []
+    backend.run_write_query(delete_news, id_news="n2")
+    assert backend.graph.find("News", {"entityID": "n2"}) == [] and backend.graph.find("Fact", {"entityID": "f2"}) == []
+
+
+def test_counters_are_repaired_by_news_and_by_entity(backend):
+    for news_id in ["n1", "n2"]:
+        news = backend.graph.find_one("News", {"entityID": news_id})
+        for rel in list(news.outgoing.values()):
+            if rel.type == "MENTIONS":
+                backend.graph.delete_relationship(rel)
+
+    backend.run_write_query(REPAIR_NEWS_QUERY, ids=["n1"])
+    backend.run_write_query(REPAIR_ENTITY_QUERIES["Organization"], id_entity="o1")
+
+    assert mentions(backend, "n1") == {"p1": 1, "p2": 1, "l1": 1}
+    assert mentions(backend, "n2") == {"o1": 1}
+
+
+def test_relations_are_read_per_news_and_per_set(backend):
+    in_news = """
+        MATCH (news:News{entityID: $id})-[:HAS_FACT]->(facts:Fact)-[rel]->(entity)
+        USING INDEX news:News(entityID)
+        RETURN facts, rel, entity
+        """
+
+    records = backend.run_read_query(in_news, id="n1").records()
+    assert sorted(record["entity"]["entityID"] for record in records) == ["l1", "p1", "p2"]
+    by_news = backend.run_read_query(RELATIONS_BY_NEWS, set_news_id=["n1", "n2"]).data("newsID")
+    assert sorted(record["newsID"] for record in by_news) == ["n1", "n1", "n1", "n2", "n2"]
+    typed = backend.run_read_query(TYPE_RELATIONS_BY_NEWS, set_news_id=["n1", "n2"], type_entity=["Organization"])
+    assert [record["entity"]["entityID"] for record in typed] == ["o1"]
+    graph = backend.run_read_query(in_news, id="n2").graph()
+    assert {node["entityID"] for node in graph.nodes} == {"f2", "p1", "o1"}
+
+
+def test_relations_of_an_entity_are_read_through_its_facts(backend):
+    in_news = backend.run_read_query(INDIVIDUAL_RELATIONS_IN_NEWS["Organization"], id_news="n2", id_entity="o1")
+    by_news = backend.run_read_query(INDIVIDUAL_RELATIONS_BY_NEWS["Person"], set_news_id=["n1", "n2"],
+                                     id_entity="p2")
+
+    assert sorted(record["entity"]["entityID"] for record in in_news) == ["o1", "p1"]
+    assert {record["newsID"] for record in by_news} == {"n1"}
+    assert backend.run_read_query(INDIVIDUAL_RELATIONS_IN_NEWS["Organization"], id_news="n2",
+                                  id_entity="p1").data() == []
+
+
+def test_appearances_are_summed_from_the_counters(backend):
+    assert backend.run_read_query(APPEARANCE_IN_NEWS["Person"], id_news="n1", id_entity="p1").single()[0] == 1
+    assert backend.run_read_query(APPEARANCE_IN_SET_NEWS["Person"], set_id_news=["n1", "n2"],
+                                  id_entity="p1").single()["numberAppearance"] == 2
+    assert backend.run_read_query(APPEARANCE_IN_SET_NEWS["Location"], set_id_news=["n2"],
+                                  id_entity="l1").single()["numberAppearance"] == 0
+
+
+def test_detailed_facts_list_their_predicates_and_entities(backend):
+    query = """
+        MATCH(news:News{entityID: $id_news})-[:HAS_FACT]->(facts:Fact)
+        USING INDEX news:News(entityID)
+        WITH facts
+        MATCH (facts)-[r]->(entity)
+        RETURN facts.entityID as factID, collect(type(r)) as predicate, collect(entity.entityID) as entityID
+        """
+
+    fact, = backend.run_read_query(query, id_news="n1").data()
+
+    assert fact["factID"] == "f1"
+    assert sorted(zip(fact["predicate"], fact["entityID"])) == \
+        [("HAS_OBJECT_GẶP_GỠ", "p2"), ("HAS_SUBJECT_GẶP_GỠ", "p1"), ("OCCURRED_IN", "l1")]
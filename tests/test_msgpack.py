@@ -0,0 +1,43 @@
+import datetime
+from itertools import count
+
+import pytest
+
+from application.times.service import TimeService
+from application.utilities.representations import MSGPACK_MIMETYPE, _msgpack_default
+
+msgpack = pytest.importorskip("msgpack")
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-msgpack-test-%d" % (prefix, next(_ids))
+
+
+def test_resources_are_encoded_as_asked_by_the_accept_header(client, admin_headers, user_headers):
+    person_id = unique("person")
+    client.post("/api/persons/", json={"entityID": person_id, "name": "Người", "des": "Mô tả"}, headers=admin_headers)
+    url = "/api/persons/" + person_id
+
+    packed = client.get(url, headers=dict(user_headers, Accept=MSGPACK_MIMETYPE))
+    anything = client.get(url, headers=dict(user_headers, Accept="*/*"))
+
+    assert packed.mimetype == MSGPACK_MIMETYPE
+    assert msgpack.unpackb(packed.get_data(), raw=False) == client.get(url, headers=user_headers).get_json()
+    assert anything.mimetype == "application/json"
+
+
+def test_temporal_values_are_packed_as_json_writes_them(client, user_headers):
+    time_id = unique("time")
+    TimeService.create({"entityID": time_id, "name": "Tết", "des": datetime.date(2020, 1, 25)})
+    url = "/api/times/" + time_id
+
+    packed = client.get(url, headers=dict(user_headers, Accept=MSGPACK_MIMETYPE))
+
+    assert msgpack.unpackb(packed.get_data(), raw=False) == client.get(url, headers=user_headers).get_json()
+
+
+def test_values_without_an_encoding_are_refused():
+    with pytest.raises(TypeError):
+        _msgpack_default(object())
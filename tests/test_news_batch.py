@@ -0,0 +1,67 @@
+from itertools import count
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-batch-test-%d" % (prefix, next(_ids))
+
+
+def news_item(**properties):
+    news_id = unique("news")
+    return dict({"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]}, **properties)
+
+
+def create_entities(client, headers):
+    """A subject, an object, a location and a time for the facts of a news"""
+    entities = {}
+    for role, namespace in [("subject", "persons"), ("object", "persons"), ("location", "locations"),
+                            ("time", "times")]:
+        entities[role] = unique(role)
+        client.post("/api/%s/" % namespace, json={"entityID": entities[role], "name": role, "des": role},
+                    headers=headers)
+    return entities
+
+
+def fact_item(entities):
+    return {"entityID": unique("fact"), "relation": "gặp gỡ", "subject_id": entities["subject"],
+            "subject_type": "Person", "object_id": entities["object"], "object_type": "Person",
+            "location_id": entities["location"], "location_type": "Location", "time_id": entities["time"],
+            "time_type": "Time"}
+
+
+def test_a_batch_creates_the_news_with_their_facts(client, admin_headers):
+    item = news_item(facts=[fact_item(create_entities(client, admin_headers))])
+
+    response = client.post("/api/news/batch", json={"news": [item]}, headers=admin_headers)
+
+    assert response.status_code == 201
+    assert response.get_json()["errors"] == []
+    facts = client.get("/api/news/%s/facts" % item["entityID"], headers=admin_headers).get_json()
+    assert [fact["factID"] for fact in facts] == [item["facts"][0]["entityID"]]
+
+
+def test_facts_that_are_not_objects_are_reported_per_item(client, admin_headers):
+    item = news_item(facts=["x", fact_item(create_entities(client, admin_headers))])
+
+    response = client.post("/api/news/batch", json={"news": [item]}, headers=admin_headers)
+
+    assert response.status_code == 207
+    assert [(error["newsID"], error["factID"]) for error in response.get_json()["errors"]] == \
+        [(item["entityID"], None)]
+
+
+def test_facts_that_are_not_a_list_are_reported_per_item(client, admin_headers):
+    item, other = news_item(facts=5), news_item()
+
+    response = client.post("/api/news/batch", json={"news": [item, other]}, headers=admin_headers)
+
+    assert response.status_code == 207
+    assert [error["newsID"] for error in response.get_json()["errors"]] == [item["entityID"]]
+    assert client.get("/api/news/" + other["entityID"], headers=admin_headers).status_code == 200
+
+
+def test_a_batch_without_a_news_list_is_rejected(client, admin_headers):
+    response = client.post("/api/news/batch", json={"news": 5}, headers=admin_headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,85 @@
+from application.utilities import news_cache
+from application.utilities.news_cache import NewsResultCache
+
+
+def entities(result):
+    return result["entities"]
+
+
+def result(*entity_ids):
+    return {"entities": list(entity_ids)}
+
+
+def test_missing_results_are_loaded_together_once():
+    cache = NewsResultCache()
+    calls = []
+
+    def loader(missing):
+        calls.append(missing)
+        return {key: result(key[0] + "-person") for key in missing}
+
+    first = cache.load_many([("news-1",), ("news-2",)], loader, entities)
+    second = cache.load_many([("news-2",), ("news-3",)], loader, entities)
+
+    assert calls == [[("news-1",), ("news-2",)], [("news-3",)]]
+    assert second[("news-2",)] is first[("news-2",)]
+    assert cache.statistics()["hits"] == 1 and cache.statistics()["misses"] == 3
+
+
+def test_the_least_recently_used_results_are_evicted():
+    cache = NewsResultCache(max_size=2)
+    for news_id in ["news-1", "news-2"]:
+        cache.load((news_id,), lambda: result(), entities)
+    cache.load(("news-1",), lambda: result(), entities)
+    cache.load(("news-3",), lambda: result(), entities)
+
+    found, missing, _ = cache.lookup([("news-1",), ("news-2",), ("news-3",)])
+
+    assert sorted(found) == [("news-1",), ("news-3",)] and missing == [("news-2",)]
+    assert cache.statistics()["evictions"] == 1 and cache.statistics()["size"] == 2
+
+
+def test_results_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(news_cache.time, "monotonic", lambda: now[0])
+    cache = NewsResultCache(ttl=10)
+    cache.load(("news-1",), lambda: result(), entities)
+
+    now[0] = 109.0
+    assert cache.lookup([("news-1",)])[1] == []
+    now[0] = 111.0
+    assert cache.lookup([("news-1",)])[1] == [("news-1",)]
+
+
+def test_writes_evict_the_results_of_their_news_or_entities_only():
+    cache = NewsResultCache()
+    cache.load(("news-1",), lambda: result("person-1"), entities)
+    cache.load(("news-1", "Person", "person-2"), lambda: result("person-2"), entities)
+    cache.load(("news-2",), lambda: result("person-2"), entities)
+    cache.load(("news-3",), lambda: result("person-3"), entities)
+
+    cache.invalidate_entities(["person-2"])
+    assert sorted(cache.lookup([("news-1",), ("news-2",), ("news-3",)])[0]) == [("news-1",), ("news-3",)]
+    cache.invalidate_news(["news-1"])
+
+    assert list(cache.lookup([("news-1",), ("news-3",)])[0]) == [("news-3",)]
+    assert cache.statistics()["invalidations"] == 3
+
+
+def test_a_result_read_before_an_invalidation_is_not_stored():
+    cache = NewsResultCache()
+    _, missing, generation = cache.lookup([("news-1",)])
+
+    cache.invalidate_news(["news-1"])
+    cache.store({("news-1",): result("person-1")}, entities, generation)
+
+    assert cache.lookup([("news-1",)])[1] == [("news-1",)]
+
+
+def test_the_cache_is_reported_and_emptied_by_admins(client, admin_headers, user_headers):
+    assert client.delete("/api/admin/cache", headers=user_headers).status_code == 405
+    assert client.delete("/api/admin/cache", headers=admin_headers).status_code == 200
+
+    statistics = client.get("/api/admin/cache", headers=admin_headers).get_json()["newsResults"]
+
+    assert statistics["size"] == 0 and statistics["maxSize"] > 0
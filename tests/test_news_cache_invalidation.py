@@ -0,0 +1,132 @@
+import asyncio
+from itertools import count
+
+import pytest
+
+from application.news.async_service import AsyncNewsService
+from application.news.service import NewsService
+from application.organizations.service import OrganizationService
+from application.persons.service import PersonService
+from application.utilities.news_cache import news_result_cache
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-cache-test-%d" % (prefix, next(_ids))
+
+
+def create_person(name: str = "Person") -> str:
+    person_id = unique("person")
+    PersonService.create({"entityID": person_id, "name": name, "des": name})
+    return person_id
+
+
+def create_news() -> str:
+    news_id = unique("news")
+    NewsService.create({"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]})
+    return news_id
+
+
+def create_fact(news_id: str, subject_id: str) -> str:
+    organization_id = unique("organization")
+    OrganizationService.create({"entityID": organization_id, "name": "Organization", "des": "Organization"})
+    fact_id = unique("fact")
+    NewsService.create_fact(news_id, {"entityID": fact_id, "relation": "gặp gỡ", "subject_id": subject_id,
+                                      "subject_type": "Person", "object_id": organization_id,
+                                      "object_type": "Organization", "location_id": None,
+                                      "location_type": "Location", "time_id": None, "time_type": "Time"})
+    return fact_id
+
+
+def graph_nodes(document):
+    return document["results"][0]["data"][0]["graph"]["nodes"]
+
+
+def fact_ids(document):
+    return {node["id"] for node in graph_nodes(document) if "Fact" in node["labels"]}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    news_result_cache.clear()
+    yield
+    news_result_cache.clear()
+
+
+def test_merge_evicts_the_news_without_facts_of_the_entity_kept():
+    people = [create_person(), create_person()]
+    news = [create_news(), create_news()]
+    facts = [create_fact(news_id, person_id) for news_id, person_id in zip(news, people)]
+    # the entity kept by the merge is not known beforehand: both are read, each in one news only
+    for person_id, fact_id in zip(people, facts):
+        assert fact_ids(NewsService.get_entity_individual_relations_in_set_news(news, person_id)) == {fact_id}
+
+    kept = NewsService.merge_nodes(people, "Person")["id"]
+
+    assert fact_ids(NewsService.get_entity_individual_relations_in_set_news(news, kept)) == set(facts)
+
+
+def test_merge_evicts_the_documents_of_the_async_reads():
+    people = [create_person(), create_person()]
+    news = [create_news(), create_news()]
+    facts = [create_fact(news_id, person_id) for news_id, person_id in zip(news, people)]
+    read = AsyncNewsService.get_entity_individual_relations_in_set_news
+    for person_id, fact_id in zip(people, facts):
+        assert fact_ids(asyncio.run(read(news, person_id))) == {fact_id}
+
+    kept = NewsService.merge_nodes(people, "Person")["id"]
+
+    assert fact_ids(asyncio.run(read(news, kept))) == set(facts)
+
+
+def test_update_of_an_entity_evicts_the_documents_holding_it():
+    person_id = create_person("Before")
+    news_id = create_news()
+    create_fact(news_id, person_id)
+    NewsService.get_all_relations_in_news(news_id)
+
+    PersonService.update({"entityID": person_id, "name": "After", "des": "After"}, person_id)
+
+    names = {node["properties"]["name"] for node in graph_nodes(NewsService.get_all_relations_in_news(news_id))
+             if node["id"] == person_id}
+    assert names == {"After"}
+
+
+def test_delete_of_an_entity_evicts_its_empty_documents():
+    person_id = create_person()
+    news_id = create_news()
+    NewsService.get_entity_individual_relations_in_set_news([news_id], person_id)
+    key = (news_id, "entity_relations", person_id, ("Person",))
+    assert news_result_cache.lookup([key])[0]
+
+    PersonService.delete(person_id)
+
+    assert not news_result_cache.lookup([key])[0]
+
+
+def test_creation_of_a_fact_evicts_the_documents_of_its_news():
+    person_id = create_person()
+    news_id = create_news()
+    first_fact = create_fact(news_id, person_id)
+    assert fact_ids(NewsService.get_all_relations_in_news(news_id)) == {first_fact}
+    assert fact_ids(NewsService.get_entity_individual_relations_in_set_news([news_id], person_id)) == {first_fact}
+
+    second_fact = create_fact(news_id, person_id)
+
+    assert fact_ids(NewsService.get_all_relations_in_news(news_id)) == {first_fact, second_fact}
+    assert fact_ids(NewsService.get_entity_individual_relations_in_set_news([news_id], person_id)) == \
+        {first_fact, second_fact}
+
+
+def test_deletion_of_a_fact_evicts_the_documents_of_its_news():
+    person_id = create_person()
+    news_id = create_news()
+    first_fact, second_fact = create_fact(news_id, person_id), create_fact(news_id, person_id)
+    assert fact_ids(NewsService.get_all_relations_in_news(news_id)) == {first_fact, second_fact}
+    assert len(NewsService.get_detailed_facts_in_news(news_id)) == 2
+
+    NewsService.delete_fact(news_id, first_fact)
+
+    assert fact_ids(NewsService.get_all_relations_in_news(news_id)) == {second_fact}
+    assert [fact["factID"] for fact in NewsService.get_detailed_facts_in_news(news_id)] == [second_fact]
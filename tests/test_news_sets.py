@@ -0,0 +1,89 @@
+import json
+from itertools import count
+from urllib.parse import parse_qs, urlsplit
+
+from application.news.service import NewsService
+from application.persons.service import PersonService
+from application.utilities import streaming
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-set-test-%d" % (prefix, next(_ids))
+
+
+def create_news_with_fact(person_id: str) -> str:
+    news_id = unique("news")
+    NewsService.create({"entityID": news_id, "link": "http://" + news_id, "topics": ["test"]})
+    other_id = unique("person")
+    PersonService.create({"entityID": other_id, "name": "Other", "des": "Other"})
+    NewsService.create_fact(news_id, {"entityID": unique("fact"), "relation": "gặp gỡ", "subject_id": person_id,
+                                      "subject_type": "Person", "object_id": other_id, "object_type": "Person",
+                                      "location_id": None, "location_type": "Location", "time_id": None,
+                                      "time_type": "Time"})
+    return news_id
+
+
+def create_person() -> str:
+    person_id = unique("person")
+    PersonService.create({"entityID": person_id, "name": "Person", "des": "Person"})
+    return person_id
+
+
+def fact_count(document) -> int:
+    return sum("Fact" in node["labels"] for node in document["results"][0]["data"][0]["graph"]["nodes"])
+
+
+def test_sets_sent_in_the_body_beyond_the_limit_must_be_streamed(client, user_headers, monkeypatch):
+    person_id = create_person()
+    news = [create_news_with_fact(person_id) for _ in range(3)]
+    monkeypatch.setattr(streaming, "SET_NEWS_MAX_IDS", 2)
+
+    assert client.post("/api/news/relations", json={"set_news_id": news[:2] + news[:1]},
+                       headers=user_headers).status_code == 200
+    for url in ["/api/news/relations", "/api/news/entity/%s/relations" % person_id]:
+        assert client.post(url, json={"set_news_id": news}, headers=user_headers).status_code == 413
+    assert client.post("/api/news/type/relations", json={"set_news_id": news, "set_entity_types": ["Person"]},
+                       headers=user_headers).status_code == 413
+
+    streamed = client.post("/api/news/relations?stream=ndjson", json={"set_news_id": news}, headers=user_headers)
+    assert streamed.status_code == 200
+    lines = [json.loads(line) for line in streamed.get_data(as_text=True).splitlines()]
+    assert sum("Fact" in line["node"]["labels"] for line in lines if "node" in line) == 3
+
+
+def test_news_sets_are_read_page_by_page_keeping_the_arguments(client, admin_headers, user_headers):
+    person_id = create_person()
+    news = [create_news_with_fact(person_id) for _ in range(5)]
+    name = unique("set")
+    assert client.post("/api/news-sets/" + name, json={"set_news_id": news[:3]}, headers=admin_headers).status_code \
+        == 200
+    client.post("/api/news-sets/" + name, json={"set_news_id": news[2:] + [unique("missing")]}, headers=admin_headers)
+    assert client.get("/api/news-sets/" + name, headers=user_headers).get_json()["size"] == 5
+
+    url = "/api/news-sets/%s/entity/%s/relations?type=Person&limit=2" % (name, person_id)
+    facts = []
+    while url:
+        page = client.get(url, headers=user_headers).get_json()
+        facts.append(fact_count(page["data"]))
+        url = page["next"]
+        if url:
+            assert parse_qs(urlsplit(url).query)["type"] == ["Person"]
+    assert facts == [2, 2, 1]
+
+    appearance = client.get("/api/news-sets/%s/appearance/%s" % (name, person_id), headers=user_headers)
+    assert appearance.get_json()["numberAppearance"] == 5
+
+
+def test_news_sets_are_written_by_admins_only(client, admin_headers, user_headers):
+    name = unique("set")
+    news_id = create_news_with_fact(create_person())
+
+    assert client.post("/api/news-sets/" + name, json={"set_news_id": [news_id]},
+                       headers=user_headers).status_code == 405
+    assert client.post("/api/news-sets/" + name, json={"set_news_id": [news_id]},
+                       headers=admin_headers).status_code == 200
+    assert client.delete("/api/news-sets/" + name, headers=user_headers).status_code == 405
+    assert client.delete("/api/news-sets/" + name, headers=admin_headers).status_code == 200
+    assert client.get("/api/news-sets/" + name, headers=user_headers).status_code == 404
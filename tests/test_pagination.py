@@ -0,0 +1,71 @@
+from itertools import count
+from urllib.parse import parse_qs, urlsplit
+
+from application.utilities import paginating
+from application.utilities.paginating import decode_cursor, encode_cursor
+
+_ids = count()
+
+
+def unique(prefix: str) -> str:
+    return "%s-page-test-%d" % (prefix, next(_ids))
+
+
+def create_agreements(client, headers, number: int):
+    ids = [unique("agreement") for _ in range(number)]
+    for agreement_id in ids:
+        client.post("/api/agreements/", json={"entityID": agreement_id, "name": "Hiệp định", "des": "Hiệp định"},
+                    headers=headers)
+    return ids
+
+
+def path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + "?" + parts.query
+
+
+def test_cursors_hold_the_sort_keys_of_a_record_only():
+    cursor = encode_cursor({"entityID": "người-1", "score": 0.5, "name": "ignored"})
+
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == {"entityID": "người-1", "score": 0.5}
+
+
+def test_cursors_that_were_not_encoded_here_are_refused():
+    assert decode_cursor("not a cursor!") is None
+    assert decode_cursor(encode_cursor({"entityID": "a"})[:-2]) is None
+    assert decode_cursor("WzFd") is None  # [1]
+    assert decode_cursor("eyJvdGhlciI6MX0") is None  # {"other":1}
+
+
+def test_a_listing_is_read_page_by_page_after_the_last_id(client, admin_headers, user_headers):
+    created = create_agreements(client, admin_headers, 5)
+
+    url, seen, pages = "/api/agreements/?limit=2", [], 0
+    while url:
+        page = client.get(url, headers=user_headers).get_json()
+        seen += [agreement["entityID"] for agreement in page["data"]]
+        url = page["next"] and path(page["next"])
+        pages += 1
+        assert url is None or "cursor=" in url
+
+    assert seen == sorted(set(seen)) and set(created) <= set(seen)
+    assert pages == len(seen) // 2 + 1
+
+
+def test_offsets_are_still_accepted(client, admin_headers, user_headers):
+    create_agreements(client, admin_headers, 3)
+
+    page = client.get("/api/agreements/?start=1&limit=2", headers=user_headers).get_json()
+
+    assert len(page["data"]) == 2
+    assert parse_qs(urlsplit(page["next"]).query) == {"start": ["3"], "limit": ["2"]}
+    assert parse_qs(urlsplit(page["previous"]).query) == {"start": ["0"], "limit": ["1"]}
+
+
+def test_pages_are_capped_and_invalid_cursors_rejected(client, admin_headers, user_headers, monkeypatch):
+    create_agreements(client, admin_headers, 3)
+    monkeypatch.setattr(paginating, "LIMIT_PAGIN", 2)
+
+    assert len(client.get("/api/agreements/?limit=100", headers=user_headers).get_json()["data"]) == 2
+    assert client.get("/api/agreements/?cursor=garbage!", headers=user_headers).status_code == 400
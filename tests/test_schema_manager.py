@@ -0,0 +1,75 @@
+import time
+
+from application.utilities.data_access_object import DataAccessObject
+from application.utilities.memory_graph import MemoryBackend
+from application.utilities.schema_manager import MIGRATIONS, NEWS_INDEX, SchemaManager, SchemaMigration
+
+
+def database(*statements):
+    dao = DataAccessObject(MemoryBackend())
+    for statement in statements:
+        dao.run_write_query(statement)
+    return dao
+
+
+def index_names(manager):
+    return {index["name"] for index in manager.indexes()}
+
+
+def test_a_new_database_is_brought_to_the_latest_version():
+    manager = SchemaManager(database())
+
+    status = manager.migrate()
+
+    assert (status["version"], status["targetVersion"], status["migration"]) == (3, 3, "done")
+    assert status["errors"] == [] and status["missingIndexes"] == []
+    assert "index_news" not in index_names(manager) and "news_entity_id" in index_names(manager)
+    assert manager.migrate()["errors"] == []
+
+
+def test_indexes_created_before_the_versions_were_recorded_are_kept():
+    manager = SchemaManager(database(NEWS_INDEX), MIGRATIONS[:1])
+
+    status = manager.migrate()
+
+    assert status["version"] == 1 and status["errors"] == []
+
+
+def test_duplicated_keys_leave_the_version_unchanged_until_removed():
+    dao = database()
+    for _ in range(2):
+        dao.run_write_query("CREATE (per:Person $props) RETURN per.entityID as entityID",
+                            props={"entityID": "person", "name": "Person", "des": "Person"})
+    manager = SchemaManager(dao)
+
+    status = manager.migrate()
+
+    assert (status["version"], status["migration"]) == (1, "failed")
+    assert status["errors"] == ["version 2: duplicate Person entityID 'person' on 2 nodes"]
+    assert "index_news" in index_names(manager) and "person_entity_id" not in index_names(manager)
+
+    dao.backend.graph.delete_node(dao.backend.graph.find("Person", {"entityID": "person"})[0])
+    assert manager.migrate()["version"] == 3
+
+
+def test_a_failing_statement_restores_what_the_migration_dropped():
+    failing = SchemaMigration(2, "drop the news index then fail", ["DROP INDEX index_news", "NOT CYPHER"],
+                              dropped=["index_news"], restore=[NEWS_INDEX])
+    manager = SchemaManager(database(), MIGRATIONS[:1] + [failing])
+
+    status = manager.migrate()
+
+    assert (status["version"], status["migration"]) == (1, "failed")
+    assert len(status["errors"]) == 1 and status["errors"][0].startswith("version 2: ")
+    assert "index_news" in index_names(manager)
+    assert status["missingIndexes"] == []
+
+
+def test_migrations_run_in_a_background_thread():
+    manager = SchemaManager(database())
+
+    assert manager.migrate_in_background()
+    while manager.status()["migration"] == "running":
+        time.sleep(0.01)
+
+    assert manager.status()["migration"] == "done" and manager.current_version() == 3
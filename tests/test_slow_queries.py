@@ -0,0 +1,117 @@
+import logging
+import time
+
+import pytest
+from neo4j import CypherError
+
+from application.utilities.data_access_object import DataAccessObject
+from application.utilities.memory_graph import MemoryBackend
+from application.utilities.slow_queries import SlowQueryLog, parameter_shape, plan_operators
+
+PLAN = {"operator": "ProduceResults", "totalDbHits": 12, "children": [
+    {"operator": "Filter", "children": [{"operator": "NodeByLabelScan", "children": []}]},
+    {"operator": "NodeByLabelScan", "children": []}]}
+
+
+class Profiler:
+    """Record the profiled queries, answering with plan"""
+    def __init__(self, plan=PLAN):
+        self.plan = plan
+        self.calls = []
+
+    def __call__(self, query, params, execute):
+        self.calls.append((query, execute))
+        if isinstance(self.plan, Exception):
+            raise self.plan
+        return self.plan
+
+
+def profiled(log: SlowQueryLog):
+    """The entries of the log once their plans are captured"""
+    for _ in range(200):
+        entries = log.entries()
+        if all(entry["profile"]["state"] != "pending" for entry in entries):
+            return entries
+        time.sleep(0.01)
+    raise AssertionError("the plans were not captured")
+
+
+def test_parameters_are_described_by_their_shape():
+    assert parameter_shape({"id": "secret", "ids": ["a", "b", 3], "limit": 10, "score": 0.5, "flag": True,
+                            "none": None, "rows": [{"entityID": "x"}], "empty": []}) == {
+        "id": "string", "ids": "list<integer|string>[3]", "limit": "integer", "score": "float", "flag": "boolean",
+        "none": "null", "rows": "list<{'entityID': 'string'}>[1]", "empty": "list<any>[0]"}
+
+
+def test_the_operators_of_a_plan_are_listed_from_the_leaves_once():
+    assert plan_operators(PLAN) == ["NodeByLabelScan", "Filter", "ProduceResults"]
+
+
+def test_only_the_last_slow_queries_are_kept_without_their_values(caplog):
+    log = SlowQueryLog(Profiler(), threshold_ms=100, size=2)
+
+    with caplog.at_level(logging.WARNING, logger="application.utilities.slow_queries"):
+        log.observe("fast", "read", "MATCH (n) RETURN n", {}, 0.05, 1)
+        for method, seconds in [("first", 0.2), ("second", 0.5), ("third", 0.3)]:
+            log.observe(method, "read", "MATCH (n {id: $id})\n  RETURN n", {"id": "secret"}, seconds, 1)
+
+    entries = log.entries()
+    assert [entry["method"] for entry in entries] == ["second", "third"]
+    assert entries[0]["query"] == "MATCH (n {id: $id}) RETURN n" and entries[0]["parameters"] == {"id": "string"}
+    assert entries[0]["profile"] is None
+    assert len(caplog.records) == 3 and all("secret" not in record.getMessage() for record in caplog.records)
+
+
+def test_slow_reads_are_profiled_and_writes_explained_once_per_text():
+    profiler = Profiler()
+    log = SlowQueryLog(profiler, threshold_ms=0, profile=True)
+
+    log.observe("read", "read", "MATCH (n) RETURN n", {}, 0.2, 1)
+    log.observe("read", "read", "MATCH (n) RETURN n", {}, 0.3, 1)
+    log.observe("write", "write", "CREATE (n)", {}, 0.2, 0)
+    entries = profiled(log)
+
+    assert profiler.calls == [("MATCH (n) RETURN n", True), ("CREATE (n)", False)]
+    modes = {entry["query"]: (entry["profile"]["mode"], entry["profile"]["dbHits"]) for entry in entries}
+    assert modes == {"MATCH (n) RETURN n": ("PROFILE", 12), "CREATE (n)": ("EXPLAIN", 12)}
+    assert entries[0]["profile"]["operators"] == ["NodeByLabelScan", "Filter", "ProduceResults"]
+
+
+def test_plans_that_cannot_be_captured_are_reported():
+    unsupported = SlowQueryLog(Profiler(plan=None), threshold_ms=0, profile=True)
+    failing = SlowQueryLog(Profiler(plan=RuntimeError("no plan")), threshold_ms=0, profile=True)
+
+    for log in (unsupported, failing):
+        log.observe("read", "read", "MATCH (n) RETURN n", {}, 0.2, 1)
+
+    assert profiled(unsupported)[0]["profile"] == {"state": "unsupported"}
+    assert profiled(failing)[0]["profile"] == {"state": "failed", "error": "no plan"}
+
+
+class PeopleService:
+    @staticmethod
+    def get_by_id(dao, person_id):
+        return dao.run_read_query("MATCH (per:Person{entityID: $id}) RETURN per.entityID as entityID", id=person_id)
+
+
+def test_the_data_access_object_reports_the_calling_method_and_failures():
+    log = SlowQueryLog(Profiler(), threshold_ms=0)
+    dao = DataAccessObject(MemoryBackend(), slow_query_log=log)
+
+    PeopleService.get_by_id(dao, "person")
+    with pytest.raises(CypherError):
+        dao.run_read_query("NOT CYPHER")
+
+    entries = {entry["query"]: entry for entry in log.entries()}
+    assert entries["MATCH (per:Person{entityID: $id}) RETURN per.entityID as entityID"]["method"] == \
+        "PeopleService.get_by_id"
+    assert entries["NOT CYPHER"]["error"] is not None and entries["NOT CYPHER"]["rows"] == 0
+
+
+def test_the_slow_queries_are_reported_to_admins(client, admin_headers, user_headers):
+    assert client.get("/api/admin/slow-queries", headers=user_headers).status_code == 405
+
+    status = client.get("/api/admin/slow-queries", headers=admin_headers).get_json()
+
+    assert {"thresholdMs", "profile", "size", "queries"} <= set(status)
+    assert client.delete("/api/admin/slow-queries", headers=admin_headers).status_code == 200